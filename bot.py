@@ -1,31 +1,85 @@
 import os
+import time
 import discord
 from discord.ext import commands
 from discord import app_commands
 from dotenv import load_dotenv
 from utils.database import AnimeDatabase
 from utils.config import Config
+from utils.game_registry import GameRegistry
+from utils.http_sessions import HttpSessions
+from utils.metrics import COMMAND_SECONDS, MetricsServer, discord_trace, metrics
+from utils.profiler import LoopWatchdog
 
 # Load environment variables
 load_dotenv()
 TOKEN = os.getenv('DISCORD_TOKEN')
 
-class AnimeBot(commands.Bot):
-    def __init__(self):
+def gateway_options(profile=None):
+    """Get the intents and cache settings for a gateway profile"""
+    profile = profile or os.getenv('GATEWAY_PROFILE') or Config.GATEWAY_PROFILE
+    if profile == "full":
+        return {'intents': discord.Intents.all()}
+    if profile != "lean":
+        raise ValueError(f"Unknown gateway profile: {profile}")
+
+    # The games only read guild messages and reactions; members arrive with them
+    intents = discord.Intents.none()
+    intents.guilds = True
+    intents.guild_messages = True
+    intents.guild_reactions = True
+    intents.dm_messages = True
+    intents.message_content = True
+    return {
+        'intents': intents,
+        'member_cache_flags': discord.MemberCacheFlags.none(),
+        'max_messages': Config.MESSAGE_CACHE_SIZE,
+        'chunk_guilds_at_startup': False,
+    }
+
+class AnimeBot(commands.AutoShardedBot):
+    def __init__(self, shard_ids=None, shard_count=None, db=None, cluster_id=None):
+        # Without shard ids the bot runs every shard Discord recommends
         super().__init__(
             command_prefix=Config.PREFIX,
-            intents=discord.Intents.all(),
-            help_command=None
+            help_command=None,
+            shard_ids=shard_ids,
+            shard_count=shard_count,
+            http_trace=discord_trace(),  # Counts Discord API responses per route
+            **gateway_options()
         )
         
         self._command_locks = {}
+        self.sessions = HttpSessions()  # Shared HTTP sessions, opened on first use
+        self.cluster_id = cluster_id
+        self.games = GameRegistry()  # Channel -> cog running a game there
+        self.metrics_server = None
+        self.watchdog = LoopWatchdog(Config.WATCHDOG_INTERVAL, Config.WATCHDOG_THRESHOLD, Config.WATCHDOG_HISTORY)
         
-        # Initialize database
+        # Initialize database; a cluster launcher hands over a preloaded one
         print("Initializing database...")
-        self.db = AnimeDatabase()
+        self.db = db or AnimeDatabase()
+
+    def owns_guild(self, guild_id):
+        """Check if a guild's events are handled by this process"""
+        if self.shard_ids is None or self.shard_count is None:
+            return True
+        # DMs always arrive on shard 0
+        shard_id = (guild_id >> 22) % self.shard_count if guild_id else 0
+        return shard_id in self.shard_ids
 
     async def setup_hook(self):
         """Called before the bot starts running"""
+        self.db.api.use_session(self.sessions.get('jikan'))
+        metrics.gauge_callback(
+            'anibot_active_games', 'Games running in this process, by cog',
+            lambda: {(name,): count for name, count in self.games.counts().items()}, ['game']
+        )
+        if Config.WATCHDOG_ENABLED:
+            self.watchdog.start()
+        if Config.METRICS_ENABLED:
+            await self.start_metrics()
+
         print("Loading extensions...")
         try:
             # Initialize database first
@@ -39,6 +93,14 @@ class AnimeBot(commands.Bot):
             await self.load_extension('cogs.help')
             print("Loading character guess cog...")
             await self.load_extension('cogs.character_guess')
+            print("Loading opening guess cog...")
+            await self.load_extension('cogs.opening_guess')
+            print("Loading anime info cog...")
+            await self.load_extension('cogs.anime_info')  # ;anime, ;random_anime and the seasonal job
+            print("Loading message cog...")
+            await self.load_extension('cogs.message')  # Routes ;hint to the channel's game
+            print("Loading admin cog...")
+            await self.load_extension('cogs.admin')
             print("Extensions loaded!")
             
         except Exception as e:
@@ -62,6 +124,34 @@ class AnimeBot(commands.Bot):
         )
         print("Bot is ready!")
 
+    async def start_metrics(self):
+        """Serve Prometheus metrics"""
+        port = Config.METRICS_PORT + (self.cluster_id or 0)
+        self.metrics_server = MetricsServer(metrics, Config.METRICS_HOST, port)
+        try:
+            await self.metrics_server.start()
+        except OSError as e:
+            print(f"Could not serve metrics on port {port}: {e}")
+            self.metrics_server = None
+
+    async def invoke(self, ctx):
+        """Run a command and record how long it took"""
+        started = time.perf_counter()
+        try:
+            await super().invoke(ctx)
+        finally:
+            if ctx.command is not None:
+                COMMAND_SECONDS.observe(time.perf_counter() - started, ctx.command.qualified_name)
+
+    async def close(self):
+        """Close the shared HTTP sessions and metrics endpoint along with the bot"""
+        self.watchdog.stop()
+        if self.metrics_server:
+            await self.metrics_server.stop()
+        await self.sessions.close()
+        await self.db.close_stats()
+        await super().close()
+
     async def on_command_error(self, ctx, error):
         """Handle command errors"""
         if isinstance(error, commands.CommandNotFound):
@@ -69,10 +159,15 @@ class AnimeBot(commands.Bot):
         print(f"Command error: {str(error)}")
 
     async def on_message(self, message):
-        """Handle messages in both DMs and servers"""
+        """Route each message once, to the commands or to the channel's game"""
         if message.author.bot:
             return
-        await self.process_commands(message)
+        if message.content.startswith(Config.PREFIX):
+            await self.process_commands(message)
+            return
+        owner = self.games.get(message.channel.id)
+        if owner is not None:
+            await owner.route_message(message)
 
     async def load_extensions(self):
         """Load all cog extensions"""
@@ -95,8 +190,8 @@ class AnimeBot(commands.Bot):
         except Exception as e:
             print(f"Error loading extensions: {e}")
 
-def run_bot():
-    bot = AnimeBot()
+def run_bot(shard_ids=None, shard_count=None, db=None, cluster_id=None):
+    bot = AnimeBot(shard_ids=shard_ids, shard_count=shard_count, db=db, cluster_id=cluster_id)
     bot.run(TOKEN)
 
 if __name__ == "__main__":
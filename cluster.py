@@ -0,0 +1,113 @@
+"""Run the bot as several processes, each owning a contiguous range of shards.
+
+    python cluster.py --clusters 4 --shards 16
+
+The dataset is loaded and indexed once in the launcher and then shared with
+the workers through fork, frozen out of the garbage collector so its pages
+stay shared. Stats go to the shared SQLite store; game state stays in the
+process that owns the channel's shard.
+"""
+import argparse
+import asyncio
+import gc
+import multiprocessing
+import signal
+import sys
+import time
+
+import aiohttp
+
+from bot import TOKEN, run_bot
+from utils.config import Config
+from utils.database import AnimeDatabase
+
+
+def recommended_shard_count() -> int:
+    """Ask Discord how many shards the bot should run"""
+    async def fetch():
+        async with aiohttp.ClientSession() as session:
+            async with session.get(
+                "https://discord.com/api/v10/gateway/bot",
+                headers={"Authorization": f"Bot {TOKEN}"}
+            ) as resp:
+                resp.raise_for_status()
+                return (await resp.json())['shards']
+    return asyncio.run(fetch())
+
+
+def shard_ranges(shard_count: int, clusters: int):
+    """Split shard ids into ``clusters`` contiguous, near-equal ranges"""
+    clusters = max(1, min(clusters, shard_count))
+    size, extra = divmod(shard_count, clusters)
+    ranges, start = [], 0
+    for cluster_id in range(clusters):
+        end = start + size + (1 if cluster_id < extra else 0)
+        ranges.append(list(range(start, end)))
+        start = end
+    return ranges
+
+
+def run_cluster(cluster_id, shard_ids, shard_count, db):
+    """Worker process entry point"""
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    print(f"Cluster {cluster_id} starting shards {shard_ids[0]}-{shard_ids[-1]} of {shard_count}")
+    run_bot(shard_ids=shard_ids, shard_count=shard_count, db=db, cluster_id=cluster_id)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the bot as a cluster of processes")
+    parser.add_argument("--clusters", type=int, default=Config.CLUSTER_COUNT,
+                        help="Number of worker processes")
+    parser.add_argument("--shards", type=int, default=None,
+                        help="Total shard count (default: Discord's recommendation)")
+    args = parser.parse_args()
+
+    shard_count = args.shards or recommended_shard_count()
+    ranges = shard_ranges(shard_count, args.clusters)
+
+    # Fork shares the loaded dataset copy-on-write; elsewhere each worker loads its own
+    if 'fork' in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context('fork')
+        db = AnimeDatabase()
+        if not asyncio.run(db.ensure_initialized()):
+            print("Failed to initialize database!")
+            sys.exit(1)
+        gc.collect()
+        gc.freeze()  # Keep GC bookkeeping from touching the shared pages
+    else:
+        context = multiprocessing.get_context('spawn')
+        db = None
+
+    def start(cluster_id):
+        process = context.Process(
+            target=run_cluster,
+            args=(cluster_id, ranges[cluster_id], shard_count, db),
+            name=f"cluster-{cluster_id}"
+        )
+        process.start()
+        return process
+
+    print(f"Starting {len(ranges)} clusters for {shard_count} shards")
+    workers = {cluster_id: start(cluster_id) for cluster_id in range(len(ranges))}
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+
+    try:
+        while True:
+            time.sleep(1)
+            for cluster_id, process in list(workers.items()):
+                if process.is_alive():
+                    continue
+                print(f"Cluster {cluster_id} exited with code {process.exitcode}, "
+                      f"restarting in {Config.CLUSTER_RESTART_DELAY}s")
+                time.sleep(Config.CLUSTER_RESTART_DELAY)
+                workers[cluster_id] = start(cluster_id)
+    except (KeyboardInterrupt, SystemExit):
+        print("Stopping clusters...")
+        for process in workers.values():
+            process.terminate()
+        for process in workers.values():
+            process.join()
+
+
+if __name__ == "__main__":
+    main()
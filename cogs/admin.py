@@ -0,0 +1,68 @@
+import asyncio
+import io
+from datetime import datetime
+
+import discord
+from discord.ext import commands
+from utils.config import Config
+from utils.profiler import format_collapsed, sample_stacks
+
+class Admin(commands.Cog):
+    """Owner-only diagnostics"""
+
+    def __init__(self, bot):
+        self.bot = bot
+        self._profiling = asyncio.Lock()
+
+    async def cog_check(self, ctx):
+        return await self.bot.is_owner(ctx.author)
+
+    @commands.command(name='profile', help='Sample every thread for a while and upload the stacks')
+    async def profile(self, ctx, seconds: int = 10):
+        """Run the sampling profiler and send a flamegraph-ready collapsed-stack file"""
+        if self._profiling.locked():
+            await ctx.send("A profile is already running!")
+            return
+        seconds = max(1, min(seconds, Config.PROFILE_MAX_SECONDS))
+
+        async with self._profiling:
+            await ctx.send(f"Profiling for {seconds}s...")
+            counts = await asyncio.to_thread(sample_stacks, seconds, Config.PROFILE_INTERVAL)
+
+        # The innermost frames that were sampled most, as a quick summary
+        leaves = {}
+        for stack, count in counts.items():
+            leaf = stack.rsplit(';', 1)[-1]
+            leaves[leaf] = leaves.get(leaf, 0) + count
+        top = sorted(leaves.items(), key=lambda item: item[1], reverse=True)[:5]
+        total = sum(counts.values()) or 1
+        summary = "\n".join(f"`{count / total:6.1%}` {leaf}" for leaf, count in top)
+
+        data = io.BytesIO(format_collapsed(counts).encode('utf-8'))
+        filename = f"profile-{datetime.now():%Y%m%d-%H%M%S}.folded"
+        await ctx.send(
+            f"{total} samples over {seconds}s. Busiest frames:\n{summary}\n"
+            "Open the file in speedscope or pass it to flamegraph.pl.",
+            file=discord.File(data, filename=filename)
+        )
+
+    @commands.command(name='stalls', help='Show the last times the event loop was blocked')
+    async def stalls(self, ctx):
+        """Show the stalls the watchdog caught, with the stack of the latest"""
+        stalls = list(self.bot.watchdog.stalls)
+        if not stalls:
+            await ctx.send("No event loop stalls caught since start.")
+            return
+
+        lines = [f"`{stall['at']}` blocked {stall['seconds']:.2f}s" for stall in stalls[-10:]]
+        latest = stalls[-1]['stack']
+        data = io.BytesIO("\n\n".join(
+            f"{stall['at']} blocked {stall['seconds']:.2f}s\n{stall['stack']}" for stall in stalls
+        ).encode('utf-8'))
+        await ctx.send(
+            "\n".join(lines) + f"\n\nLatest:\n```py\n{latest[-1500:]}\n```",
+            file=discord.File(data, filename="stalls.txt")
+        )
+
+async def setup(bot):
+    await bot.add_cog(Admin(bot))
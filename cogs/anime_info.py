@@ -1,13 +1,67 @@
 import discord
-from discord.ext import commands
-import aiohttp
-from bs4 import BeautifulSoup
+from discord.ext import commands, tasks
 import random
+import time
+from datetime import timedelta
+from collections import defaultdict, deque
+from typing import Dict, List, Optional
+from utils.anime_api import AnimeAPI
+from utils.config import Config
+from utils.mal_parser import MalParser
+from utils.metrics import ANIME_LOOKUP_SECONDS, track_cache
+from utils.result_cache import ResultCache
+from utils.seasonal import SNAPSHOT_KINDS
+from utils.title_index import normalize_title
 
 class AnimeInfo(commands.Cog):
+    """Anime info commands, answered from the local dataset first.
+
+    Each command tries its sources in order: the anime data the crawler
+    already stored, then Jikan through AnimeAPI's response cache, and only
+    then scraping myanimelist.net, parsed in a worker process. Every source
+    returns plain dicts, so one embed builder serves all of them. Results
+    are kept in a ResultCache keyed by the normalized query. Seasonal
+    listings come only from the dataset's snapshot, which a background job
+    rebuilds.
+    """
+
     def __init__(self, bot):
         self.bot = bot
+        self.db = bot.db
+        self.api = AnimeAPI(session=bot.sessions.get('jikan'))
         self.base_url = "https://myanimelist.net"
+        self.source_times = defaultdict(lambda: deque(maxlen=Config.TRANSITION_SAMPLES))
+        self.cache = ResultCache(Config.RESULT_CACHE_SIZE)
+        track_cache('anime_info', lambda: (self.cache.hits + self.cache.stale_hits, self.cache.misses))
+        self.parser = MalParser(Config.MAL_PARSE_WORKERS, Config.TRANSITION_SAMPLES)
+
+    async def cog_load(self):
+        self.refresh_seasonal.start()
+
+    def cog_unload(self):
+        self.refresh_seasonal.cancel()
+        self.cache.close()
+        self.parser.close()
+
+    @tasks.loop(hours=Config.SEASONAL_REFRESH_HOURS)
+    async def refresh_seasonal(self):
+        """Rebuild the seasonal snapshot when it is due"""
+        # One cluster process builds it; the others pick up its saved copy
+        if self.bot.cluster_id not in (None, 0):
+            self.db.load_seasonal()
+            return
+        age = self.db.seasonal_age()
+        if age is not None and age < timedelta(hours=Config.SEASONAL_REFRESH_HOURS):
+            return
+        try:
+            await self.db.refresh_seasonal(Config.SEASONAL_MAX_PAGES)
+        except Exception as e:
+            print(f"Error rebuilding seasonal snapshot: {e}")
+
+    @refresh_seasonal.before_loop
+    async def before_refresh_seasonal(self):
+        # Keep the first crawl's Jikan requests out of startup
+        await self.bot.wait_until_ready()
 
     def create_info_embed(self, title, description, color=discord.Color.blue()):
         """Create a consistent embed style for anime information"""
@@ -19,147 +73,194 @@ class AnimeInfo(commands.Cog):
         embed.set_footer(text="AniGuessr Anime Info", icon_url=self.bot.user.avatar.url if self.bot.user.avatar else None)
         return embed
 
+    async def lookup(self, command, sources):
+        """Try each (name, fetch) source in order and time every attempt"""
+        for source, fetch in sources:
+            started = time.perf_counter()
+            try:
+                result = await fetch()
+            except Exception as e:
+                print(f"{command} lookup failed on {source}: {e}")
+                result = None
+            elapsed = time.perf_counter() - started
+            self.source_times[(command, source)].append(elapsed)
+            ANIME_LOOKUP_SECONDS.observe(elapsed, command, source, 'hit' if result else 'miss')
+            if result:
+                print(f"{command} answered from {source} in {elapsed * 1000:.0f}ms")
+                return result
+            print(f"{command} missed on {source} after {elapsed * 1000:.0f}ms")
+        return None
+
+    async def cached(self, command, key, fetch):
+        """Get a result through the cache, using the command's TTL"""
+        hits, stale_hits = self.cache.hits, self.cache.stale_hits
+        result = await self.cache.get((command, key), Config.RESULT_CACHE_TTLS[command], fetch)
+        outcome = 'hit' if self.cache.hits > hits else 'stale hit' if self.cache.stale_hits > stale_hits else 'miss'
+        print(f"{command} cache {outcome} for {key!r}; "
+              f"hit rate {self.cache.hit_rate:.0%} over {self.cache.hits + self.cache.stale_hits + self.cache.misses} lookups")
+        return result
+
+    def local_anime(self, anime_data: Optional[Dict]) -> Optional[Dict]:
+        """Convert a dataset anime record to an anime result"""
+        if not anime_data:
+            return None
+        info = []
+        if anime_data.get('english_title'):
+            info.append(f"English: {anime_data['english_title']}")
+        if anime_data.get('title_synonyms'):
+            info.append(f"Also known as: {', '.join(anime_data['title_synonyms'][:3])}")
+        if anime_data.get('rank') and anime_data['rank'] != 99999:
+            info.append(f"Ranked: #{anime_data['rank']}")
+        if anime_data.get('members'):
+            info.append(f"Members: {anime_data['members']:,}")
+        return {
+            'title': anime_data['title'],
+            'url': f"{self.base_url}/anime/{anime_data['mal_id']}" if anime_data.get('mal_id') else None,
+            'synopsis': None,
+            'score': anime_data.get('score') or "N/A",
+            'popularity': f"#{anime_data['popularity']}" if anime_data.get('popularity') not in (None, 99999) else "N/A",
+            'info': "\n".join(info),
+            'image_url': anime_data.get('images', {}).get('jpg', {}).get('large_image_url'),
+        }
+
+    def jikan_anime(self, anime: Optional[Dict]) -> Optional[Dict]:
+        """Convert a Jikan anime object to an anime result"""
+        if not anime:
+            return None
+        info = [
+            f"{label}: {value}" for label, value in (
+                ("Type", anime.get('type')),
+                ("Episodes", anime.get('episodes')),
+                ("Status", anime.get('status')),
+                ("Aired", anime.get('aired', {}).get('string')),
+            ) if value
+        ]
+        return {
+            'title': anime.get('title'),
+            'url': anime.get('url'),
+            'synopsis': anime.get('synopsis'),
+            'score': anime.get('score') or "N/A",
+            'popularity': f"#{anime['popularity']}" if anime.get('popularity') else "N/A",
+            'info': "\n".join(info),
+            'image_url': anime.get('images', {}).get('jpg', {}).get('large_image_url'),
+        }
+
+    def anime_embed(self, result, title=None, color=discord.Color.blue()):
+        """Build the embed for an anime result from any source"""
+        synopsis = result.get('synopsis') or ""
+        if len(synopsis) > 1000:
+            synopsis = synopsis[:1000] + '...'
+        embed = self.create_info_embed(title or result['title'], synopsis, color)
+        if title:
+            embed.description = f"**{result['title']}**\n{synopsis}".strip()
+        embed.add_field(name="Score", value=str(result['score']), inline=True)
+        embed.add_field(name="Popularity", value=str(result['popularity']), inline=True)
+        if result.get('info'):
+            embed.add_field(name="Additional Information", value=result['info'][:1024], inline=False)
+        embed.url = result.get('url')
+        if result.get('image_url'):
+            embed.set_thumbnail(url=result['image_url'])
+        return embed
+
     @commands.command(name='anime')
     async def search_anime(self, ctx, *, query):
-        """Search for anime information from MyAnimeList"""
-        async with aiohttp.ClientSession() as session:
-            # Search for the anime
-            search_url = f'{self.base_url}/anime.php?q={query}'
-            async with session.get(search_url) as response:
-                if response.status == 200:
-                    html = await response.text()
-                    soup = BeautifulSoup(html, 'html.parser')
-                    
-                    # Find the first anime result
-                    anime_link = soup.find('a', {'class': 'hoverinfo_trigger'})
-                    if anime_link:
-                        anime_url = anime_link['href']
-                        async with session.get(anime_url) as anime_response:
-                            if anime_response.status == 200:
-                                anime_html = await anime_response.text()
-                                anime_soup = BeautifulSoup(anime_html, 'html.parser')
-                                
-                                # Extract information
-                                title = anime_soup.find('h1', {'class': 'title-name'}).text.strip()
-                                synopsis = anime_soup.find('p', {'itemprop': 'description'}).text.strip()
-                                
-                                # Get additional info
-                                info_div = anime_soup.find('div', {'class': 'information'})
-                                info_text = info_div.text.strip() if info_div else "No additional information available"
-                                
-                                # Get score and popularity
-                                score = anime_soup.find('div', {'class': 'score-label'})
-                                score_text = score.text.strip() if score else "N/A"
-                                
-                                popularity = anime_soup.find('span', {'class': 'information popularity'})
-                                popularity_text = popularity.text.strip() if popularity else "N/A"
-                                
-                                # Create embed
-                                embed = self.create_info_embed(
-                                    title,
-                                    synopsis[:1000] + '...' if len(synopsis) > 1000 else synopsis,
-                                    discord.Color.blue()
-                                )
-                                embed.add_field(name="Score", value=score_text, inline=True)
-                                embed.add_field(name="Popularity", value=popularity_text, inline=True)
-                                embed.add_field(name="Additional Information", value=info_text, inline=False)
-                                embed.url = anime_url
-                                
-                                # Try to get the anime cover image
-                                image_div = anime_soup.find('div', {'class': 'leftside'})
-                                if image_div:
-                                    img = image_div.find('img')
-                                    if img and img.get('data-src'):
-                                        embed.set_thumbnail(url=img['data-src'])
-                                
-                                await ctx.send(embed=embed)
-                            else:
-                                await ctx.send("Couldn't fetch anime details.")
-                    else:
-                        await ctx.send("Anime not found.")
-                else:
-                    await ctx.send("Error searching for anime.")
+        """Search for anime information"""
+        result = await self.cached('anime', normalize_title(query), lambda: self.lookup('anime', [
+            ('local', lambda: self.local_search(query)),
+            ('jikan', lambda: self.jikan_search(query)),
+            ('scrape', lambda: self.scrape_search(query)),
+        ]))
+        if result:
+            await ctx.send(embed=self.anime_embed(result))
+        else:
+            await ctx.send("Anime not found.")
 
     @commands.command(name='random_anime')
     async def get_random_anime(self, ctx):
         """Get a random anime recommendation"""
-        async with aiohttp.ClientSession() as session:
-            # Get a random page from the top anime list
-            page = random.randint(1, 10)
-            url = f'{self.base_url}/topanime.php?limit={50 * (page - 1)}'
-            
-            async with session.get(url) as response:
-                if response.status == 200:
-                    html = await response.text()
-                    soup = BeautifulSoup(html, 'html.parser')
-                    
-                    # Find all anime entries
-                    anime_entries = soup.find_all('tr', {'class': 'ranking-list'})
-                    if anime_entries:
-                        random_anime = random.choice(anime_entries)
-                        title = random_anime.find('a', {'class': 'hoverinfo_trigger'}).text.strip()
-                        score = random_anime.find('td', {'class': 'score'}).text.strip()
-                        
-                        # Get the anime URL
-                        anime_url = random_anime.find('a', {'class': 'hoverinfo_trigger'})['href']
-                        
-                        embed = self.create_info_embed(
-                            "🎲 Random Anime Recommendation",
-                            f"**{title}**\nScore: {score}",
-                            discord.Color.green()
-                        )
-                        embed.url = anime_url
-                        
-                        # Try to get the anime thumbnail
-                        img = random_anime.find('img')
-                        if img and img.get('data-src'):
-                            embed.set_thumbnail(url=img['data-src'])
-                        
-                        await ctx.send(embed=embed)
-                    else:
-                        await ctx.send("Couldn't find any anime recommendations.")
-                else:
-                    await ctx.send("Error fetching anime recommendations.")
+        result = await self.lookup('random_anime', [
+            ('local', self.local_random),
+            ('jikan', self.jikan_random),
+            ('scrape', self.scrape_random),
+        ])
+        if result:
+            await ctx.send(embed=self.anime_embed(result, "🎲 Random Anime Recommendation", discord.Color.green()))
+        else:
+            await ctx.send("Couldn't find any anime recommendations.")
 
     @commands.command(name='seasonal')
-    async def get_seasonal_anime(self, ctx):
-        """Get current seasonal anime"""
-        async with aiohttp.ClientSession() as session:
-            url = f'{self.base_url}/anime/season'
-            
-            async with session.get(url) as response:
-                if response.status == 200:
-                    html = await response.text()
-                    soup = BeautifulSoup(html, 'html.parser')
-                    
-                    # Find seasonal anime entries
-                    seasonal_anime = soup.find_all('div', {'class': 'seasonal-anime'})
-                    if seasonal_anime:
-                        # Get up to 5 random seasonal anime
-                        selected_anime = random.sample(seasonal_anime, min(5, len(seasonal_anime)))
-                        
-                        embed = self.create_info_embed(
-                            "🌸 Current Seasonal Anime",
-                            "Here are some anime from the current season:\n\n",
-                            discord.Color.purple()
-                        )
-                        
-                        for anime in selected_anime:
-                            title = anime.find('p', {'class': 'title'}).text.strip()
-                            synopsis = anime.find('div', {'class': 'synopsis'}).text.strip()
-                            score = anime.find('div', {'class': 'score'}).text.strip()
-                            
-                            embed.add_field(
-                                name=f"{title} (Score: {score})",
-                                value=synopsis[:200] + '...' if len(synopsis) > 200 else synopsis,
-                                inline=False
-                            )
-                        
-                        await ctx.send(embed=embed)
-                    else:
-                        await ctx.send("Couldn't find seasonal anime information.")
-                else:
-                    await ctx.send("Error fetching seasonal anime information.")
+    async def get_seasonal_anime(self, ctx, kind: str = 'current'):
+        """Get current, upcoming or airing anime"""
+        kind = kind.lower()
+        if kind not in SNAPSHOT_KINDS:
+            await ctx.send("Choose from: current, upcoming, airing")
+            return
+        seasonal = self.db.get_seasonal_anime(kind)
+        if not seasonal:
+            await ctx.send("Seasonal anime information isn't available yet. Please try again later.")
+            return
+
+        listing = self.db.seasonal[kind]
+        if kind == 'airing':
+            title, description = "📺 Currently Airing Anime", "Here are some anime airing right now:\n\n"
+        else:
+            season = f"{listing['season'].title()} {listing['year']}"
+            title = f"🌸 {'Upcoming' if kind == 'upcoming' else 'Current'} Season: {season}"
+            description = f"Here are some anime from {season}:\n\n"
+        embed = self.create_info_embed(title, description, discord.Color.purple())
+        # Show up to 5 random anime from the 50 most popular
+        popular = seasonal[:50]
+        for anime in random.sample(popular, min(5, len(popular))):
+            synopsis = anime.get('synopsis') or "No synopsis available."
+            embed.add_field(
+                name=f"{anime['title']} (Score: {anime['score']})",
+                value=synopsis[:200] + '...' if len(synopsis) > 200 else synopsis,
+                inline=False
+            )
+        await ctx.send(embed=embed)
+
+    async def local_search(self, query):
+        return self.local_anime(self.db.find_anime(query))
+
+    async def local_random(self):
+        return self.local_anime(self.db.get_random_anime(min_score=7.0))
+
+    async def jikan_search(self, query):
+        return self.jikan_anime(await self.api.search_anime(query))
+
+    async def jikan_random(self):
+        # Cache the top list page and pick from it, so the pick stays random
+        page = random.randint(1, 20)
+        top = await self.cached('random_anime', ('jikan', page),
+                                lambda: self.api.get_top_anime(limit=25, page=page))
+        return self.jikan_anime(random.choice(top)) if top else None
+
+    async def fetch_page(self, url) -> Optional[str]:
+        """Download a myanimelist.net page, or None if it is not available"""
+        async with self.bot.sessions.get('mal').get(url) as response:
+            if response.status != 200:
+                return None
+            return await response.text()
+
+    async def scrape_search(self, query):
+        """Scrape the first search result from myanimelist.net"""
+        html = await self.fetch_page(f'{self.base_url}/anime.php?q={query}')
+        anime_url = html and await self.parser.parse('search', html)
+        if not anime_url:
+            return None
+        html = await self.fetch_page(anime_url)
+        return html and await self.parser.parse('anime', html, anime_url)
+
+    async def scrape_random(self):
+        """Pick a random anime from a page of the myanimelist.net top list"""
+        page = random.randint(1, 10)
+        entries = await self.cached('random_anime', ('scrape', page), lambda: self.scrape_top_page(page))
+        return random.choice(entries) if entries else None
+
+    async def scrape_top_page(self, page) -> List[Dict]:
+        """Scrape one page of the myanimelist.net top anime list"""
+        html = await self.fetch_page(f'{self.base_url}/topanime.php?limit={50 * (page - 1)}')
+        return await self.parser.parse('top', html) if html else []
 
 async def setup(bot):
-    await bot.add_cog(AnimeInfo(bot)) 
\ No newline at end of file
+    await bot.add_cog(AnimeInfo(bot))
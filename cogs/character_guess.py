@@ -1,32 +1,210 @@
 import discord
-from discord.ext import commands
+from discord.ext import commands, tasks
 import random
-from PIL import Image
 import io
 import aiohttp
 from utils.database import AnimeDatabase
 import asyncio
+import time
 from discord import app_commands
 from utils.config import Config
-from typing import List, Dict
+from utils.guess_queue import GuessQueue
+from utils.edit_scheduler import EditScheduler
+from utils.delete_queue import DeleteQueue
+from utils.game_state import CharacterGame
+from utils.round_locks import RoundLocks
+from utils.session_store import SessionStore
+from utils.deck import ShuffledDeck
+from utils.reveal_renderer import RevealRenderer
+from utils.metrics import ROUND_TRANSITION_SECONDS, game_action, track_cache, track_queue
+from typing import List, Dict, Optional, Tuple
 from difflib import SequenceMatcher
 import traceback
 
+class CharacterListView(discord.ui.View):
+    """Pages through the characters of an anime"""
+
+    def __init__(self, title: str, characters: List[Dict], color, author_id: int):
+        super().__init__(timeout=180)  # 3 minute timeout
+        self.title = title
+        self.characters = characters
+        self.color = color
+        self.author_id = author_id
+        self.current_page = 0
+        self.page_count = (len(characters) + Config.CHAR_LIST_PAGE_SIZE - 1) // Config.CHAR_LIST_PAGE_SIZE
+        self._update_buttons()
+
+    def build_embed(self) -> discord.Embed:
+        """Build the embed for the current page only"""
+        start = self.current_page * Config.CHAR_LIST_PAGE_SIZE
+        page = self.characters[start:start + Config.CHAR_LIST_PAGE_SIZE]
+        embed = discord.Embed(
+            title=f"Characters from {self.title}",
+            description="\n".join(
+                f"{idx}. {char['name']} ({char.get('difficulty', 'Unknown')})"
+                for idx, char in enumerate(page, start + 1)
+            ),
+            color=self.color
+        )
+        embed.set_footer(text=f"Page {self.current_page + 1}/{self.page_count} | {len(self.characters)} characters")
+        return embed
+
+    def _update_buttons(self):
+        self.prev_page.disabled = self.current_page == 0
+        self.next_page.disabled = self.current_page >= self.page_count - 1
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        return interaction.user.id == self.author_id
+
+    @discord.ui.button(label="◀", style=discord.ButtonStyle.primary)
+    async def prev_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        self.current_page = max(0, self.current_page - 1)
+        self._update_buttons()
+        await interaction.response.edit_message(embed=self.build_embed(), view=self)
+
+    @discord.ui.button(label="▶", style=discord.ButtonStyle.primary)
+    async def next_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        self.current_page = min(self.page_count - 1, self.current_page + 1)
+        self._update_buttons()
+        await interaction.response.edit_message(embed=self.build_embed(), view=self)
+
+class RoundControls(discord.ui.View):
+    """Skip and End buttons on a running game.
+
+    One instance serves every game message: it has no timeout and fixed
+    custom ids, so buttons keep working across restarts.
+    """
+
+    def __init__(self, cog):
+        super().__init__(timeout=None)
+        self.cog = cog
+
+    @discord.ui.button(label="Skip", emoji="🔄", style=discord.ButtonStyle.secondary,
+                       custom_id="character_guess:skip")
+    async def skip(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self.cog.on_skip_button(interaction)
+
+    @discord.ui.button(label="End", emoji="❌", style=discord.ButtonStyle.danger,
+                       custom_id="character_guess:end")
+    async def end(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self.cog.on_end_button(interaction)
+
+class SummaryControls(discord.ui.View):
+    """Play Again button on a game summary; persistent like RoundControls"""
+
+    def __init__(self, cog):
+        super().__init__(timeout=None)
+        self.cog = cog
+
+    @discord.ui.button(label="Play Again", emoji="🔄", style=discord.ButtonStyle.primary,
+                       custom_id="character_guess:play_again")
+    async def play_again(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self.cog.on_play_again_button(interaction)
+
 class CharacterGuess(commands.Cog):
     """Character guessing game commands"""
     
     def __init__(self, bot):
         self.bot = bot
         self.db = bot.db
-        self.active_games = {}  # Channel-based games
+        self.active_games: Dict[int, CharacterGame] = {}  # Channel-based games
         self.user_games = {}    # Track which users have active games
         self._locks = {}
-        self.END_GAME = "❌"
+        self.END_GAME = "❌"    # Reactions on game messages from before buttons
         self.PLAY_AGAIN = "🔄"
         self.EMBED_COLOR = Config.DEFAULT_COLOR
-        self.correct_guesses = {}  # Track correct guesses per channel
+        self.REVEAL_FILENAME = "reveal.jpg"
+        self.guess_queue = GuessQueue(
+            self.process_guess,
+            maxsize=Config.GUESS_QUEUE_SIZE,
+            put_timeout=Config.GUESS_QUEUE_TIMEOUT,
+            name='character'
+        )
+        self.edit_scheduler = EditScheduler(rate=Config.GAME_EDITS_PER_SECOND)
+        self.delete_queue = DeleteQueue(interval=Config.DELETE_QUEUE_INTERVAL)
+        self.sessions = SessionStore('character')
+        self._pending_sessions = {}   # Snapshots not yet restored, by channel
+        self._game_messages: Dict[int, int] = {}  # Live game message id -> channel id
+        self._next_rounds: Dict[int, Tuple[str, discord.Embed]] = {}  # Prepared next round, by channel
+        # Serializes guesses, skips, ends and expiry
+        self._round_locks = RoundLocks(lambda channel_id: channel_id in self.active_games)
+        self._warm_tasks = set()
+        self.round_controls = RoundControls(self)
+        self.summary_controls = SummaryControls(self)
+        self.renderer = RevealRenderer(
+            levels=Config.REVEAL_LEVELS,
+            mode=Config.REVEAL_MODE,
+            workers=Config.REVEAL_WORKERS,
+            cache_bytes=Config.REVEAL_CACHE_BYTES
+        )
+        track_cache('reveal_images', lambda: (self.renderer.hits, self.renderer.misses))
+        track_queue('character_guesses', self.guess_queue.depth)
+        track_queue('message_deletes', self.delete_queue.depth)
         print("CharacterGuess cog initialized!")
 
+    async def cog_load(self):
+        # Only read the snapshots here; games are rebuilt on their next event.
+        # Under cluster mode each process keeps only its own shards' games.
+        self._pending_sessions = {
+            channel_id: snapshot
+            for channel_id, snapshot in self.sessions.load_all().items()
+            if self.bot.owns_guild(snapshot.get('guild_id'))
+        }
+        for channel_id, snapshot in self._pending_sessions.items():
+            self.bot.games.claim(channel_id, self)
+            self.user_games[snapshot['started_by']] = channel_id
+            if snapshot.get('message_id'):
+                self._game_messages[snapshot['message_id']] = channel_id
+        if self._pending_sessions:
+            print(f"Found {len(self._pending_sessions)} character game sessions to restore")
+        # Buttons on messages sent before a restart route back to these views
+        self.bot.add_view(self.round_controls)
+        self.bot.add_view(self.summary_controls)
+        self.expire_idle_games.start()
+
+    async def cog_unload(self):
+        self.expire_idle_games.cancel()
+        self.round_controls.stop()
+        self.summary_controls.stop()
+        for channel_id in [*self.active_games, *self._pending_sessions]:
+            self.bot.games.release(channel_id, self)
+        for task in self._warm_tasks:
+            task.cancel()
+        self.guess_queue.close()
+        self.renderer.close()
+        self.edit_scheduler.close()
+        self.delete_queue.close()
+        await self.sessions.close()
+
+    def get_game(self, channel_id):
+        """Get a channel's game, restoring it from its snapshot on first use"""
+        game = self.active_games.get(channel_id)
+        if game is None and channel_id in self._pending_sessions:
+            game = self.restore_game(self._pending_sessions.pop(channel_id))
+        return game
+
+    def restore_game(self, snapshot):
+        """Rebuild a game from a snapshot taken before a restart"""
+        game = CharacterGame.from_snapshot(snapshot, history_limit=Config.GAME_HISTORY_LIMIT)
+        if self.db.get_character_by_id(game.character_id) is None:
+            print(f"Dropping session in channel {game.channel_id}: character no longer cached")
+            self._game_messages.pop(game.message_id, None)
+            self.sessions.delete(game.channel_id)
+            self.bot.games.release(game.channel_id, self)
+            if self.user_games.get(game.started_by) == game.channel_id:
+                del self.user_games[game.started_by]
+            return None
+
+        self.active_games[game.channel_id] = game
+        self.user_games[game.started_by] = game.channel_id
+        self.guess_queue.start(game.channel_id)
+        print(f"Restored character game in channel {game.channel_id}")
+        return game
+
+    def save_game(self, game):
+        """Snapshot a game so it survives a restart"""
+        self.sessions.save(game.channel_id, game.to_snapshot())
+
     def string_similarity(self, a, b):
         """Get similarity ratio between two strings"""
         return SequenceMatcher(None, a, b).ratio()
@@ -81,7 +259,7 @@ class CharacterGuess(commands.Cog):
         return False
 
     @commands.command(name="c")
-    async def char(self, ctx, difficulty: str = None):
+    async def char(self, ctx, difficulty: str = None, mode: str = None):
         """Start a new character guessing game"""
         # Check if user already has an active game
         if ctx.author.id in self.user_games:
@@ -92,15 +270,25 @@ class CharacterGuess(commands.Cog):
                 await ctx.send("You already have an active game! End it first with `;c end`")
             return
 
+        # Allow `;c reveal` as well as `;c hard reveal`
+        if difficulty and difficulty.lower() == 'reveal':
+            difficulty, mode = mode, difficulty
+
         if difficulty and difficulty.lower() not in ['easy', 'medium', 'hard']:
             await ctx.send("Invalid difficulty! Use 'easy', 'medium', or 'hard'.")
             return
 
+        if mode and mode.lower() != 'reveal':
+            await ctx.send("Invalid mode! The only mode is 'reveal'.")
+            return
+
         print(f"\nStarting new game:")
         print(f"User: {ctx.author.name}")
         print(f"Requested difficulty: {difficulty if difficulty else 'Any'}")
+        print(f"Reveal mode: {bool(mode)}")
         
-        await self.start_new_game(ctx, difficulty)
+        with game_action('start', 'command'):
+            await self.start_new_game(ctx.channel, ctx.author, difficulty, reveal=bool(mode))
 
     @commands.command(aliases=["c end"])
     async def c_end(self, ctx):
@@ -115,49 +303,91 @@ class CharacterGuess(commands.Cog):
                 await ctx.send(f"Your active game is in {active_channel.mention}! Go there to end it.")
             return
 
-        if channel_id not in self.active_games:
+        game = self.get_game(channel_id)
+        if not game:
             await ctx.send("No active game in this channel!")
             return
             
-        game = self.active_games[channel_id]
-        if user_id != game['started_by'] and not ctx.author.guild_permissions.manage_messages:
+        if user_id != game.started_by and not ctx.author.guild_permissions.manage_messages:
             await ctx.send("Only the game starter or moderators can end the game!")
             return
-            
-        await self.end_game(ctx, show_summary=True)
 
-    async def get_character(self, difficulty=None):
-        """Get a random character for the game"""
-        try:
-            # Print total characters in database for debugging
-            print(f"\nTotal characters in database: {len(self.db.characters)}")
-            print("Available difficulties:", set(char.get('difficulty', 'Unknown') for char in self.db.characters))
-
-            # If difficulty is specified, filter by it
-            if difficulty:
-                difficulty = difficulty.lower()
-                chars = [
-                    char for char in self.db.characters
-                    if char.get('difficulty', '').lower() == difficulty
-                ]
-                print(f"Characters found for difficulty {difficulty}: {len(chars)}")
-            else:
-                # No difficulty specified, use all characters
-                chars = list(self.db.characters)  # Convert to list to ensure random.choice works
-                print("Using all characters")
+        with game_action('end', 'command'):
+            async with self._round_locks.hold(channel_id):
+                if game.ended:
+                    return
+                await self.end_game(channel_id, show_summary=True)
 
-            if not chars:
-                print("No characters found!")
+    async def send_hint(self, ctx):
+        """Send the next hint for the current character; routed here by the hint command"""
+        game = self.get_game(ctx.channel.id)
+        if not game or game.ended:
+            await ctx.send("No active game in this channel!")
+            return
+
+        # Hints were compiled during the crawl, so this is a dict lookup
+        char = self.db.get_character_by_id(game.character_id)
+        hints = (char or {}).get('hints') or []  # Gone if the dataset was reloaded
+        if not hints:
+            await ctx.send("No hints available for this character!")
+            return
+        if game.hints_used >= len(hints):
+            await ctx.send("No more hints available for this character!")
+            return
+
+        game.touch()
+        hint = hints[game.hints_used]
+        game.hints_used += 1
+        self.save_game(game)
+        await ctx.send(embed=discord.Embed(
+            title=f"💡 Hint #{game.hints_used}",
+            description=hint,
+            color=self.EMBED_COLOR
+        ))
+
+    @commands.hybrid_command(name=Config.CHAR_LIST_COMMAND, description="List characters from an anime")
+    @app_commands.describe(anime="The anime to list characters from")
+    async def clist(self, ctx, *, anime: str):
+        """List characters from an anime"""
+        title, characters = self.db.character_index.search(anime)
+        if not characters:
+            await ctx.send(f"No characters found for **{anime}**!")
+            return
+
+        view = CharacterListView(title, characters, self.EMBED_COLOR, ctx.author.id)
+        if view.page_count > 1:
+            await ctx.send(embed=view.build_embed(), view=view)
+        else:
+            await ctx.send(embed=view.build_embed())
+
+    @clist.autocomplete('anime')
+    async def clist_autocomplete(self, interaction: discord.Interaction, current: str):
+        """Suggest anime titles from the prefix trie"""
+        return [
+            app_commands.Choice(name=title[:100], value=title[:100])
+            for title in self.db.character_index.complete(current)
+        ]
+
+    async def get_character(self, deck, difficulty=None):
+        """Draw the next character for a game from its shuffled deck"""
+        try:
+            bucket = self.db.character_bucket(difficulty)
+            if not bucket:
+                print(f"No characters found for difficulty {difficulty or 'Any'}!")
                 return None
 
-            # Select random character
-            selected_char = random.choice(chars)
+            # Start over if the dataset was reloaded or every character was shown
+            if deck.size != len(bucket) or not deck.remaining:
+                deck.reset(len(bucket))
+
+            selected_char = self.db.get_character_by_id(bucket[deck.draw()])
             
             # Debug info
             print(f"\nSelected character:")
             print(f"Name: {selected_char['name']}")
             print(f"Anime: {selected_char['anime_data']['title']}")
             print(f"Difficulty: {selected_char.get('difficulty', 'Unknown')}")
+            print(f"Deck: {deck.remaining}/{deck.size} left")
             
             return selected_char
 
@@ -166,46 +396,152 @@ class CharacterGuess(commands.Cog):
             traceback.print_exc()  # Print full error traceback
             return None
 
-    async def create_character_embed(self, game_data, show_summary=False):
+    async def prepare_next_round(self, game):
+        """Pick the following character and build its embed ahead of time"""
+        char = await self.get_character(game.deck, game.difficulty)
+        if not char:
+            return
+        self._next_rounds[game.channel_id] = (
+            char['id'], self.build_round_embed(char, level=self.reveal_level(game, 0))
+        )
+        if game.reveal and char.get('image_url'):
+            self.renderer.prerender(self.bot.sessions.get('images'), char['id'], char['image_url'],
+                                    0, Config.REVEAL_PRERENDER_AHEAD)
+        elif char.get('image_url'):
+            task = asyncio.create_task(self.warm_image(char['image_url']))
+            self._warm_tasks.add(task)
+            task.add_done_callback(self._warm_tasks.discard)
+
+    async def warm_image(self, url):
+        """Request an image once so the CDN has it cached before it is shown"""
+        session = self.bot.sessions.get('images')
+        timeout = aiohttp.ClientTimeout(total=Config.IMAGE_WARM_TIMEOUT)
+        try:
+            async with session.head(url, timeout=timeout, allow_redirects=True) as resp:
+                status = resp.status
+            if status == 405:  # Some CDNs only answer GET
+                async with session.get(url, timeout=timeout) as resp:
+                    await resp.read()
+                    status = resp.status
+            if status >= 400:
+                print(f"Warming image {url} returned {status}")
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            print(f"Error warming image {url}: {e}")
+
+    async def advance_round(self, game, interaction=None):
+        """Swap in the prepared next round and start preparing the one after"""
+        started = time.perf_counter()
+        prepared = self._next_rounds.pop(game.channel_id, None)
+        if prepared and self.db.get_character_by_id(prepared[0]) is None:
+            prepared = None  # Dataset was reloaded since it was prepared
+        if prepared:
+            char_id, embed = prepared
+        else:
+            char = await self.get_character(game.deck, game.difficulty)
+            if not char:
+                self.save_game(game)
+                if interaction:
+                    await interaction.response.send_message("No characters available!", ephemeral=True)
+                return
+            char_id, embed = char['id'], self.build_round_embed(char, level=self.reveal_level(game, 0))
+
+        game.advance(char_id)
+        fields = {'embed': embed}
+        if game.reveal:
+            file = await self.reveal_file(self.db.get_character_by_id(char_id), embed, 0)
+            fields['attachments'] = [file] if file else []
+        # New character, so skip the throttle
+        await self.update_game_message(game, interaction, **fields)
+        self.save_game(game)
+
+        elapsed = time.perf_counter() - started
+        ROUND_TRANSITION_SECONDS.observe(elapsed, 'prefetched' if prepared else 'cold')
+        print(f"Round transition in channel {game.channel_id}: {elapsed * 1000:.1f}ms "
+              f"({'prefetched' if prepared else 'cold'})")
+        await self.prepare_next_round(game)
+
+    def reveal_level(self, game, guesses=None):
+        """Get how far a reveal game's image is uncovered, or None outside reveal mode"""
+        if not game.reveal:
+            return None
+        guesses = game.guesses if guesses is None else guesses
+        return min(guesses // Config.REVEAL_GUESSES_PER_LEVEL, Config.REVEAL_LEVELS)
+
+    async def reveal_file(self, char, embed, level):
+        """Render a reveal level as the attachment shown by a round embed"""
+        if level is None or level >= Config.REVEAL_LEVELS or not char.get('image_url'):
+            return None
+        session = self.bot.sessions.get('images')
+        data = await self.renderer.render(session, char['id'], char['image_url'], level)
+        self.renderer.prerender(session, char['id'], char['image_url'],
+                                level + 1, Config.REVEAL_PRERENDER_AHEAD)
+        if data is None:
+            embed.set_image(url=None)  # Never fall back to the uncovered image
+            return None
+        return discord.File(io.BytesIO(data), filename=self.REVEAL_FILENAME)
+
+    async def update_game_message(self, game, interaction=None, **fields):
+        """Edit a game's message now, as the interaction response if a button was pressed"""
+        if interaction is None:
+            await self.edit_scheduler.flush(self.get_game_message(game), **fields)
+        else:
+            await self.edit_scheduler.respond(
+                game.message_id, lambda: interaction.response.edit_message(**fields)
+            )
+
+    def get_game_message(self, game):
+        """Get a partial message for a game's embed"""
+        channel = self.bot.get_channel(game.channel_id)
+        if channel is None or game.message_id is None:
+            return None
+        return channel.get_partial_message(game.message_id)
+
+    async def create_character_embed(self, game, show_summary=False):
         """Create the character embed with game state"""
         if show_summary:
-        embed = discord.Embed(
+            embed = discord.Embed(
                 title="Game Summary",
                 color=self.EMBED_COLOR
             )
             
-            # Calculate statistics
-            total_chars = len(game_data['history'])
-            solved_chars = sum(1 for char in game_data['history'] if char.get('solved', False))
-            
             # Add statistics at the top
             stats_text = (
-                f"**Final Score:** {solved_chars}/{total_chars}\n"
-                f"**Total Guesses:** {game_data.get('total_guesses', 0)}\n"
+                f"**Final Score:** {game.rounds_solved}/{game.rounds_played}\n"
+                f"**Total Guesses:** {game.total_guesses}\n"
                 "─────────────────────────"
             )
             
-            # Create summary of all characters played
+            # Create summary of the characters played; only the most recent are kept
             summary_text = ""
-            for idx, char in enumerate(game_data['history'], 1):
-                result = '✅' if char.get('solved', False) else '❌'
-                summary_text += f"\n{idx}. {char['name']} ({char['anime_data']['title']}) {result}"
+            skipped = game.rounds_played - len(game.history)
+            if skipped:
+                summary_text += f"\n...and {skipped} earlier characters"
+            for idx, entry in enumerate(game.history, skipped + 1):
+                char = self.db.get_character_by_id(entry.character_id)
+                name = char['name'] if char else "Unknown"
+                title = char['anime_data']['title'] if char else "Unknown"
+                result = '✅' if entry.solved else '❌'
+                summary_text += f"\n{idx}. {name} ({title}) {result}"
             
-            if not game_data['history']:
+            if not game.rounds_played:
                 summary_text = "\nNo characters played"
             
             embed.description = f"{stats_text}\n{summary_text}"
-            embed.set_footer(text="🔄 Play Again | ❌ Exit")
-        return embed
+            embed.set_footer(text="Press Play Again to start a new game")
+            return embed
 
         # Regular game embed
-        char = game_data['character']
+        char = self.db.get_character_by_id(game.character_id)
+        return self.build_round_embed(char, game.guesses, self.reveal_level(game))
+
+    def build_round_embed(self, char, guesses=0, level=None):
+        """Build the embed shown while a character is being guessed"""
         embed = discord.Embed(
             title="Character Guessing Game",
             color=self.EMBED_COLOR
         )
         
-        embed.description = f"**Guesses:** {game_data['guesses']}"
+        embed.description = f"**Guesses:** {guesses}"
         
         anime_title = char['anime_data']['title']
         if char['anime_data'].get('english_title'):
@@ -223,20 +559,23 @@ class CharacterGuess(commands.Cog):
             inline=True
         )
         
-        if char.get('image_url'):
+        if level is not None and level < Config.REVEAL_LEVELS:
+            embed.set_image(url=f"attachment://{self.REVEAL_FILENAME}")
+        elif char.get('image_url'):
             embed.set_image(url=char['image_url'])
         
-        embed.set_footer(text="Type character name to guess | 🔄 Skip/New | ❌ End")
+        embed.set_footer(text="Type the character's name to guess")
         
         return embed
 
-    async def show_summary(self, game_data):
+    async def show_summary(self, game):
         """Show game summary and add reactions"""
-        embed = await self.create_character_embed(game_data, show_summary=True)
-        await game_data['message'].edit(embed=embed)
-        await game_data['message'].clear_reactions()
-        await game_data['message'].add_reaction(self.PLAY_AGAIN)
-        await game_data['message'].add_reaction(self.END_GAME)
+        message = self.get_game_message(game)
+        if message is None:
+            return
+        embed = await self.create_character_embed(game, show_summary=True)
+        await self.edit_scheduler.flush(message, embed=embed, attachments=[], view=self.summary_controls)
+        self.edit_scheduler.discard(message.id)
 
     async def get_characters(self, difficulty=None, count=5):
         """Get multiple characters for the game"""
@@ -256,93 +595,113 @@ class CharacterGuess(commands.Cog):
             print(f"Error getting characters: {e}")
             return None
 
-    async def clear_correct_guesses(self, channel_id):
-        """Clear correct guesses for a channel"""
-        if channel_id in self.correct_guesses:
-            messages = self.correct_guesses[channel_id]
-            for msg in messages:
-                try:
-                    await msg.delete()
-                except:
-                    pass
-            self.correct_guesses[channel_id] = []
+    async def clear_correct_guesses(self, game):
+        """Clear correct guesses for a game"""
+        channel = self.bot.get_channel(game.channel_id)
+        if channel is not None:
+            for message_id in game.correct_guess_ids:
+                self.delete_queue.add(channel.get_partial_message(message_id))
+        game.correct_guess_ids = []
 
-    async def start_new_game(self, ctx, difficulty=None):
+    async def start_new_game(self, channel, author, difficulty=None, reveal=False, interaction=None):
         """Start a new game"""
-        channel_id = ctx.channel.id
-        user_id = ctx.author.id
+        channel_id = channel.id
+        user_id = author.id
+
+        if not self.bot.games.claim(channel_id, self):
+            await channel.send("Another game is already running in this channel!")
+            return
         
         try:
             # Clean up any existing game in this channel
-            if channel_id in self.active_games:
-                old_game = self.active_games[channel_id]
-                old_user_id = old_game.get('started_by')
-                try:
-                    await old_game['message'].delete()
-                except:
-                    pass
+            old_game = self.get_game(channel_id)
+            if old_game:
                 del self.active_games[channel_id]
-                if old_user_id in self.user_games:
-                    del self.user_games[old_user_id]
-            
-            # Clear any existing correct guesses
-            await self.clear_correct_guesses(channel_id)
+                self._next_rounds.pop(channel_id, None)
+                self.guess_queue.stop(channel_id)
+                self._game_messages.pop(old_game.message_id, None)
+                old_message = self.get_game_message(old_game)
+                if old_message:
+                    self.edit_scheduler.discard(old_message.id)
+                    try:
+                        await old_message.delete()
+                    except:
+                        pass
+                if self.user_games.get(old_game.started_by) == channel_id:
+                    del self.user_games[old_game.started_by]
+                # Clear any existing correct guesses
+                await self.clear_correct_guesses(old_game)
             
             # Start new game
-            char = await self.get_character(difficulty)
+            deck = ShuffledDeck(len(self.db.character_bucket(difficulty)))
+            char = await self.get_character(deck, difficulty)
             if not char:
-                await ctx.send("No characters available!")
+                self.bot.games.release(channel_id, self)
+                await channel.send("No characters available!")
                 return
 
-            game_data = {
-                'character': char,
-                'started_by': user_id,
-                'guesses': 0,
-                'history': [],
-                'ended': False,
-                'difficulty': difficulty
-            }
-
-            embed = await self.create_character_embed(game_data)
-            msg = await ctx.send(embed=embed)
-            await msg.add_reaction(self.PLAY_AGAIN)
-            await msg.add_reaction(self.END_GAME)
-
-            game_data['message'] = msg
-            self.active_games[channel_id] = game_data
+            game = CharacterGame(
+                channel_id,
+                user_id,
+                char['id'],
+                deck,
+                difficulty=difficulty,
+                guild_id=channel.guild.id if getattr(channel, 'guild', None) else None,
+                history_limit=Config.GAME_HISTORY_LIMIT,
+                reveal=reveal
+            )
+
+            embed = await self.create_character_embed(game)
+            file = await self.reveal_file(char, embed, self.reveal_level(game))
+            if interaction is None:
+                msg = await channel.send(embed=embed, file=file, view=self.round_controls)
+                game.message_id = msg.id
+            else:
+                # Play Again turns the summary message into the new game
+                game.message_id = interaction.message.id
+                await self.update_game_message(game, interaction, embed=embed,
+                                               attachments=[file] if file else [],
+                                               view=self.round_controls)
+            self._game_messages[game.message_id] = channel_id
+
+            self.active_games[channel_id] = game
             self.user_games[user_id] = channel_id  # Track user's game
+            self.guess_queue.start(channel_id)
+            self.save_game(game)
+            await self.prepare_next_round(game)
 
         except Exception as e:
             print(f"Error starting game: {e}")
-            await ctx.send("An error occurred while starting the game.")
-            if channel_id in self.active_games:
-                del self.active_games[channel_id]
+            await channel.send("An error occurred while starting the game.")
+            self.active_games.pop(channel_id, None)
+            self.bot.games.release(channel_id, self)
+            self.guess_queue.stop(channel_id)
             if user_id in self.user_games:
                 del self.user_games[user_id]
 
-    async def delete_message_after_delay(self, message, delay=3):
-        """Delete a message after a delay"""
-        try:
-            await asyncio.sleep(delay)
-            await message.delete()
-        except:
-            pass
-
-    @commands.Cog.listener()
-    async def on_message(self, message):
-        """Handle message events for guesses"""
-        if message.author.bot:
-            return
-
+    async def route_message(self, message):
+        """Queue a message routed here by the bot as a guess for the channel's game"""
         channel_id = message.channel.id
-        if channel_id not in self.active_games:
+        game = self.get_game(channel_id)
+        if not game or game.ended:
             return
 
-        game = self.active_games[channel_id]
-        if game.get('ended', False):
-            return
+        await self.guess_queue.submit(channel_id, game.round, message)
+
+    async def process_guess(self, channel_id, round_id, message):
+        """Apply a queued guess; called serially per channel"""
+        # Skips and ends take the same lock, so a round is only closed once
+        with game_action('guess', 'message'):
+            async with self._round_locks.hold(channel_id):
+                await self.apply_guess(channel_id, round_id, message)
 
-        current_char = game['character']
+    async def apply_guess(self, channel_id, round_id, message):
+        game = self.active_games.get(channel_id)
+        if not game or game.ended or game.round != round_id:
+            return  # Stale guess against a finished round
+
+        game.touch()
+        current_char = self.db.get_character_by_id(game.character_id)
         
         # Check if the message is a guess
         guess = message.content
@@ -352,174 +711,230 @@ class CharacterGuess(commands.Cog):
         print(f"Character: {correct_name}")
         print(f"Guess: {guess}")
         
-        game['guesses'] += 1
+        game.guesses += 1
         
         # Check for match
         is_correct = self.names_match(guess, correct_name)
         
         if is_correct:
             print(f"✓ Correct guess by {message.author.name}!")
-            # Mark current character as solved
-            current_char['solved'] = True
-            current_char['guesses_taken'] = game['guesses']
-            
-            # Add to history
-            game['history'].append({
-                'name': current_char['name'],
-                'anime_data': current_char['anime_data'],
-                'solved': True,
-                'guesses_taken': game['guesses']
-            })
+            # Add current character to history as solved
+            game.record_round(solved=True)
             
             # Add reaction
             await message.add_reaction('✅')
             
             # Track correct guess
-            if channel_id not in self.correct_guesses:
-                self.correct_guesses[channel_id] = []
-            self.correct_guesses[channel_id].append(message)
+            game.correct_guess_ids.append(message.id)
             
             # Clear messages if we have 3 correct guesses
-            if len(self.correct_guesses[channel_id]) >= 3:
-                await self.clear_correct_guesses(channel_id)
+            if len(game.correct_guess_ids) >= 3:
+                await self.clear_correct_guesses(game)
             
-            # Get new character (maintain difficulty if set)
+            # Move on to the prepared character (maintain difficulty if set)
             try:
-                difficulty = current_char.get('difficulty', None)
-                new_char = await self.get_character(difficulty)
-                if new_char:
-                    game['character'] = new_char
-                    game['guesses'] = 0
-                    
-                    # Update embed
-                    embed = await self.create_character_embed(game)
-                    await game['message'].edit(embed=embed)
+                await self.advance_round(game)
             except Exception as e:
                 print(f"Error getting new character: {e}")
-                await self.end_game(await self.bot.get_context(message))
+                await self.end_game(channel_id)
         else:
             print(f"✗ Incorrect guess by {message.author.name}")
-            # Add reaction and delete message
+            # Add reaction and queue the message for a batched delete
             await message.add_reaction('❌')
-            asyncio.create_task(self.delete_message_after_delay(message))
+            self.delete_queue.add(message, delay=Config.WRONG_GUESS_DELETE_DELAY)
             
-            # Update embed with new guess count
+            # Update embed with new guess count; bursts collapse into one edit
             embed = await self.create_character_embed(game)
-            await game['message'].edit(embed=embed)
+            level = self.reveal_level(game)
+            if level is not None and level != self.reveal_level(game, game.guesses - 1):
+                # Uncover more of the image; sent now so a later edit can't drop it
+                file = await self.reveal_file(current_char, embed, level)
+                await self.edit_scheduler.flush(self.get_game_message(game), embed=embed,
+                                                attachments=[file] if file else [])
+            else:
+                self.edit_scheduler.schedule(self.get_game_message(game), embed=embed)
+            self.save_game(game)
 
     @commands.Cog.listener()
-    async def on_reaction_add(self, reaction, user):
-        """Handle reaction adds"""
-        if user.bot:
+    async def on_raw_reaction_add(self, payload):
+        """Handle 🔄 and ❌ reactions on game messages from before buttons.
+
+        Raw events fire whether or not the message is cached, and anything
+        but a live game message is dropped after one dict lookup.
+        """
+        channel_id = self._game_messages.get(payload.message_id)
+        if channel_id is None:
             return
-            
-        channel_id = reaction.message.channel.id
-        message_id = reaction.message.id
-            
+        if payload.member is None or payload.member.bot:
+            return
+        channel = self.bot.get_channel(channel_id)
+        if channel is None:
+            return
+
+        action = {self.PLAY_AGAIN: 'skip', self.END_GAME: 'end'}.get(str(payload.emoji), 'other')
+        with game_action(action, 'reaction'):
             try:
-                await reaction.remove(user)
+                await channel.get_partial_message(payload.message_id).remove_reaction(payload.emoji, payload.member)
             except:
                 pass
 
-        # Handle play again/skip reaction
-        if str(reaction.emoji) == self.PLAY_AGAIN:
-            # Check if user has a game in a different channel
-            if user.id in self.user_games and self.user_games[user.id] != channel_id:
-                active_channel = self.bot.get_channel(self.user_games[user.id])
-                if active_channel:
-                    ctx = await self.bot.get_context(reaction.message)
-                    await ctx.send(f"You already have an active game in {active_channel.mention}!")
-                return
+            await self.handle_reaction(channel, payload.message_id, str(payload.emoji), payload.member)
 
-            if channel_id in self.active_games:
-                game = self.active_games[channel_id]
-                if game['message'].id == message_id:
-                    if user.id != game['started_by'] and not user.guild_permissions.manage_messages:
-                        return  # Only game starter or mods can skip/restart
-                    try:
-                        # Add current character to history if not solved
-                        if not game['character'].get('solved', False):
-                            game['history'].append({
-                                'name': game['character']['name'],
-                                'anime_data': game['character']['anime_data'],
-                                'solved': False
-                            })
-                        
-                        # Get new character using stored difficulty
-                        new_char = await self.get_character(game.get('difficulty'))
-                        if new_char:
-                            game['character'] = new_char
-                            game['guesses'] = 0
-                            embed = await self.create_character_embed(game)
-                            await game['message'].edit(embed=embed)
-                    except Exception as e:
-                        print(f"Error getting new character: {e}")
-                        traceback.print_exc()
-                        ctx = await self.bot.get_context(reaction.message)
-                        await self.end_game(ctx, show_summary=True)
-            else:
-                ctx = await self.bot.get_context(reaction.message)
-                if user.id not in self.user_games:  # Only allow if user doesn't have an active game
-                    await self.start_new_game(ctx)
+    async def handle_reaction(self, channel, message_id, emoji, user):
+        """Apply a 🔄 (skip) or ❌ (end) reaction on a game message"""
+        game = self.get_game(channel.id)
+        if not game or game.message_id != message_id:
+            return
+        if not self.can_control(game, user):
+            return  # Only game starter or mods can skip or end
+
+        round_id = game.round
+        async with self._round_locks.hold(channel.id):
+            if game.ended:
+                return
+            if emoji == self.PLAY_AGAIN:
+                if game.round != round_id:
+                    return  # A guess solved this round while we waited
+                try:
+                    # Add current character to history as unsolved
+                    game.record_round(solved=False)
+                    await self.advance_round(game)
+                except Exception as e:
+                    print(f"Error getting new character: {e}")
+                    traceback.print_exc()
+                    await self.end_game(channel.id, show_summary=True)
+            elif emoji == self.END_GAME:
+                game.record_round(solved=False)
+                await self.end_game(channel.id, show_summary=True)
+
+    def can_control(self, game, user):
+        """Check if a user may skip or end a game"""
+        permissions = getattr(user, 'guild_permissions', None)
+        return user.id == game.started_by or bool(permissions and permissions.manage_messages)
+
+    async def on_skip_button(self, interaction):
+        """Skip the current character"""
+        game = self.get_game(interaction.channel_id)
+        if not game or game.message_id != interaction.message.id:
+            await interaction.response.send_message("This game has ended.", ephemeral=True)
+            return
+        if not self.can_control(game, interaction.user):
+            await interaction.response.send_message("Only the game starter or moderators can skip!", ephemeral=True)
             return
 
-        if channel_id not in self.active_games:
+        round_id = game.round
+        with game_action('skip', 'button'):
+            async with self._round_locks.hold(game.channel_id):
+                if game.ended:
+                    await interaction.response.send_message("This game has ended.", ephemeral=True)
+                    return
+                if game.round != round_id:
+                    await interaction.response.send_message("That character was just guessed!", ephemeral=True)
+                    return
+                try:
+                    # Add current character to history as unsolved
+                    game.record_round(solved=False)
+                    await self.advance_round(game, interaction)
+                except Exception as e:
+                    print(f"Error getting new character: {e}")
+                    traceback.print_exc()
+                    await self.end_game(game.channel_id, show_summary=True)
+
+    async def on_end_button(self, interaction):
+        """End the game and show its summary"""
+        game = self.get_game(interaction.channel_id)
+        if not game or game.message_id != interaction.message.id:
+            await interaction.response.send_message("This game has ended.", ephemeral=True)
+            return
+        if not self.can_control(game, interaction.user):
+            await interaction.response.send_message("Only the game starter or moderators can end the game!", ephemeral=True)
             return
 
-        game = self.active_games[channel_id]
-        if reaction.message.id != game['message'].id:
+        with game_action('end', 'button'):
+            async with self._round_locks.hold(game.channel_id):
+                if game.ended:
+                    await interaction.response.send_message("This game has ended.", ephemeral=True)
+                    return
+                game.record_round(solved=False)
+                await self.end_game(game.channel_id, show_summary=True, interaction=interaction)
+
+    async def on_play_again_button(self, interaction):
+        """Start a new game in the summary's message"""
+        user = interaction.user
+        if user.id in self.user_games:
+            active_channel = self.bot.get_channel(self.user_games[user.id])
+            where = f" in {active_channel.mention}" if active_channel else ""
+            await interaction.response.send_message(f"You already have an active game{where}!", ephemeral=True)
             return
-            
-        # Handle end game reaction
-        if str(reaction.emoji) == self.END_GAME:
-            if user.id == game['started_by'] or user.guild_permissions.manage_messages:
-                ctx = await self.bot.get_context(reaction.message)
-                if not game['character'].get('solved', False):
-                    game['history'].append({
-                        'name': game['character']['name'],
-                        'anime_data': game['character']['anime_data'],
-                        'solved': False
-                    })
-                await self.end_game(ctx, show_summary=True)
-
-    async def end_game(self, ctx, show_summary=False):
+        if self.get_game(interaction.channel_id):
+            await interaction.response.send_message("A game is already running in this channel!", ephemeral=True)
+            return
+
+        with game_action('play_again', 'button'):
+            await self.start_new_game(interaction.channel, user, interaction=interaction)
+            if not interaction.response.is_done():
+                await interaction.response.defer()  # The game could not start; the reason was posted
+
+    @tasks.loop(seconds=Config.GAME_SWEEP_INTERVAL)
+    async def expire_idle_games(self):
+        """End games nobody has touched for a while and post their summary"""
+        # Sessions never touched since a restart count from their last save
+        cutoff = time.time() - Config.GAME_IDLE_TIMEOUT
+        for channel_id, snapshot in list(self._pending_sessions.items()):
+            if snapshot.get('saved_at', 0) < cutoff:
+                game = self.get_game(channel_id)
+                if game:
+                    game.last_activity -= Config.GAME_IDLE_TIMEOUT
+
+        now = time.monotonic()
+        for channel_id, game in list(self.active_games.items()):
+            if game.idle_for(now) < Config.GAME_IDLE_TIMEOUT:
+                continue
+            async with self._round_locks.hold(channel_id):
+                if game.ended or game.idle_for(time.monotonic()) < Config.GAME_IDLE_TIMEOUT:
+                    continue  # Ended or played while we waited
+                print(f"Expiring idle game in channel {channel_id}")
+                await self.end_game(channel_id, show_summary=True)
+
+    @expire_idle_games.before_loop
+    async def before_expire_idle_games(self):
+        # Restored games are only ended once their channels can be fetched
+        await self.bot.wait_until_ready()
+
+    async def end_game(self, channel_id, show_summary=False, interaction=None):
         """End the current game"""
-        channel_id = ctx.channel.id
+        game = self.active_games.pop(channel_id, None)
+        if not game:
+            return
+
+        game.ended = True
+        self.bot.games.release(channel_id, self)
+        self._game_messages.pop(game.message_id, None)
+        self._next_rounds.pop(channel_id, None)
+        self.guess_queue.stop(channel_id)
+        self.sessions.delete(channel_id)
+        message = self.get_game_message(game)
         try:
-            if channel_id in self.active_games:
-                game = self.active_games[channel_id]
-                game['ended'] = True
-                
-                # Clean up user game tracking
-                user_id = game['started_by']
-                if user_id in self.user_games:
-                    del self.user_games[user_id]
-                
-                # Clear any remaining correct guesses
-                await self.clear_correct_guesses(channel_id)
-                
-                # Calculate total guesses
-                game['total_guesses'] = sum(1 for char in game['history'] if not char.get('solved', False))
-                for char in game['history']:
-                    if char.get('solved', False):
-                        game['total_guesses'] += char.get('guesses_taken', 1)
-                
-                if show_summary:
-                    embed = await self.create_character_embed(game, show_summary=True)
-                    await game['message'].edit(embed=embed)
-                    await game['message'].clear_reactions()
-                    await game['message'].add_reaction(self.PLAY_AGAIN)
-                    await game['message'].add_reaction(self.END_GAME)
-                
-                del self.active_games[channel_id]
-                if channel_id in self.correct_guesses:
-                    del self.correct_guesses[channel_id]
+            # Clean up user game tracking
+            if self.user_games.get(game.started_by) == channel_id:
+                del self.user_games[game.started_by]
+            
+            # Clear any remaining correct guesses
+            await self.clear_correct_guesses(game)
+            
+            if show_summary and message:
+                embed = await self.create_character_embed(game, show_summary=True)
+                await self.update_game_message(game, interaction, embed=embed, attachments=[],
+                                               view=self.summary_controls)
                 
         except Exception as e:
             print(f"Error ending game: {e}")
-            await ctx.send("An error occurred while ending the game.")
-            if channel_id in self.active_games:
-                del self.active_games[channel_id]
+            channel = self.bot.get_channel(channel_id)
+            if channel:
+                await channel.send("An error occurred while ending the game.")
+        finally:
+            if message:
+                self.edit_scheduler.discard(message.id)
 
 async def setup(bot):
     print("Setting up CharacterGuess cog...")
@@ -530,8 +945,8 @@ async def setup(bot):
             return
             
         # Add the cog
-    await bot.add_cog(CharacterGuess(bot)) 
+        await bot.add_cog(CharacterGuess(bot))
         print("CharacterGuess cog setup complete!")
     except Exception as e:
         print(f"Error setting up CharacterGuess cog: {str(e)}")
-        raise e 
\ No newline at end of file
+        raise e
@@ -49,6 +49,7 @@ class Help(commands.Cog):
         # Commands section
         commands_text = (
             "`c` - Start a new character guessing game\n"
+            "`c [difficulty] reveal` - Image starts pixelated and clears up with wrong guesses\n"
             "`c end` - End the current game\n"
             "`clist <anime>` - List characters from an anime"
         )
@@ -62,8 +63,8 @@ class Help(commands.Cog):
         gameplay_text = (
             "1. Start a game using `;c`\n"
             "2. Type the character's name to make a guess\n"
-            "3. Use 🔄 to skip/start new game at any time\n"
-            "4. Use ❌ to end game and see summary\n"
+            "3. Press **Skip** to get a new character at any time\n"
+            "4. Press **End** to end the game and see the summary\n"
             "5. All commands use the `;` prefix"
         )
         embed.add_field(
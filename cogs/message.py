@@ -1,5 +1,6 @@
 import discord
 from discord.ext import commands
+from utils.config import Config
 
 class Message(commands.Cog):
     def __init__(self, bot):
@@ -10,14 +11,17 @@ class Message(commands.Cog):
         """Responds with a greeting"""
         await ctx.send(f'Hello {ctx.author.name}! 👋')
 
-    @commands.Cog.listener()
-    async def on_message(self, message):
-        # Ignore messages from the bot itself
-        if message.author == self.bot.user:
+    @commands.command(name='hint', help='Get a hint for the current game')
+    async def hint(self, ctx):
+        """Get a hint from whichever game runs in this channel"""
+        game_cog = self.bot.games.get(ctx.channel.id)
+        if game_cog is None:
+            # Only suggest the games that are loaded
+            starts = [f"`{Config.get_command(name)}`" for name in (Config.CHAR_COMMAND, 'op')
+                      if self.bot.get_command(name)]
+            await ctx.send(f"No active game! Start one with {' or '.join(starts)}" if starts else "No active game!")
             return
-
-        # Process commands
-        await self.bot.process_commands(message)
+        await game_cog.send_hint(ctx)
 
 async def setup(bot):
     await bot.add_cog(Message(bot)) 
\ No newline at end of file
@@ -1,14 +1,106 @@
 import discord
-from discord.ext import commands
+from discord.ext import commands, tasks
 import random
 from utils.database import AnimeDatabase
+from typing import Dict
+from utils.config import Config
+from utils.guess_queue import GuessQueue
+from utils.metrics import track_queue
+from utils.game_state import OpeningGame
+from utils.round_locks import RoundLocks
+from utils.session_store import SessionStore
+import itertools
+import time
 
 class OpeningGuess(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.active_games = {}
+        self.active_games: Dict[int, OpeningGame] = {}
         self.db = self.bot.db
-        self._locks = {}  # Channel-specific locks
+        self._rounds = itertools.count()
+        self.guess_queue = GuessQueue(
+            self.process_guess,
+            maxsize=Config.GUESS_QUEUE_SIZE,
+            put_timeout=Config.GUESS_QUEUE_TIMEOUT,
+            name='opening'
+        )
+        track_queue('opening_guesses', self.guess_queue.depth)
+        self.sessions = SessionStore('opening')
+        self._pending_sessions = {}  # Snapshots not yet restored, by channel
+        # Serializes guesses, skips, ends and expiry
+        self._round_locks = RoundLocks(lambda channel_id: channel_id in self.active_games)
+
+    async def cog_load(self):
+        # Only read the snapshots here; games are rebuilt on their next event.
+        # Under cluster mode each process keeps only its own shards' games.
+        self._pending_sessions = {
+            channel_id: snapshot
+            for channel_id, snapshot in self.sessions.load_all().items()
+            if self.bot.owns_guild(snapshot.get('guild_id'))
+        }
+        for channel_id in self._pending_sessions:
+            self.bot.games.claim(channel_id, self)
+        self.expire_idle_games.start()
+
+    async def cog_unload(self):
+        self.expire_idle_games.cancel()
+        for channel_id in [*self.active_games, *self._pending_sessions]:
+            self.bot.games.release(channel_id, self)
+        self.guess_queue.close()
+        await self.sessions.close()
+
+    def get_game(self, channel_id):
+        """Get a channel's game, restoring it from its snapshot on first use"""
+        game = self.active_games.get(channel_id)
+        if game is None and channel_id in self._pending_sessions:
+            snapshot = self._pending_sessions.pop(channel_id)
+            opening = self.db.get_opening(snapshot['opening_id'])
+            if opening is None:
+                self.sessions.delete(channel_id)
+                self.bot.games.release(channel_id, self)
+                return None
+            game = OpeningGame.from_snapshot(
+                snapshot,
+                self.db.title_index.key_for(opening['anime_data']),
+                next(self._rounds)
+            )
+            self.active_games[channel_id] = game
+            self.guess_queue.start(channel_id)
+            print(f"Restored opening game in channel {channel_id}")
+        return game
+
+    def save_game(self, game):
+        """Snapshot a game so it survives a restart"""
+        self.sessions.save(game.channel_id, game.to_snapshot())
+
+    def end_game(self, channel_id):
+        """Forget a channel's game and stop its guess consumer"""
+        self.active_games.pop(channel_id, None)
+        self.bot.games.release(channel_id, self)
+        self.guess_queue.stop(channel_id)
+        self.sessions.delete(channel_id)
+
+    def is_current(self, game):
+        """Whether a game is still running in its channel, after waiting on its lock"""
+        return self.active_games.get(game.channel_id) is game
+
+    def create_ended_embed(self, opening, title="Game Ended"):
+        """Create the embed revealing the answer of an ended game"""
+        embed = discord.Embed(
+            title=title,
+            description=(
+                f"The opening was **{opening['name']}**\n"
+                f"From the anime: **{opening['anime']}**\n"
+                f"Artist: **{opening['artist']}**"
+            ),
+            color=0x000000
+        )
+
+        if opening.get('video_url'):
+            embed.url = opening['video_url']
+        if opening.get('thumbnail_url'):
+            embed.set_image(url=opening['thumbnail_url'])
+        return embed
 
     def create_game_embed(self, title, description, color=discord.Color.default()):
         """Create a consistent embed style for the game"""
@@ -26,7 +118,7 @@ class OpeningGuess(commands.Cog):
         channel_id = ctx.channel.id
 
         # Check for active game
-        if channel_id in self.active_games:
+        if self.get_game(channel_id):
             await ctx.send("A game is already in progress in this channel! End it with `!op_end`")
             return
 
@@ -43,13 +135,21 @@ class OpeningGuess(commands.Cog):
                 await ctx.send("No openings available. Please try again later.")
                 return
 
+            if not self.bot.games.claim(channel_id, self):
+                await ctx.send("Another game is already running in this channel!")
+                return
+
             # Initialize game state
-            self.active_games[channel_id] = {
-                'opening': opening,
-                'hints_used': 0,
-                'guesses': 0,
-                'started_by': ctx.author.id
-            }
+            self.active_games[channel_id] = OpeningGame(
+                channel_id,
+                ctx.author.id,
+                opening['id'],
+                self.db.title_index.key_for(opening['anime_data']),
+                next(self._rounds),
+                guild_id=ctx.guild.id if ctx.guild else None
+            )
+            self.guess_queue.start(channel_id)
+            self.save_game(self.active_games[channel_id])
 
             # Create initial embed
             embed = discord.Embed(
@@ -69,20 +169,22 @@ class OpeningGuess(commands.Cog):
             await ctx.send(embed=embed)
 
         except Exception as e:
-            if channel_id in self.active_games:
-                del self.active_games[channel_id]
+            self.end_game(channel_id)
             await ctx.send(f"An error occurred while starting the game: {str(e)}")
 
-    @commands.command(name='hint', help='Get a hint for the current opening')
-    async def hint(self, ctx):
-        """Get a hint for the current opening"""
+    async def send_hint(self, ctx):
+        """Send the next hint for the current opening; routed here by the hint command"""
         channel_id = ctx.channel.id
-        if channel_id not in self.active_games:
+        game = self.get_game(channel_id)
+        if not game:
             await ctx.send("No active game! Start one with `!op`")
             return
 
-        game = self.active_games[channel_id]
-        opening = game['opening']
+        game.touch()
+        opening = self.db.get_opening(game.opening_id)
+        if opening is None:  # Gone if the dataset was reloaded
+            await ctx.send("No hints available for this opening!")
+            return
 
         # Modified hints without YouTube link
         hints = [
@@ -92,15 +194,16 @@ class OpeningGuess(commands.Cog):
             f"The opening name is **{opening['name']}**"  # Changed last hint
         ]
 
-        if game['hints_used'] >= len(hints):
+        if game.hints_used >= len(hints):
             await ctx.send("No more hints available!")
             return
 
-        hint = hints[game['hints_used']]
-        game['hints_used'] += 1
+        hint = hints[game.hints_used]
+        game.hints_used += 1
+        self.save_game(game)
 
         embed = discord.Embed(
-            title=f"💡 Hint #{game['hints_used']}",
+            title=f"💡 Hint #{game.hints_used}",
             description=hint,
             color=0x000000
         )
@@ -110,67 +213,106 @@ class OpeningGuess(commands.Cog):
     @commands.command(name='op_skip', help='Skip the current opening')
     async def op_skip(self, ctx):
         """Skip the current opening"""
-        if ctx.channel.id not in self.active_games:
+        game = self.get_game(ctx.channel.id)
+        if not game:
             await ctx.send("No active game! Start one with `!op_start`")
             return
 
-        game = self.active_games[ctx.channel.id]
-        if ctx.author.id != game['started_by']:
+        if ctx.author.id != game.started_by:
             await ctx.send("Only the game starter can skip!")
             return
 
-        # Update stats for skipped game
-        self.db.update_stats(ctx.author.id, 'openings', False)
+        async with self._round_locks.hold(ctx.channel.id):
+            if not self.is_current(game):
+                return  # Guessed or ended while we waited
+            opening = self.db.get_opening(game.opening_id)
 
-        embed = self.create_game_embed(
-            "⏭️ Opening Skipped",
-            f"The opening was **{game['opening']['name']}**\n"
-            f"**Anime:** {game['opening']['anime']}\n"
-            f"**Artist:** {game['opening']['artist']}\n"
-            f"**Type:** {game['opening']['type']}",
-            discord.Color.orange()
-        )
+            # Update stats for skipped game
+            await self.db.update_user_stats(str(ctx.author.id), 'opening', False)
 
-        if game['opening'].get('thumbnail_url'):
-            embed.set_image(url=game['opening']['thumbnail_url'])
+            if opening is None:  # Gone if the dataset was reloaded
+                self.end_game(ctx.channel.id)
+                await ctx.send("Opening skipped! It is no longer in the dataset, so it can't be revealed.")
+                return
 
-        await ctx.send(embed=embed)
-        del self.active_games[ctx.channel.id]
+            embed = self.create_game_embed(
+                "⏭️ Opening Skipped",
+                f"The opening was **{opening['name']}**\n"
+                f"**Anime:** {opening['anime']}\n"
+                f"**Artist:** {opening['artist']}\n"
+                f"**Type:** {opening['type']}",
+                discord.Color.orange()
+            )
+
+            if opening.get('video_url'):
+                embed.url = opening['video_url']
+            if opening.get('thumbnail_url'):
+                embed.set_image(url=opening['thumbnail_url'])
+
+            await ctx.send(embed=embed)
+            self.end_game(ctx.channel.id)
 
     @commands.command(name='op_end', help='End the current opening guessing game')
     async def op_end(self, ctx):
         """End the current opening guessing game"""
         channel_id = ctx.channel.id
-        if channel_id not in self.active_games:
+        game = self.get_game(channel_id)
+        if not game:
             await ctx.send("No active game to end!")
             return
 
-        game = self.active_games[channel_id]
-        if ctx.author.id != game['started_by'] and not ctx.author.guild_permissions.manage_messages:
+        if ctx.author.id != game.started_by and not ctx.author.guild_permissions.manage_messages:
             await ctx.send("Only the game starter or moderators can end the game!")
             return
 
-        opening = game['opening']
-        embed = discord.Embed(
-            title="Game Ended",
-            description=(
-                f"The opening was **{opening['name']}**\n"
-                f"From the anime: **{opening['anime']}**\n"
-                f"Artist: **{opening['artist']}**"
-            ),
-            color=0x000000
-        )
-
-        if opening.get('thumbnail_url'):
-            embed.set_image(url=opening['thumbnail_url'])
-
-        await ctx.send(embed=embed)
-        del self.active_games[channel_id]
+        async with self._round_locks.hold(channel_id):
+            if not self.is_current(game):
+                return  # Guessed or skipped while we waited
+            opening = self.db.get_opening(game.opening_id)
+            if opening is None:  # Gone if the dataset was reloaded
+                self.end_game(channel_id)
+                await ctx.send("Game ended! The opening is no longer in the dataset, so it can't be revealed.")
+                return
+            await ctx.send(embed=self.create_ended_embed(opening))
+            self.end_game(channel_id)
+
+    @tasks.loop(seconds=Config.GAME_SWEEP_INTERVAL)
+    async def expire_idle_games(self):
+        """End games nobody has touched for a while and reveal the answer"""
+        # Sessions never touched since a restart count from their last save
+        cutoff = time.time() - Config.GAME_IDLE_TIMEOUT
+        for channel_id, snapshot in list(self._pending_sessions.items()):
+            if snapshot.get('saved_at', 0) < cutoff:
+                game = self.get_game(channel_id)
+                if game:
+                    game.last_activity -= Config.GAME_IDLE_TIMEOUT
+
+        now = time.monotonic()
+        for channel_id, game in list(self.active_games.items()):
+            if game.idle_for(now) < Config.GAME_IDLE_TIMEOUT:
+                continue
+            async with self._round_locks.hold(channel_id):
+                if not self.is_current(game):
+                    continue
+                print(f"Expiring idle opening game in channel {channel_id}")
+                self.end_game(channel_id)
+            channel = self.bot.get_channel(channel_id)
+            opening = self.db.get_opening(game.opening_id)
+            if channel and opening:
+                try:
+                    await channel.send(embed=self.create_ended_embed(opening, "Game Ended (Inactive)"))
+                except discord.HTTPException as e:
+                    print(f"Error posting expired game in channel {channel_id}: {e}")
+
+    @expire_idle_games.before_loop
+    async def before_expire_idle_games(self):
+        # Restored games are only ended once their channels can be fetched
+        await self.bot.wait_until_ready()
 
     @commands.command(name='op_leaderboard', help='Show the opening guessing leaderboard')
     async def op_leaderboard(self, ctx):
         """Show the opening guessing leaderboard"""
-        leaderboard = self.db.get_leaderboard('openings')
+        leaderboard = await self.db.get_leaderboard('openings')
         if not leaderboard:
             await ctx.send("No games have been played yet!")
             return
@@ -182,7 +324,13 @@ class OpeningGuess(commands.Cog):
         )
 
         for i, entry in enumerate(leaderboard, 1):
+            # Users are only cached from recent events under the lean gateway profile
             user = self.bot.get_user(int(entry['user_id']))
+            if user is None:
+                try:
+                    user = await self.bot.fetch_user(int(entry['user_id']))
+                except discord.HTTPException:
+                    user = None
             if user:
                 embed.add_field(
                     name=f"{i}. {user.name}",
@@ -194,82 +342,62 @@ class OpeningGuess(commands.Cog):
 
         await ctx.send(embed=embed)
 
-    @commands.Cog.listener()
-    async def on_message(self, message):
-        """Handle message events"""
-        if message.author.bot or not message.content:
+    async def route_message(self, message):
+        """Queue a message routed here by the bot as a guess for the channel's game"""
+        if not message.content:
             return
         
         channel_id = message.channel.id
-        if channel_id not in self.active_games:
-            return
-        
-        # Skip if it's a command
-        if message.content.startswith('!'):
+        game = self.get_game(channel_id)
+        if not game:
             return
         
-        # Use channel-specific lock
-        if hasattr(self, f'_lock_{channel_id}'):
-            return
-        
-        try:
-            setattr(self, f'_lock_{channel_id}', True)
-            game = self.active_games[channel_id]
-            guess = message.content.lower()
-            correct_name = game['opening']['anime'].lower()
-            
-            # Check for correct guess
-            if guess == correct_name or self.is_similar_name(guess, correct_name):
+        await self.guess_queue.submit(channel_id, game.round, message)
+
+    async def process_guess(self, channel_id, round_id, message):
+        """Apply a queued guess; called serially per channel"""
+        # Skips and ends take the same lock, so a game is only closed once
+        async with self._round_locks.hold(channel_id):
+            game = self.active_games.get(channel_id)
+            if not game or game.round != round_id:
+                return  # Stale guess against a finished game
+            game.touch()
+
+            # Resolve the guess to anime ids through the title index so
+            # English titles and synonyms count as well as the romaji title
+            guessed_ids = self.db.title_index.lookup(message.content)
+            if game.answer_id in guessed_ids:
                 await self.handle_correct_guess(message, game)
             else:
-                game['guesses'] += 1
+                game.guesses += 1
+                self.save_game(game)
                 await message.add_reaction('❌')
-        finally:
-            delattr(self, f'_lock_{channel_id}')
 
     async def handle_correct_guess(self, message, game):
         """Handle correct opening guess"""
-        self.db.update_stats(str(message.author.id), 'openings', True)
+        await self.db.update_user_stats(str(message.author.id), 'opening', True)
+        opening = self.db.get_opening(game.opening_id)
+        if opening is None:  # Gone if the dataset was reloaded
+            await message.channel.send(f"🎉 Correct! {message.author.mention} got it in {game.guesses} guesses!")
+            self.end_game(message.channel.id)
+            return
         
         embed = discord.Embed(
             title="🎉 Correct!",
             description=(
-                f"{message.author.mention} got it in {game['guesses']} guesses!\n\n"
-                f"**Opening:** {game['opening']['name']}\n"
-                f"**Anime:** {game['opening']['anime']}\n"
-                f"**Artist:** {game['opening']['artist']}"
+                f"{message.author.mention} got it in {game.guesses} guesses!\n\n"
+                f"**Opening:** {opening['name']}\n"
+                f"**Anime:** {opening['anime']}\n"
+                f"**Artist:** {opening['artist']}"
             ),
             color=0x000000
         )
         
-        if game['opening'].get('anime_data', {}).get('images', {}).get('jpg', {}).get('large_image_url'):
-            embed.set_image(url=game['opening']['anime_data']['images']['jpg']['large_image_url'])
+        if opening.get('anime_data', {}).get('images', {}).get('jpg', {}).get('large_image_url'):
+            embed.set_image(url=opening['anime_data']['images']['jpg']['large_image_url'])
         
         await message.channel.send(embed=embed)
-        del self.active_games[message.channel.id]
-
-    def is_similar_name(self, guess: str, correct: str) -> bool:
-        """Check if the guessed name is similar enough to the correct name"""
-        guess = guess.lower().strip()
-        correct = correct.lower().strip()
-        
-        # Direct match
-        if guess == correct:
-            return True
-        
-        # Remove common prefixes/suffixes
-        prefixes = ['the ', 'a ', 'an ']
-        for prefix in prefixes:
-            if guess.startswith(prefix):
-                guess = guess[len(prefix):]
-            if correct.startswith(prefix):
-                correct = correct[len(prefix):]
-        
-        # Check if one is contained in the other (for nickname matches)
-        if len(guess) > 3 and (guess in correct or correct in guess):
-            return True
-        
-        return False
+        self.end_game(message.channel.id)
 
 async def setup(bot):
     await bot.add_cog(OpeningGuess(bot)) 
\ No newline at end of file
@@ -21,7 +21,7 @@ class Stats(commands.Cog):
     async def stats(self, ctx, user: discord.Member = None):
         """Show guessing statistics for a user"""
         target_user = user or ctx.author
-        stats = self.db.get_user_stats(target_user.id)
+        stats = await self.db.get_user_stats(target_user.id)
         
         # Get character stats
         char_stats = stats.get('characters', {'correct': 0, 'total': 0})
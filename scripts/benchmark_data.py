@@ -0,0 +1,368 @@
+"""Benchmark the data layer against synthetic datasets of growing size.
+
+Generates characters.json, openings.json and a legacy user_stats.json shaped
+like the crawl's output, then measures AnimeDatabase on them: load time (with
+the index build reported as its own share), peak RSS, draws by difficulty,
+guess matching (titles, and character names through CharacterGuess.names_match),
+stats updates and saving.
+Each size runs in its own process so peak RSS is not carried over.
+
+    python scripts/benchmark_data.py --sizes 10000 100000 1000000 > bench.json
+    python scripts/benchmark_data.py --generate 50000 --out /tmp/dataset
+
+Results go to stdout as JSON (progress goes to stderr), so two commits can be
+compared by diffing their output.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+from datetime import datetime
+from pathlib import Path
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Add the parent directory to sys.path to import utils
+sys.path.append(ROOT)
+
+SYLLABLES = ("ka ki ku ke ko sa shi su se so ta chi tsu te to na ni nu ne no ha hi fu he ho "
+             "ma mi mu me mo ya yu yo ra ri ru re ro wa n ga gi go za ji zu da de do ba bi bo "
+             "kyo ryu sho").split()
+ENGLISH_WORDS = ("attack sword demon academy hero slayer moon star night school dragon ghost "
+                 "magic world girl boy king queen spirit blade heart story tokyo city sky "
+                 "summer winter battle love lost last first dream shadow fire ice").split()
+SEQUELS = ("", "", "", " 2nd Season", " Season 3", " Movie", ": Final Season", " Shippuuden")
+CHARACTERS_PER_ANIME = 3  # Main characters per anime, roughly what the crawl keeps
+USERS_PER_CHARACTER = 0.1
+
+
+def romaji(rng, low=2, high=4):
+    return ''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(low, high))).capitalize()
+
+
+def make_anime(rng, mal_id):
+    """An anime_data record like the crawl stores on characters and openings"""
+    title = ' '.join(romaji(rng) for _ in range(rng.randint(1, 3))) + rng.choice(SEQUELS)
+    english = ' '.join(rng.choice(ENGLISH_WORDS).title() for _ in range(rng.randint(2, 4)))
+    popularity = rng.randint(1, 20000)
+    return {
+        'mal_id': mal_id,
+        'title': title,
+        'english_title': english if rng.random() < 0.7 else None,
+        'title_synonyms': [romaji(rng, 3, 5) for _ in range(rng.choice((0, 0, 1, 2)))],
+        'popularity': popularity,
+        'members': int(4_000_000 / popularity ** 0.8),
+        'score': round(rng.uniform(6.0, 9.2), 2),
+        'rank': rng.randint(1, 20000),
+    }
+
+
+def difficulty_for(favorites):
+    # Same thresholds as JikanAPI.get_anime_characters
+    if favorites > 10000:
+        return "Easy"
+    if favorites > 5000:
+        return "Medium"
+    return "Hard"
+
+
+def opening_difficulty(anime_data):
+    # Same rule as JikanAPI._determine_difficulty
+    best = min(anime_data['popularity'], anime_data['rank'])
+    return 'easy' if best <= 100 else 'medium' if best <= 500 else 'hard'
+
+
+def generate_dataset(directory: Path, characters: int, seed: int = 0) -> dict:
+    """Write a synthetic dataset under ``directory`` in the bot's data/ layout"""
+    rng = random.Random(seed)
+    cache_dir = directory / "data" / "cache"
+    stats_dir = directory / "data" / "stats"
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    stats_dir.mkdir(parents=True, exist_ok=True)
+
+    anime = [make_anime(rng, mal_id) for mal_id in range(1, characters // CHARACTERS_PER_ANIME + 2)]
+    chars = []
+    for char_id in range(1, characters + 1):
+        anime_data = rng.choice(anime)
+        favorites = int(rng.paretovariate(1.2) * 200)  # A few very popular characters, a long tail
+        chars.append({
+            'id': str(char_id),
+            'name': f"{romaji(rng)}, {romaji(rng)}",
+            'image_url': f"https://cdn.myanimelist.net/images/characters/{char_id % 20}/{char_id}.jpg",
+            'favorites': favorites,
+            'anime_data': dict(anime_data),
+            'difficulty': difficulty_for(favorites),
+            'hints': [f"Age: {16 + char_id % 20}", f"Their name starts with **{rng.choice('ABKMST')}**"],
+        })
+
+    openings = []
+    for anime_data in anime:
+        for number in range(1, rng.choice((1, 1, 2)) + 1):  # Most shows have one opening
+            song = ' '.join(romaji(rng) for _ in range(rng.randint(1, 3)))
+            openings.append({
+                'id': f"{anime_data['mal_id']}_{number}: \"{song}\" by {romaji(rng)}",
+                'name': song,
+                'artist': romaji(rng),
+                'anime': anime_data['title'],
+                'type': 'OP',
+                'anime_data': dict(anime_data),
+                'difficulty': opening_difficulty(anime_data),
+            })
+
+    users = {}
+    for user_id in range(int(characters * USERS_PER_CHARACTER)):
+        user = {}
+        for game_type in ('character', 'opening'):
+            total = rng.randint(0, 200)
+            user[f"{game_type}_games"] = {'wins': rng.randint(0, total), 'total': total}
+        users[str(100000000000000000 + user_id)] = user
+
+    # Same formatting as AnimeDatabase.save_data, so file sizes are realistic
+    with open(cache_dir / "characters.json", 'w', encoding='utf-8') as f:
+        json.dump(chars, f, ensure_ascii=False, indent=2)
+    with open(cache_dir / "openings.json", 'w', encoding='utf-8') as f:
+        json.dump(openings, f, ensure_ascii=False, indent=2)
+    with open(stats_dir / "user_stats.json", 'w', encoding='utf-8') as f:
+        json.dump(users, f, ensure_ascii=False, indent=2)
+    return {'characters': len(chars), 'openings': len(openings), 'anime': len(anime), 'users': len(users)}
+
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def summarize(samples):
+    """Per-operation timings in microseconds"""
+    samples = sorted(samples)
+    count = len(samples)
+    if not count:
+        return {'count': 0}
+    return {
+        'count': count,
+        'mean_us': round(sum(samples) / count * 1e6, 2),
+        'p50_us': round(samples[count // 2] * 1e6, 2),
+        'p95_us': round(samples[min(count - 1, int(count * 0.95))] * 1e6, 2),
+        'max_us': round(samples[-1] * 1e6, 2),
+    }
+
+
+def timed_each(operation, arguments):
+    samples = []
+    for argument in arguments:
+        started = time.perf_counter()
+        operation(argument)
+        samples.append(time.perf_counter() - started)
+    return summarize(samples)
+
+
+def misspell(rng, title):
+    """Drop or swap a letter, like a hurried guess"""
+    if len(title) < 5:
+        return title
+    i = rng.randrange(1, len(title) - 1)
+    if rng.random() < 0.5:
+        return title[:i] + title[i + 1:]
+    return title[:i - 1] + title[i] + title[i - 1] + title[i + 1:]
+
+
+def name_variants(rng, name):
+    """Ways players type a "Surname, Given" character name"""
+    surname, _, given = name.partition(', ')
+    full = f"{given} {surname}" if given else name
+    return {
+        'name_exact': name,
+        'name_reordered': full,
+        'name_given': given or name,
+        'name_misspelt': misspell(rng, full),
+        'name_lowercase': full.lower(),
+    }
+
+
+def benchmark_names(db, seed, operations):
+    """Time CharacterGuess.names_match on realistic guesses, and how many it accepts"""
+    from cogs.character_guess import CharacterGuess
+    matcher = CharacterGuess.__new__(CharacterGuess)  # names_match needs no bot state
+    rng = random.Random(seed)  # Its own, so the sections after it get the same inputs as before
+
+    cases = {}
+    for _ in range(operations):
+        name = rng.choice(db.characters)['name']
+        for variant, guess in name_variants(rng, name).items():
+            cases.setdefault(variant, []).append((guess, name))
+        cases.setdefault('name_other', []).append((rng.choice(db.characters)['name'], name))
+
+    timings, match_rate = {}, {}
+    # Its debug prints are part of the cost, but the terminal they reach is not
+    with open(os.devnull, 'w') as devnull, redirect_stdout(devnull):
+        for variant, pairs in cases.items():
+            matched = []
+            timings[variant] = timed_each(lambda pair: matched.append(matcher.names_match(*pair)), pairs)
+            match_rate[variant] = round(sum(matched) / len(matched), 3)
+    return timings, match_rate
+
+
+def run_benchmark(directory: Path, operations: int, seed: int) -> dict:
+    """Measure AnimeDatabase on the dataset in ``directory``; runs with it as cwd"""
+    os.chdir(directory)
+    from utils.database import AnimeDatabase
+    from utils.deck import ShuffledDeck
+
+    rng = random.Random(seed)
+    result = {'rss_before_load_mb': peak_rss_mb()}
+    db = AnimeDatabase()
+
+    # load_cache builds the indexes itself; time that build from inside it
+    index_seconds = []
+    build_indexes = db.build_indexes
+
+    def timed_build_indexes():
+        started = time.perf_counter()
+        build_indexes()
+        index_seconds.append(time.perf_counter() - started)
+
+    db.build_indexes = timed_build_indexes
+    started = time.perf_counter()
+    if not asyncio.run(db.load_cache()):
+        raise RuntimeError(f"No dataset found in {directory}")
+    result['load_seconds'] = round(time.perf_counter() - started, 3)  # Parsing and indexing
+    result['index_seconds'] = round(sum(index_seconds), 3)  # The indexing part of load_seconds
+    del db.build_indexes
+    result['peak_rss_mb'] = peak_rss_mb()
+    result['characters'], result['openings'] = len(db.characters), len(db.openings)
+
+    # Draws, the way a game picks its next round
+    draws = {}
+    for difficulty in (None, 'easy', 'medium', 'hard'):
+        bucket = db.character_bucket(difficulty)
+        deck = ShuffledDeck(len(bucket), seed=seed)
+
+        def draw_character(_):
+            if not deck.remaining:
+                deck.reset(len(bucket))
+            return db.get_character_by_id(bucket[deck.draw()])
+
+        draws[f"character_{difficulty or 'any'}"] = timed_each(draw_character, range(operations)) \
+            if bucket else {'count': 0}
+        draws[f"opening_{difficulty or 'any'}"] = timed_each(
+            lambda _: db.get_random_opening(difficulty), range(operations))
+    result['draw'] = draws
+
+    # Guesses: exact titles, misspelt titles, and text that matches nothing
+    titles = [rng.choice(db.openings)['anime_data']['title'] for _ in range(operations)]
+    english = [title for title in (rng.choice(db.characters)['anime_data'].get('english_title')
+                                   for _ in range(operations)) if title]
+    result['guess'] = {
+        'title_exact': timed_each(db.title_index.lookup, titles),
+        'title_misspelt': timed_each(db.title_index.lookup, [misspell(rng, title) for title in titles]),
+        'title_english': timed_each(db.title_index.lookup, english),
+        'title_miss': timed_each(db.title_index.lookup, [romaji(rng, 6, 8) for _ in range(operations)]),
+        'character_search': timed_each(db.character_index.search, titles),
+        'find_anime': timed_each(db.find_anime, titles),
+    }
+    result['name_guess'], result['name_match_rate'] = benchmark_names(db, seed, operations)
+
+    # Stats: the first access imports user_stats.json into SQLite
+    started = time.perf_counter()
+    db.stats_store
+    result['stats_import_seconds'] = round(time.perf_counter() - started, 3)
+    user_ids = [str(100000000000000000 + rng.randrange(max(1, len(db.characters) // 10)))
+                for _ in range(operations)]
+    # Timed on the store itself; the bot runs the same calls on its stats thread
+    result['stats'] = {
+        'update': timed_each(
+            lambda user_id: db.stats_store.record(user_id, 'character', rng.random() < 0.5), user_ids),
+        'get': timed_each(db.stats_store.get, user_ids),
+    }
+
+    # Saving: the dataset files, then folding the stats WAL into the database
+    db.last_cache_update = datetime.now()
+    started = time.perf_counter()
+    db.save_data()
+    result['save_seconds'] = round(time.perf_counter() - started, 3)
+    started = time.perf_counter()
+    db.stats_store.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    result['stats_flush_seconds'] = round(time.perf_counter() - started, 3)
+    db.stats_store.close()
+
+    result['file_mb'] = {
+        path.name: round(path.stat().st_size / (1024 * 1024), 1)
+        for path in (db.cache_dir / "characters.json", db.cache_dir / "openings.json",
+                     db.stats_dir / "user_stats.json", db.stats_dir / "stats.db")
+    }
+    result['peak_rss_mb'] = max(result['peak_rss_mb'], peak_rss_mb())
+    return result
+
+
+def run_size(characters: int, operations: int, seed: int) -> dict:
+    """Generate one dataset and benchmark it in a fresh process"""
+    with tempfile.TemporaryDirectory(prefix=f"anibot-bench-{characters}-") as directory:
+        started = time.perf_counter()
+        dataset = generate_dataset(Path(directory), characters, seed)
+        print(f"Generated {characters} characters in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), '--run', directory,
+             '--operations', str(operations), '--seed', str(seed)],
+            stdout=subprocess.PIPE, check=True, text=True
+        ).stdout
+    return {'size': characters, 'dataset': dataset, **json.loads(output)}
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000],
+                        help='Character counts to benchmark (default: 10000 100000)')
+    parser.add_argument('--operations', type=int, default=2000,
+                        help='Draws, guesses and stats updates timed per measurement')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--generate', type=int, metavar='CHARACTERS',
+                        help='Only write a dataset of this size to --out')
+    parser.add_argument('--out', type=Path, default=Path('bench-data'),
+                        help='Directory for --generate')
+    parser.add_argument('--run', type=Path, help=argparse.SUPPRESS)  # Child process: benchmark one dataset
+    args = parser.parse_args()
+
+    if args.run:
+        # The database reports progress with print; keep stdout for the JSON
+        with redirect_stdout(sys.stderr):
+            result = run_benchmark(args.run.resolve(), args.operations, args.seed)
+        json.dump(result, sys.stdout)
+        return
+
+    if args.generate:
+        dataset = generate_dataset(args.out, args.generate, args.seed)
+        print(f"Wrote {dataset} under {args.out / 'data'}", file=sys.stderr)
+        return
+
+    report = {
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'seed': args.seed,
+        'operations': args.operations,
+        'results': [run_size(size, args.operations, args.seed) for size in args.sizes],
+    }
+    json.dump(report, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
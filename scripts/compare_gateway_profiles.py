@@ -0,0 +1,124 @@
+"""Compare memory and startup cost of the gateway cache profiles.
+
+Feeds the same synthetic multi-guild load into a bot's connection state for
+each profile, without connecting to Discord. Each profile only gets the
+events its intents would subscribe to: the full profile receives member
+lists (as after chunking) and presences, and both receive guild messages.
+
+    python scripts/compare_gateway_profiles.py --guilds 200 --members 2000
+"""
+import argparse
+import asyncio
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+# Add the parent directory to sys.path to import the bot
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from discord.ext import commands
+from bot import gateway_options
+from utils.config import Config
+
+BOT_ID = 1
+
+
+def user_payload(user_id):
+    return {'id': str(user_id), 'username': f'user{user_id}', 'discriminator': '0',
+            'global_name': None, 'avatar': None}
+
+
+def guild_payload(guild_id, members, with_members):
+    channel_id = guild_id * 10
+    data = {
+        'id': str(guild_id),
+        'name': f'guild{guild_id}',
+        'owner_id': str(BOT_ID),
+        'roles': [{'id': str(guild_id), 'name': '@everyone', 'permissions': '0', 'position': 0,
+                   'color': 0, 'hoist': False, 'managed': False, 'mentionable': False}],
+        'channels': [{'id': str(channel_id), 'type': 0, 'name': 'general', 'position': 0,
+                      'permission_overwrites': []}],
+        'member_count': members,
+        'members': [{'user': user_payload(BOT_ID), 'roles': [], 'joined_at': None, 'deaf': False, 'mute': False, 'flags': 0}],
+        'presences': [],
+    }
+    if with_members:
+        first = guild_id * 1_000_000
+        data['members'] += [
+            {'user': user_payload(first + i), 'roles': [], 'joined_at': None, 'deaf': False, 'mute': False, 'flags': 0}
+            for i in range(members)
+        ]
+        data['presences'] = [
+            {'user': {'id': str(first + i)}, 'status': 'online', 'activities': [], 'client_status': {}}
+            for i in range(0, members, 4)
+        ]
+    return data
+
+
+def message_payload(guild_id, message_id):
+    author = guild_id * 1_000_000 + message_id % 50
+    return {
+        'id': str(message_id), 'channel_id': str(guild_id * 10), 'guild_id': str(guild_id),
+        'author': user_payload(author),
+        'member': {'roles': [], 'joined_at': None, 'deaf': False, 'mute': False, 'flags': 0},
+        'content': 'naruto uzumaki', 'timestamp': '2024-01-01T00:00:00+00:00',
+        'edited_timestamp': None, 'tts': False, 'mention_everyone': False, 'mentions': [],
+        'mention_roles': [], 'attachments': [], 'embeds': [], 'pinned': False, 'type': 0,
+    }
+
+
+async def measure(profile, guilds, members, messages):
+    options = gateway_options(profile)
+    with_members = options['intents'].members
+    bot = commands.Bot(command_prefix=Config.PREFIX, help_command=None, **options)
+    state = bot._connection
+    state.user = None
+    state.dispatch = lambda *args, **kwargs: None  # Only the caches are measured
+
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    for guild_id in range(1, guilds + 1):
+        state._add_guild_from_data(guild_payload(guild_id, members, with_members))
+    startup = time.perf_counter() - started
+
+    message_id = 1
+    for _ in range(messages):
+        for guild_id in range(1, guilds + 1):
+            state.parse_message_create(message_payload(guild_id, message_id))
+            message_id += 1
+
+    gc.collect()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    cached_members = sum(len(guild._members) for guild in state._guilds.values())
+    await bot.close()
+    return {
+        'profile': profile,
+        'startup_s': startup,
+        'current_mb': current / 1024 / 1024,
+        'peak_mb': peak / 1024 / 1024,
+        'members': cached_members,
+        'messages': len(state._messages or ()),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Compare gateway cache profiles")
+    parser.add_argument("--guilds", type=int, default=200)
+    parser.add_argument("--members", type=int, default=2000, help="Members per guild")
+    parser.add_argument("--messages", type=int, default=20, help="Messages per guild")
+    args = parser.parse_args()
+
+    print(f"{args.guilds} guilds x {args.members} members, {args.messages} messages per guild\n")
+    print(f"{'profile':<8} {'guild load':>11} {'memory':>10} {'peak':>10} {'members':>10} {'messages':>9}")
+    for profile in ("full", "lean"):
+        result = await measure(profile, args.guilds, args.members, args.messages)
+        print(f"{result['profile']:<8} {result['startup_s']:>10.2f}s {result['current_mb']:>8.1f}MB "
+              f"{result['peak_mb']:>8.1f}MB {result['members']:>10} {result['messages']:>9}")
+    print("\nThe full profile also waits for guild chunking at startup, which is not simulated here.")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,41 @@
+"""Rebuild every character's hints from the raw details saved by the crawl.
+
+Run this after changing how hints are written; no API calls are made.
+
+    python scripts/compile_hints.py
+"""
+import json
+import os
+import sys
+from pathlib import Path
+
+# Add the parent directory to sys.path to import utils
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.config import Config
+from utils.hints import compile_hints, load_raw_details
+
+CACHE_DIR = Path("data/cache")
+
+
+def main():
+    characters_file = CACHE_DIR / "characters.json"
+    with open(characters_file, 'r', encoding='utf-8') as f:
+        characters = json.load(f)
+    details = load_raw_details(CACHE_DIR / "character_details.json")
+
+    compiled = 0
+    for char in characters:
+        raw = details.get(char['id'])
+        if raw is None:
+            continue
+        char['hints'] = compile_hints(raw, char['anime_data']['title'], Config.CHARACTER_HINT_LIMIT)
+        compiled += 1
+
+    with open(characters_file, 'w', encoding='utf-8') as f:
+        json.dump(characters, f, ensure_ascii=False, indent=2)
+    print(f"Compiled hints for {compiled}/{len(characters)} characters "
+          f"({len(characters) - compiled} have no saved details; the next crawl fetches them)")
+
+
+if __name__ == "__main__":
+    main()
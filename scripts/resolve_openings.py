@@ -0,0 +1,40 @@
+"""Attach YouTube videos to the cached openings without a full crawl.
+
+Spends at most today's remaining YouTube quota, most popular anime first,
+and picks up where the last run stopped. Run it daily until every opening
+has been looked up:
+
+    python scripts/resolve_openings.py
+"""
+import asyncio
+import json
+import os
+import sys
+from pathlib import Path
+
+# Add the parent directory to sys.path to import utils
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.youtube_api import YouTubeAPI
+
+CACHE_DIR = Path("data/cache")
+
+
+async def main():
+    openings_file = CACHE_DIR / "openings.json"
+    with open(openings_file, 'r', encoding='utf-8') as f:
+        openings = json.load(f)
+
+    youtube = YouTubeAPI(CACHE_DIR)
+    try:
+        await youtube.resolve_openings(openings)
+    finally:
+        youtube.close()
+
+    with open(openings_file, 'w', encoding='utf-8') as f:
+        json.dump(openings, f, ensure_ascii=False, indent=2)
+    with_video = sum(1 for opening in openings if opening.get('video_id'))
+    print(f"{with_video}/{len(openings)} openings have a video")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
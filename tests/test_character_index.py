@@ -0,0 +1,39 @@
+from utils.character_index import CharacterIndex, TitleTrie
+from utils.title_index import TitleIndex
+
+
+def test_trie_completes_best_first_and_on_later_words():
+    trie = TitleTrie.build({'Naruto': 3, 'Naruto: Shippuuden': 2, 'Boruto: Naruto Next Generations': 1})
+    assert trie.complete('nar') == ['Naruto', 'Naruto: Shippuuden', 'Boruto: Naruto Next Generations']
+    assert trie.complete('next gen') == ['Boruto: Naruto Next Generations']
+    assert trie.complete('zzz') == []
+
+
+def test_trie_filters_its_buckets_past_the_branching_depth():
+    trie = TitleTrie.build({'Kimetsu no Yaiba': 2, 'Kimi no Na wa': 1}, depth=2)
+    assert trie.complete('ki') == ['Kimetsu no Yaiba', 'Kimi no Na wa']
+    assert trie.complete('kimi no') == ['Kimi no Na wa']
+    assert trie.complete('kimi', limit=1) == ['Kimi no Na wa']
+
+
+def make_character(char_id, favorites, anime_data):
+    return {'id': char_id, 'name': f"Character {char_id}", 'favorites': favorites, 'anime_data': anime_data}
+
+
+def test_search_lists_characters_most_favorited_first():
+    bebop = {'mal_id': 1, 'title': 'Cowboy Bebop', 'members': 10}
+    naruto = {'mal_id': 2, 'title': 'Naruto', 'english_title': 'Naruto', 'members': 20}
+    characters = [
+        make_character('a', 5, bebop), make_character('b', 50, bebop), make_character('c', 1, naruto),
+    ]
+    title_index = TitleIndex.build([bebop, naruto])
+    index = CharacterIndex.build(characters, title_index)
+
+    title, found = index.search('cowboy bebop')
+    assert title == 'Cowboy Bebop'
+    assert [char['id'] for char in found] == ['b', 'a']
+
+    title, found = index.search('cowboy bebp')  # Falls back to typo matching
+    assert title == 'Cowboy Bebop'
+    assert index.search('season') == (None, [])
+    assert index.complete('cow') == ['Cowboy Bebop']
@@ -0,0 +1,49 @@
+from utils.deck import ShuffledDeck
+
+
+def draw_all(deck):
+    drawn = []
+    while deck.remaining:
+        drawn.append(deck.draw())
+    return drawn
+
+
+def test_draws_every_index_once():
+    deck = ShuffledDeck(500, seed=7)
+    drawn = draw_all(deck)
+    assert sorted(drawn) == list(range(500))
+    assert drawn != list(range(500))
+
+
+def test_exhausted_deck_draws_none():
+    deck = ShuffledDeck(3, seed=1)
+    draw_all(deck)
+    assert deck.draw() is None
+    assert deck.remaining == 0
+
+
+def test_same_seed_same_order():
+    assert draw_all(ShuffledDeck(100, seed=3)) == draw_all(ShuffledDeck(100, seed=3))
+    assert draw_all(ShuffledDeck(100, seed=3)) != draw_all(ShuffledDeck(100, seed=4))
+
+
+def test_snapshot_resumes_exactly():
+    deck = ShuffledDeck(200, seed=11)
+    first = [deck.draw() for _ in range(50)]
+    resumed = ShuffledDeck.from_snapshot(deck.to_snapshot())
+    assert draw_all(resumed) == draw_all(deck)
+    assert not set(first) & set(draw_all(ShuffledDeck.from_snapshot(deck.to_snapshot())))
+
+
+def test_remembers_at_most_one_swap_per_draw():
+    deck = ShuffledDeck(10000, seed=5)
+    for draws in range(1, 101):
+        deck.draw()
+        assert len(deck._swaps) <= draws
+
+
+def test_reset_starts_a_new_shuffle():
+    deck = ShuffledDeck(5, seed=2)
+    draw_all(deck)
+    deck.reset(8)
+    assert sorted(draw_all(deck)) == list(range(8))
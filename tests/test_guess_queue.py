@@ -0,0 +1,101 @@
+import asyncio
+
+from utils.guess_queue import GuessQueue
+
+
+def test_guesses_are_handled_in_order_one_at_a_time():
+    handled = []
+    running = 0
+
+    async def handler(channel_id, round_id, message):
+        nonlocal running
+        running += 1
+        assert running == 1
+        await asyncio.sleep(0.001)
+        handled.append((channel_id, round_id, message))
+        running -= 1
+
+    async def main():
+        queue = GuessQueue(handler)
+        queue.start(1)
+        for i in range(5):
+            assert await queue.submit(1, 'round', i)
+        await asyncio.sleep(0.05)
+        queue.close()
+
+    asyncio.run(main())
+    assert handled == [(1, 'round', i) for i in range(5)]
+
+
+def test_submit_without_a_consumer_is_refused():
+    async def main():
+        queue = GuessQueue(lambda *args: asyncio.sleep(0))
+        return await queue.submit(1, 'round', 'guess')
+
+    assert asyncio.run(main()) is False
+
+
+def test_stop_discards_queued_guesses():
+    handled = []
+    release = None
+
+    async def handler(channel_id, round_id, message):
+        handled.append(message)
+        await release.wait()
+
+    async def main():
+        nonlocal release
+        release = asyncio.Event()
+        queue = GuessQueue(handler)
+        queue.start(1)
+        for i in range(3):
+            await queue.submit(1, 'round', i)
+        await asyncio.sleep(0.01)
+        assert queue.depth(1) == 2
+        queue.stop(1)
+        release.set()
+        await asyncio.sleep(0.01)
+        assert queue.depth() == 0
+
+    asyncio.run(main())
+    assert handled == [0]
+
+
+def test_flooded_channel_drops_guesses_after_the_timeout():
+    async def main():
+        release = asyncio.Event()
+
+        async def handler(channel_id, round_id, message):
+            await release.wait()
+
+        queue = GuessQueue(handler, maxsize=1, put_timeout=0.01)
+        queue.start(1)
+        await queue.submit(1, 'round', 'in handler')
+        await asyncio.sleep(0)
+        assert await queue.submit(1, 'round', 'queued')
+        accepted = await queue.submit(1, 'round', 'dropped')
+        release.set()
+        queue.close()
+        return accepted, queue.dropped
+
+    assert asyncio.run(main()) == (False, 1)
+
+
+def test_handler_errors_do_not_stop_the_consumer():
+    handled = []
+
+    async def handler(channel_id, round_id, message):
+        if message == 'bad':
+            raise ValueError(message)
+        handled.append(message)
+
+    async def main():
+        queue = GuessQueue(handler)
+        queue.start(1)
+        await queue.submit(1, 'round', 'bad')
+        await queue.submit(1, 'round', 'good')
+        await asyncio.sleep(0.01)
+        queue.close()
+
+    asyncio.run(main())
+    assert handled == ['good']
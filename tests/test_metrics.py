@@ -0,0 +1,47 @@
+from utils.metrics import Registry
+
+
+def test_counter_and_gauge_lines():
+    registry = Registry()
+    requests = registry.counter('test_requests_total', 'Requests', ['route'])
+    requests.inc('/a')
+    requests.inc('/a', amount=2)
+    registry.gauge('test_items', 'Items').set(7)
+
+    lines = registry.render().splitlines()
+    assert '# TYPE test_requests_total counter' in lines
+    assert 'test_requests_total{route="/a"} 3' in lines
+    assert 'test_items 7' in lines
+
+
+def test_label_values_are_escaped():
+    registry = Registry()
+    registry.counter('test_total', 'Test', ['name']).inc('say "hi"\\now')
+    assert 'test_total{name="say \\"hi\\"\\\\now"} 1' in registry.render()
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = Registry()
+    latency = registry.histogram('test_seconds', 'Latency', ['op'], buckets=(0.1, 1))
+    for value in (0.05, 0.5, 0.5, 5):
+        latency.observe(value, 'get')
+
+    lines = registry.render().splitlines()
+    assert 'test_seconds_bucket{op="get",le="0.1"} 1' in lines
+    assert 'test_seconds_bucket{op="get",le="1"} 3' in lines
+    assert 'test_seconds_bucket{op="get",le="+Inf"} 4' in lines
+    assert 'test_seconds_count{op="get"} 4' in lines
+    assert 'test_seconds_sum{op="get"} 6.05' in lines
+
+
+def test_registering_a_gauge_callback_again_replaces_it():
+    registry = Registry()
+    registry.gauge_callback('test_depth', 'Depth', lambda: {('a',): 1}, ['queue'])
+    registry.gauge_callback('test_depth', 'Depth', lambda: {('a',): 2}, ['queue'])
+    assert 'test_depth{queue="a"} 2' in registry.render()
+
+
+def test_failing_callback_renders_no_values():
+    registry = Registry()
+    registry.gauge_callback('test_broken', 'Broken', lambda: 1 / 0)
+    assert registry.render().splitlines() == ['# HELP test_broken Broken', '# TYPE test_broken gauge']
@@ -0,0 +1,69 @@
+import asyncio
+
+from utils.result_cache import ResultCache
+
+
+def counting_fetch(value):
+    calls = []
+
+    async def fetch():
+        calls.append(value)
+        await asyncio.sleep(0.01)
+        return value
+
+    return fetch, calls
+
+
+def test_fresh_entries_are_hits():
+    async def main():
+        cache = ResultCache()
+        fetch, calls = counting_fetch('result')
+        assert await cache.get('key', 60, fetch) == 'result'
+        assert await cache.get('key', 60, fetch) == 'result'
+        return cache, calls
+
+    cache, calls = asyncio.run(main())
+    assert calls == ['result']
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_concurrent_misses_share_one_fetch():
+    async def main():
+        cache = ResultCache()
+        fetch, calls = counting_fetch('result')
+        results = await asyncio.gather(*(cache.get('key', 60, fetch) for _ in range(5)))
+        return results, calls
+
+    results, calls = asyncio.run(main())
+    assert results == ['result'] * 5
+    assert calls == ['result']
+
+
+def test_stale_entries_are_served_while_refreshing():
+    async def main():
+        cache = ResultCache()
+        old, _ = counting_fetch('old')
+        new, calls = counting_fetch('new')
+        await cache.get('key', 0, old)  # Expires at once
+        stale = await cache.get('key', 60, new)
+        await asyncio.sleep(0.05)
+        fresh = await cache.get('key', 60, new)
+        return stale, fresh, calls, cache.stale_hits
+
+    assert asyncio.run(main()) == ('old', 'new', ['new'], 1)
+
+
+def test_empty_results_are_not_cached_and_size_is_bounded():
+    async def main():
+        cache = ResultCache(max_entries=2)
+        empty, empty_calls = counting_fetch(None)
+        await cache.get('empty', 60, empty)
+        await cache.get('empty', 60, empty)
+        for key in ('a', 'b', 'c'):
+            fetch, _ = counting_fetch(key)
+            await cache.get(key, 60, fetch)
+        return empty_calls, list(cache._entries)
+
+    empty_calls, keys = asyncio.run(main())
+    assert len(empty_calls) == 2
+    assert keys == ['b', 'c']
@@ -0,0 +1,39 @@
+import asyncio
+
+from utils.round_locks import RoundLocks
+
+
+def test_holders_of_a_channel_run_one_at_a_time():
+    order = []
+
+    async def main():
+        locks = RoundLocks(lambda channel_id: True)
+
+        async def hold(name):
+            async with locks.hold(1):
+                order.append(f"{name} in")
+                await asyncio.sleep(0.01)
+                order.append(f"{name} out")
+
+        await asyncio.gather(hold('a'), hold('b'))
+
+    asyncio.run(main())
+    assert order == ['a in', 'a out', 'b in', 'b out']
+
+
+def test_lock_is_forgotten_only_once_released_with_no_game():
+    active = {1}
+
+    async def main():
+        locks = RoundLocks(lambda channel_id: channel_id in active)
+        async with locks.hold(1):
+            active.discard(1)  # The game ends while the lock is held
+            assert 1 in locks._locks
+        assert 1 not in locks._locks
+
+        active.add(2)
+        async with locks.hold(2):
+            pass
+        assert 2 in locks._locks
+
+    asyncio.run(main())
@@ -0,0 +1,84 @@
+import pytest
+
+from utils.title_index import TitleIndex, normalize_title, significant_words
+
+ANIME = [
+    {'mal_id': 1, 'title': 'Shingeki no Kyojin', 'english_title': 'Attack on Titan'},
+    {'mal_id': 2, 'title': 'Shingeki no Kyojin Season 2', 'english_title': 'Attack on Titan Season 2'},
+    {'mal_id': 3, 'title': 'Naruto'},
+    {'mal_id': 4, 'title': 'Naruto: Shippuuden', 'title_synonyms': ['Naruto Hurricane Chronicles']},
+    {'mal_id': 5, 'title': 'Kimetsu no Yaiba', 'english_title': 'Demon Slayer'},
+    {'mal_id': 6, 'title': 'Boku no Hero Academia', 'english_title': 'My Hero Academia'},
+    {'mal_id': 7, 'title': 'Mob Psycho 100'},
+    {'mal_id': 8, 'title': 'Mob Psycho 100 II'},
+    {'mal_id': 9, 'title': 'Anime 5'},
+    {'mal_id': 10, 'title': 'Anime 6'},
+]
+
+
+@pytest.fixture(scope='module')
+def index():
+    return TitleIndex.build(ANIME)
+
+
+def test_normalize_title_strips_accents_punctuation_and_articles():
+    assert normalize_title("The Café: Déjà Vu!") == "cafe deja vu"
+    assert normalize_title(None) == ''
+
+
+def test_significant_words_drop_stop_words_and_numbers():
+    assert significant_words("shingeki no kyojin season 2") == ['shingeki', 'kyojin']
+
+
+@pytest.mark.parametrize('guess, expected', [
+    ('Shingeki no Kyojin', {1}),
+    ('attack on titan', {1}),
+    ('ATTACK ON TITAN SEASON 2', {2}),
+    ('Naruto Hurricane Chronicles', {4}),
+    ('demon slayer', {5}),
+])
+def test_exact_titles(index, guess, expected):
+    assert index.lookup(guess) == expected
+
+
+@pytest.mark.parametrize('guess, expected', [
+    ('Shingeki no Kyojn', {1, 2}),
+    ('atack on titan', {1, 2}),
+    ('kimetsu no yaba', {5}),
+    ('anme 5', {9}),
+])
+def test_typos_match(index, guess, expected):
+    assert index.lookup(guess) == expected
+
+
+@pytest.mark.parametrize('guess, expected', [
+    ('attack titan', {1, 2}),
+    ('my hero academy', {6}),
+    ('boku no hero', {6}),
+    ('naruto shipuden', {3, 4}),
+    ('mob psycho', {7, 8}),
+])
+def test_most_of_a_titles_words_match(index, guess, expected):
+    assert index.lookup(guess) == expected
+
+
+@pytest.mark.parametrize('guess', [
+    'season', 'season 2', 'movie', 'the', '5', 'attack', 'titan', 'hero', 'shippuden', '',
+    'completely unrelated words',
+])
+def test_generic_or_partial_guesses_match_nothing(index, guess):
+    assert index.lookup(guess) == set()
+
+
+def test_numbers_tell_titles_apart(index):
+    assert index.lookup('anime 5') == {9}
+    assert index.lookup('anime 6') == {10}
+
+
+def test_records_without_mal_id_share_their_twins_key():
+    index = TitleIndex.build([
+        {'mal_id': 42, 'title': 'Cowboy Bebop'},
+        {'title': 'Cowboy Bebop', 'english_title': 'Cowboy Bebop: The Series'},
+    ])
+    assert index.key_for({'title': 'Cowboy Bebop'}) == 42
+    assert index.lookup('cowboy bebop the series') == {42}
@@ -6,9 +6,12 @@ import time
 import json
 import os
 from datetime import datetime, timedelta
+from utils.metrics import JIKAN_RATE_LIMITS, JIKAN_RETRIES, JIKAN_SECONDS
 
 class AnimeAPI:
-    def __init__(self):
+    def __init__(self, session: aiohttp.ClientSession = None):
+        self.session = session  # Injected by the bot; a private one is opened otherwise
+        self._owns_session = session is None
         self.base_url = "https://api.jikan.moe/v4"
         self.rate_limit_delay = 1  # 1 second between requests
         self.last_request_time = 0
@@ -37,29 +40,41 @@ class AnimeAPI:
             if time_since_last < self.rate_limit_delay:
                 await asyncio.sleep(self.rate_limit_delay - time_since_last)
             
-            async with aiohttp.ClientSession() as session:
-                url = f"{self.base_url}/{endpoint}"
-                async with session.get(url, params=params) as response:
-                    self.last_request_time = time.time()
-                    
-                    if response.status == 200:
-                        data = await response.json()
-                        # Cache the response
-                        with open(cache_file, 'w', encoding='utf-8') as f:
-                            json.dump(data, f)
-                        return data
-                    elif response.status == 429:  # Rate limited
-                        if force_cache:
-                            return None
-                        await asyncio.sleep(2)  # Wait 2 seconds before retry
-                        return await self._make_request(endpoint, params, True)
-                    else:
-                        print(f"API request failed: {response.status}")
+            if self.session is None or self.session.closed:
+                self.session = aiohttp.ClientSession()
+                self._owns_session = True
+
+            url = f"{self.base_url}/{endpoint}"
+            started = time.perf_counter()
+            async with self.session.get(url, params=params) as response:
+                self.last_request_time = time.time()
+                JIKAN_SECONDS.observe(time.perf_counter() - started, 'anime_info')
+                
+                if response.status == 200:
+                    data = await response.json()
+                    # Cache the response
+                    with open(cache_file, 'w', encoding='utf-8') as f:
+                        json.dump(data, f)
+                    return data
+                elif response.status == 429:  # Rate limited
+                    JIKAN_RATE_LIMITS.inc('anime_info')
+                    if force_cache:
                         return None
+                    JIKAN_RETRIES.inc('anime_info')
+                    await asyncio.sleep(2)  # Wait 2 seconds before retry
+                    return await self._make_request(endpoint, params, True)
+                else:
+                    print(f"API request failed: {response.status}")
+                    return None
         except Exception as e:
             print(f"API request error: {e}")
             return None
 
+    async def close(self):
+        """Close the session if we opened it ourselves"""
+        if self.session and self._owns_session:
+            await self.session.close()
+
     async def get_seasonal_anime(self, limit: int = 50) -> List[Dict]:
         """Get current season's anime with pagination"""
         all_anime = []
@@ -79,11 +94,16 @@ class AnimeAPI:
         
         return all_anime[:limit]
 
-    async def get_top_anime(self, limit: int = 50) -> List[Dict]:
+    async def get_top_anime(self, limit: int = 50, page: int = 1) -> List[Dict]:
         """Get top-rated anime"""
-        response = await self._make_request("top/anime", {"limit": limit})
+        response = await self._make_request("top/anime", {"limit": limit, "page": page})
         return response.get('data', []) if response else []
 
+    async def search_anime(self, query: str) -> Optional[Dict]:
+        """Get the best match for an anime search"""
+        response = await self._make_request("anime", {"q": query, "limit": 1, "order_by": "members", "sort": "desc"})
+        return response['data'][0] if response and response.get('data') else None
+
     async def get_anime_characters(self, anime_id: int, limit: int = 10) -> List[Dict]:
         """Get characters for an anime with limit"""
         response = await self._make_request(f"anime/{anime_id}/characters")
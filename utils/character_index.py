@@ -0,0 +1,135 @@
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+from utils.title_index import TitleIndex, anime_titles, normalize_title
+
+
+class TitleTrie:
+    """Prefix trie over anime titles for autocomplete.
+
+    Titles are inserted best-first, so each node keeps its top completions by
+    appending until full. Past ``depth`` characters the trie stops branching
+    and keeps a bucket of (key, title id) pairs that is filtered on lookup,
+    which keeps the node count bounded on very large caches.
+    """
+
+    __slots__ = ('root', 'titles', 'max_completions', 'depth')
+
+    def __init__(self, max_completions: int = 25, depth: int = 4):
+        self.root = self._node()
+        self.titles: List[str] = []
+        self.max_completions = max_completions
+        self.depth = depth
+
+    @staticmethod
+    def _node():
+        # [children, top title ids, bucket of (key, title id)]
+        return [{}, [], []]
+
+    @classmethod
+    def build(cls, weighted_titles: Dict[str, float], **kwargs) -> 'TitleTrie':
+        """Build a trie from a mapping of title to ranking weight"""
+        trie = cls(**kwargs)
+        for title in sorted(weighted_titles, key=lambda t: -weighted_titles[t]):
+            trie.insert(title)
+        return trie
+
+    def insert(self, title: str) -> None:
+        """Index a title under its full name and under each later word.
+
+        Titles must be inserted in descending order of importance.
+        """
+        title_id = len(self.titles)
+        self.titles.append(title)
+        words = normalize_title(title).split()
+        for start in range(len(words)):
+            self._insert(' '.join(words[start:]), title_id)
+
+    def _insert(self, key: str, title_id: int) -> None:
+        node = self.root
+        self._offer(node, title_id)
+        for char in key[:self.depth]:
+            node = node[0].setdefault(char, self._node())
+            self._offer(node, title_id)
+        if len(key) > self.depth:
+            node[2].append((key, title_id))
+
+    def _offer(self, node, title_id: int) -> None:
+        top = node[1]
+        if len(top) < self.max_completions and title_id not in top:
+            top.append(title_id)
+
+    def complete(self, prefix: str, limit: int = 25) -> List[str]:
+        """Get the best titles starting with a prefix"""
+        prefix = normalize_title(prefix)
+        node = self.root
+        for char in prefix[:self.depth]:
+            node = node[0].get(char)
+            if node is None:
+                return []
+
+        if len(prefix) <= self.depth:
+            title_ids = node[1][:limit]
+        else:
+            # Buckets are in insertion order, so the first hits are the best
+            title_ids = []
+            for key, title_id in node[2]:
+                if key.startswith(prefix) and title_id not in title_ids:
+                    title_ids.append(title_id)
+                    if len(title_ids) >= limit:
+                        break
+        return [self.titles[title_id] for title_id in title_ids]
+
+
+class CharacterIndex:
+    """Inverted index from anime titles to the characters that appear in them"""
+
+    def __init__(self, title_index: TitleIndex):
+        self.title_index = title_index
+        self.by_id: Dict[str, Dict] = {}
+        self.trie = TitleTrie()
+        self._by_title: Dict[str, List[str]] = defaultdict(list)
+        self._by_anime: Dict[object, List[str]] = defaultdict(list)
+        self._display_titles: Dict[object, str] = {}
+
+    @classmethod
+    def build(cls, characters: List[Dict], title_index: TitleIndex) -> 'CharacterIndex':
+        """Build the index from the character dataset"""
+        index = cls(title_index)
+        weights = {}
+        for char in sorted(characters, key=lambda c: c.get('favorites', 0), reverse=True):
+            anime_data = char.get('anime_data')
+            if not anime_data or char.get('id') in index.by_id:
+                continue
+
+            index.by_id[char['id']] = char
+            key = title_index.key_for(anime_data)
+            index._by_anime[key].append(char['id'])
+            index._display_titles.setdefault(key, anime_data['title'])
+            titles = anime_titles(anime_data)
+            for norm in {normalize_title(title) for title in titles}:
+                index._by_title[norm].append(char['id'])
+            for title in titles:
+                weights[title] = max(weights.get(title, 0), anime_data.get('members') or 0)
+
+        index.trie = TitleTrie.build(weights)
+        return index
+
+    def search(self, query: str) -> Tuple[Optional[str], List[Dict]]:
+        """Get the anime title and characters (most favorited first) for a query"""
+        norm = normalize_title(query)
+        char_ids = self._by_title.get(norm)
+        if char_ids:
+            first = self.by_id[char_ids[0]]
+            return first['anime_data']['title'], [self.by_id[char_id] for char_id in char_ids]
+
+        # Fall back to fuzzy title matching, preferring the anime with the most characters
+        keys = [key for key in self.title_index.lookup(query) if key in self._by_anime]
+        if not keys:
+            return None, []
+        key = max(keys, key=lambda k: len(self._by_anime[k]))
+        return self._display_titles[key], [self.by_id[char_id] for char_id in self._by_anime[key]]
+
+    def complete(self, prefix: str, limit: int = 25) -> List[str]:
+        """Get anime titles for autocomplete"""
+        return self.trie.complete(prefix, limit)
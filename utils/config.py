@@ -7,6 +7,84 @@ class Config:
     CHAR_COMMAND = "c"
     CHAR_END_COMMAND = "c_end"
     CHAR_LIST_COMMAND = "clist"
+    CHAR_LIST_PAGE_SIZE = 10
+    
+    # Guess processing
+    GUESS_QUEUE_SIZE = 25  # Pending guesses per channel before backpressure
+    GUESS_QUEUE_TIMEOUT = 2.0  # Seconds to wait for room before dropping a guess
+    GAME_EDITS_PER_SECOND = 1.0  # Throttle for guess-counter edits on game messages
+    WRONG_GUESS_DELETE_DELAY = 3  # Seconds before a wrong guess is cleaned up
+    DELETE_QUEUE_INTERVAL = 1.5  # Seconds between batched delete sweeps
+    
+    # Game lifetime
+    GAME_IDLE_TIMEOUT = 15 * 60  # Seconds without activity before a game is ended
+    GAME_SWEEP_INTERVAL = 60  # Seconds between idle game sweeps
+    GAME_HISTORY_LIMIT = 25  # Characters kept for the game summary
+    
+    # Round prefetching
+    IMAGE_WARM_TIMEOUT = 5  # Seconds to spend warming the next round's image
+    TRANSITION_SAMPLES = 100  # Anime info source and page parse timings kept for reporting
+    
+    # Anime info result cache
+    RESULT_CACHE_SIZE = 500  # Results kept before the least recently used is evicted
+    RESULT_CACHE_TTLS = {  # Seconds before a cached result is refreshed in the background
+        'anime': 24 * 60 * 60,
+        'random_anime': 6 * 60 * 60,  # Top list pages the pick is drawn from
+    }
+    
+    MAL_PARSE_WORKERS = 1  # Processes used to parse scraped myanimelist.net pages
+    
+    CHARACTER_HINT_LIMIT = 4  # Hints per character before the name's first letter
+    
+    # Seasonal snapshot, rebuilt in the background and served from memory
+    SEASONAL_REFRESH_HOURS = 6  # Hours between snapshot rebuilds
+    SEASONAL_MAX_PAGES = 10  # Jikan pages fetched per listing (25 anime each)
+    
+    # YouTube opening videos, resolved during the crawl
+    YOUTUBE_DAILY_QUOTA = 10000  # API units per day (the default project quota)
+    YOUTUBE_SEARCH_COST = 100  # Units spent by one search request
+    
+    # Shared HTTP sessions: connection limits and total timeout per profile
+    HTTP_PROFILES = {
+        'default': {'limit': 50, 'limit_per_host': 10, 'timeout': 15},
+        'images': {'limit': 50, 'limit_per_host': 20, 'timeout': 10},  # Character image CDN
+        'jikan': {'limit': 6, 'limit_per_host': 3, 'timeout': 20},  # Jikan is rate limited anyway
+        'mal': {'limit': 4, 'limit_per_host': 2, 'timeout': 15},  # Scraping fallback only
+    }
+    HTTP_CONNECT_TIMEOUT = 5  # Seconds to open a connection
+    HTTP_DNS_CACHE_TTL = 300  # Seconds to reuse DNS answers
+    HTTP_KEEPALIVE_TIMEOUT = 30  # Seconds idle connections stay open
+    HTTP_USER_AGENT = "AniGuessr Discord Bot"
+    
+    # Prometheus metrics endpoint (opt-in); cluster processes add their id to the port
+    METRICS_ENABLED = False
+    METRICS_HOST = "127.0.0.1"
+    METRICS_PORT = 9108
+    
+    # Event loop watchdog and ;profile (owner only)
+    WATCHDOG_ENABLED = True
+    WATCHDOG_INTERVAL = 0.25  # Seconds between event loop heartbeats
+    WATCHDOG_THRESHOLD = 0.5  # Seconds the loop may be blocked before its stack is captured
+    WATCHDOG_HISTORY = 20  # Captured stalls kept for ;stalls
+    PROFILE_INTERVAL = 0.005  # Seconds between profiler samples
+    PROFILE_MAX_SECONDS = 120  # Longest ;profile run
+    
+    # Gateway cache profile: "full" caches everything, "lean" keeps only what the games use.
+    # Set GATEWAY_PROFILE=lean in the environment to opt in.
+    GATEWAY_PROFILE = "full"
+    MESSAGE_CACHE_SIZE = 250  # Messages kept in memory under the lean profile
+    
+    # Cluster mode (cluster.py)
+    CLUSTER_COUNT = 2  # Worker processes, each running a range of shards
+    CLUSTER_RESTART_DELAY = 5  # Seconds before a crashed worker is restarted
+    
+    # Progressive reveal mode
+    REVEAL_MODE = "pixelate"  # pixelate, blur or crop
+    REVEAL_LEVELS = 4  # Obscured steps before the full image is shown
+    REVEAL_GUESSES_PER_LEVEL = 2  # Wrong guesses that reveal one more step
+    REVEAL_PRERENDER_AHEAD = 2  # Levels rendered ahead of the current one
+    REVEAL_WORKERS = 2  # Processes used for image rendering
+    REVEAL_CACHE_BYTES = 64 * 1024 * 1024  # Budget for downloaded and rendered images
     
     # Navigation emojis
     NUMBERS = ["1️⃣", "2️⃣", "3️⃣", "4️⃣", "5️⃣"]
@@ -30,6 +108,8 @@ class Config:
             f"`{cls.CHAR_COMMAND}` - Start a character guessing game\n"
             f"`{cls.CHAR_END_COMMAND}` - End the current game\n"
             f"`{cls.CHAR_LIST_COMMAND} <anime>` - List characters from an anime\n"
+            f"`{cls.CHAR_COMMAND} [difficulty] reveal` - Start a game where the image is revealed gradually\n"
+            "`hint` - Get a hint for the current character\n"
             "`help` - Show this help message"
         )
     
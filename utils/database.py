@@ -1,9 +1,16 @@
 import json
 import os
 from utils.jikan_api import JikanAPI
+from utils.title_index import TitleIndex
+from utils.character_index import CharacterIndex
+from utils.stats_store import StatsStore
+from utils.seasonal import SNAPSHOT_KINDS, build_seasonal_snapshot
+from utils.metrics import DATASET_ITEMS, DATASET_LOAD_SECONDS
 import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 import random
+import time
 from pathlib import Path
 from typing import Dict, List, Optional, Any
 
@@ -17,7 +24,15 @@ class AnimeDatabase:
         self.initialized = False
         self.characters = []
         self.openings = []
-        self.user_stats = {}
+        self._stats_store = None  # Opened on first use, after any cluster fork
+        self._stats_thread = ThreadPoolExecutor(max_workers=1, thread_name_prefix='stats')  # Runs every stats query
+        self.title_index = TitleIndex()
+        self.character_index = CharacterIndex(self.title_index)
+        self._openings_by_id = {}
+        self._character_buckets = {}
+        self._all_character_ids = []
+        self._anime_by_key = {}
+        self.seasonal = {}  # Seasonal snapshot, rebuilt by the seasonal job
         self.last_cache_update = None
         self.cache_duration = timedelta(days=7)
         self._lock = asyncio.Lock()  # Add a lock for thread safety
@@ -43,16 +58,8 @@ class AnimeDatabase:
             with open(opening_file, 'r', encoding='utf-8') as f:
                 self.openings = json.load(f)
                 print(f"Loaded {len(self.openings)} openings from cache")
-        
-        # Load user stats
-        stats_file = self.stats_dir / "user_stats.json"
-        if stats_file.exists():
-            with open(stats_file, 'r', encoding='utf-8') as f:
-                self.user_stats = json.load(f)
-                print("Loaded user stats from cache")
-        else:
-            self.user_stats = {}
-            self.save_user_stats()
+        self.build_indexes()
+        self.load_seasonal()
 
         # Load last update time
         timestamp_file = self.cache_dir / "last_update.txt"
@@ -61,16 +68,82 @@ class AnimeDatabase:
                 self.last_cache_update = datetime.fromisoformat(f.read().strip())
                 print(f"Last cache update: {self.last_cache_update}")
 
-    def save_user_stats(self) -> None:
-        """Save user stats to file."""
-        stats_file = self.stats_dir / "user_stats.json"
-        with open(stats_file, 'w', encoding='utf-8') as f:
-            json.dump(self.user_stats, f, ensure_ascii=False, indent=2)
+    def build_indexes(self) -> None:
+        """Rebuild the lookup indexes over the loaded characters and openings"""
+        DATASET_ITEMS.set(len(self.characters), 'characters')
+        DATASET_ITEMS.set(len(self.openings), 'openings')
+        for opening in self.openings:
+            anime_data = opening.setdefault('anime_data', {'title': opening.get('anime')})
+            # Older caches only carry the anime id inside the opening id
+            if not anime_data.get('mal_id'):
+                anime_id = str(opening.get('id', '')).split('_', 1)[0]
+                if anime_id.isdigit():
+                    anime_data['mal_id'] = int(anime_id)
+
+        self._openings_by_id = {opening['id']: opening for opening in self.openings}
+        self.title_index = TitleIndex.build(
+            [char['anime_data'] for char in self.characters if char.get('anime_data')] +
+            [opening['anime_data'] for opening in self.openings]
+        )
+        self.character_index = CharacterIndex.build(self.characters, self.title_index)
+
+        # One anime_data record per anime, for anime info lookups
+        self._anime_by_key = {}
+        for anime_data in [char['anime_data'] for char in self.characters if char.get('anime_data')] + \
+                          [opening['anime_data'] for opening in self.openings]:
+            key = self.title_index.key_for(anime_data)
+            known = self._anime_by_key.get(key)
+            if known is None or len(anime_data) > len(known):
+                self._anime_by_key[key] = anime_data
+
+        # Character ids per difficulty, shared by every game's shuffled deck
+        self._all_character_ids = list(self.character_index.by_id)
+        self._character_buckets = {}
+        for char_id, char in self.character_index.by_id.items():
+            difficulty = (char.get('difficulty') or '').lower()
+            self._character_buckets.setdefault(difficulty, []).append(char_id)
+        print(f"Indexed {len(self.title_index)} anime titles and {len(self.character_index.by_id)} characters")
+
+    @property
+    def stats_store(self) -> StatsStore:
+        """Get the stats store shared by every bot process."""
+        if self._stats_store is None:
+            self._stats_store = StatsStore(
+                self.stats_dir / "stats.db",
+                legacy_json=self.stats_dir / "user_stats.json"
+            )
+        return self._stats_store
 
     def get_random_character(self) -> Optional[Dict[str, Any]]:
         """Get a random character from the cached data."""
         return random.choice(self.characters) if self.characters else None
 
+    def character_bucket(self, difficulty: str = None) -> List[str]:
+        """Get the ids of every character of a difficulty, or of all characters."""
+        if not difficulty:
+            return self._all_character_ids
+        return self._character_buckets.get(difficulty.lower(), [])
+
+    def get_character_by_id(self, char_id: str) -> Optional[Dict[str, Any]]:
+        """Get a character by id."""
+        return self.character_index.by_id.get(char_id)
+
+    def get_opening(self, opening_id: str) -> Optional[Dict[str, Any]]:
+        """Get an opening by id."""
+        return self._openings_by_id.get(opening_id)
+
+    def find_anime(self, query: str) -> Optional[Dict[str, Any]]:
+        """Get the anime a query names, preferring the most popular match."""
+        keys = [key for key in self.title_index.lookup(query) if key in self._anime_by_key]
+        if not keys:
+            return None
+        return max((self._anime_by_key[key] for key in keys), key=lambda a: a.get('members') or 0)
+
+    def get_random_anime(self, min_score: float = 0) -> Optional[Dict[str, Any]]:
+        """Get a random anime from the dataset."""
+        anime = [a for a in self._anime_by_key.values() if (a.get('score') or 0) >= min_score]
+        return random.choice(anime) if anime else None
+
     def get_random_opening(self, difficulty: str = None) -> Optional[Dict[str, Any]]:
         """Get a random opening from the cached data."""
         if not self.openings:
@@ -81,27 +154,69 @@ class AnimeDatabase:
             return random.choice(filtered_openings) if filtered_openings else None
         return random.choice(self.openings)
 
-    def update_user_stats(self, user_id: str, game_type: str, correct: bool) -> None:
+    async def _run_stats(self, method: str, *args):
+        """Run a stats store call on the stats thread.
+
+        SQLite can wait up to 10 seconds for another process's write lock,
+        which must not stall the event loop. A single thread keeps the
+        connection on the thread that opened it and the queries in order.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._stats_thread, lambda: getattr(self.stats_store, method)(*args))
+
+    async def update_user_stats(self, user_id: str, game_type: str, correct: bool) -> None:
         """Update user statistics."""
-        if user_id not in self.user_stats:
-            self.user_stats[user_id] = {
-                "character_games": {"wins": 0, "total": 0},
-                "opening_games": {"wins": 0, "total": 0}
-            }
-        
-        stats = self.user_stats[user_id][f"{game_type}_games"]
-        stats["total"] += 1
-        if correct:
-            stats["wins"] += 1
-        
-        self.save_user_stats()
+        await self._run_stats('record', user_id, game_type, correct)
 
-    def get_user_stats(self, user_id: str) -> Dict[str, Any]:
+    async def get_user_stats(self, user_id: str) -> Dict[str, Any]:
         """Get user statistics."""
-        return self.user_stats.get(user_id, {
-            "character_games": {"wins": 0, "total": 0},
-            "opening_games": {"wins": 0, "total": 0}
-        })
+        return await self._run_stats('get', user_id)
+
+    async def get_leaderboard(self, kind: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """Get the top players of 'characters' or 'openings'."""
+        return await self._run_stats('leaderboard', kind.rstrip('s'), limit)
+
+    async def close_stats(self) -> None:
+        """Close the stats store once its pending queries are done"""
+        if self._stats_store is not None:
+            await self._run_stats('close')
+        self._stats_thread.shutdown(wait=False)
+
+    def load_seasonal(self) -> None:
+        """Load the seasonal snapshot saved by the last rebuild"""
+        seasonal_file = self.cache_dir / "seasonal.json"
+        if seasonal_file.exists():
+            with open(seasonal_file, 'r', encoding='utf-8') as f:
+                self.seasonal = json.load(f)
+
+    def seasonal_age(self) -> Optional[timedelta]:
+        """Get how old the seasonal snapshot is, or None without one"""
+        if not self.seasonal.get('built_at'):
+            return None
+        return datetime.now() - datetime.fromisoformat(self.seasonal['built_at'])
+
+    def get_seasonal_anime(self, kind: str = 'current') -> List[Dict[str, Any]]:
+        """Get the anime of a snapshot listing, most popular first"""
+        return self.seasonal.get(kind, {}).get('anime', [])
+
+    async def refresh_seasonal(self, max_pages: int = 10) -> bool:
+        """Rebuild the seasonal snapshot from Jikan and save it"""
+        snapshot = await build_seasonal_snapshot(self.api, max_pages)
+        if not any(snapshot[kind]['anime'] for kind in SNAPSHOT_KINDS):
+            print("Seasonal snapshot came back empty; keeping the previous one")
+            return False
+
+        # Write then rename, so other processes never read a partial file
+        seasonal_file = self.cache_dir / "seasonal.json"
+        temp_file = seasonal_file.with_suffix('.tmp')
+        with open(temp_file, 'w', encoding='utf-8') as f:
+            json.dump(snapshot, f, ensure_ascii=False)
+        os.replace(temp_file, seasonal_file)
+        self.seasonal = snapshot
+        print("Seasonal snapshot rebuilt: " + ", ".join(
+            f"{len(snapshot[kind]['anime'])} {kind}" for kind in SNAPSHOT_KINDS
+        ))
+        return True
 
     def needs_update(self) -> bool:
         """Check if the cache needs to be updated."""
@@ -115,6 +230,7 @@ class AnimeDatabase:
         """Load data from cache files"""
         try:
             print("Loading character cache...")
+            started = time.perf_counter()
             cache_file = self.cache_dir / "characters.json"
             
             if not cache_file.exists():
@@ -124,7 +240,16 @@ class AnimeDatabase:
             with open(cache_file, 'r', encoding='utf-8') as f:
                 self.characters = json.load(f)
                 print(f"Loaded {len(self.characters)} characters from cache")
-                
+
+            opening_file = self.cache_dir / "openings.json"
+            if opening_file.exists():
+                with open(opening_file, 'r', encoding='utf-8') as f:
+                    self.openings = json.load(f)
+                    print(f"Loaded {len(self.openings)} openings from cache")
+
+            self.build_indexes()
+            self.load_seasonal()
+            DATASET_LOAD_SECONDS.set(time.perf_counter() - started)
             return True
             
         except Exception as e:
@@ -161,6 +286,7 @@ class AnimeDatabase:
             self.characters = characters
             self.openings = openings
             self.last_cache_update = datetime.now()
+            self.build_indexes()
             
             # Save updated data
             self.save_data()
@@ -0,0 +1,64 @@
+import hashlib
+import random
+from typing import Dict, Optional
+
+
+class ShuffledDeck:
+    """Lazily shuffled deck of indices into a list of ``size`` items.
+
+    Draws run a Fisher-Yates shuffle one step at a time. Only positions that
+    have been displaced are remembered, so each draw is O(1) time and adds
+    at most one entry, and no copy of the deck is made. The swap target for
+    each position is derived from the seed, so a deck can be snapshotted as
+    (seed, position, swaps) and resumed exactly.
+    """
+
+    __slots__ = ('size', 'seed', 'position', '_swaps')
+
+    def __init__(self, size: int, seed: Optional[int] = None, position: int = 0,
+                 swaps: Optional[Dict[int, int]] = None):
+        self.size = size
+        self.seed = random.getrandbits(63) if seed is None else seed
+        self.position = position
+        self._swaps: Dict[int, int] = swaps or {}
+
+    @property
+    def remaining(self) -> int:
+        return self.size - self.position
+
+    def reset(self, size: int) -> None:
+        """Start a fresh shuffle, e.g. once every item has been drawn"""
+        self.__init__(size)
+
+    def _target(self, position: int) -> int:
+        digest = hashlib.blake2b(f"{self.seed}:{position}".encode(), digest_size=8).digest()
+        return position + int.from_bytes(digest, 'big') % (self.size - position)
+
+    def draw(self) -> Optional[int]:
+        """Draw the next index, or None once the deck is exhausted"""
+        i = self.position
+        if i >= self.size:
+            return None
+        j = self._target(i)
+        drawn = self._swaps.get(j, j)
+        if j != i:
+            self._swaps[j] = self._swaps.get(i, i)
+        # Position i is never read again
+        self._swaps.pop(i, None)
+        self.position += 1
+        return drawn
+
+    def to_snapshot(self) -> Dict:
+        """Get a JSON-safe snapshot of the deck"""
+        return {
+            'size': self.size,
+            'seed': self.seed,
+            'position': self.position,
+            'swaps': [[k, v] for k, v in self._swaps.items()],
+        }
+
+    @classmethod
+    def from_snapshot(cls, data: Dict) -> 'ShuffledDeck':
+        """Rebuild a deck from a snapshot"""
+        swaps = {k: v for k, v in data.get('swaps', [])}
+        return cls(data['size'], seed=data['seed'], position=data['position'], swaps=swaps)
@@ -0,0 +1,94 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+import discord
+
+# Discord refuses bulk deletes for messages older than 14 days; keep a margin
+BULK_DELETE_MAX_AGE = timedelta(days=14) - timedelta(minutes=5)
+BULK_DELETE_MAX_COUNT = 100
+
+
+class DeleteQueue:
+    """Batches message deletions per channel into bulk delete calls.
+
+    Messages are queued with a delay and swept on a short cadence. Messages
+    that are due in the same channel go out in one ``delete_messages`` call.
+    Single messages, old messages and channels without bulk delete fall back
+    to one delete each.
+    """
+
+    def __init__(self, interval: float = 1.5):
+        self.interval = interval
+        self.bulk_calls = 0
+        self.single_calls = 0
+        self._pending: Dict[int, List[Tuple[float, discord.Message]]] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def add(self, message: discord.Message, delay: float = 0) -> None:
+        """Queue a message for deletion after a delay"""
+        due = asyncio.get_running_loop().time() + delay
+        self._pending.setdefault(message.channel.id, []).append((due, message))
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    def depth(self, channel_id: int = None) -> int:
+        """Get the number of queued messages in a channel, or overall"""
+        if channel_id is not None:
+            return len(self._pending.get(channel_id, ()))
+        return sum(len(messages) for messages in self._pending.values())
+
+    def close(self) -> None:
+        """Stop sweeping and discard queued deletes; those messages stay in the channel"""
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        self._pending.clear()
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while self._pending:
+            await asyncio.sleep(self.interval)
+            now = loop.time()
+            for channel_id in list(self._pending):
+                queued = self._pending[channel_id]
+                due = [message for when, message in queued if when <= now]
+                if not due:
+                    continue
+                remaining = [(when, message) for when, message in queued if when > now]
+                if remaining:
+                    self._pending[channel_id] = remaining
+                else:
+                    del self._pending[channel_id]
+                try:
+                    await self._delete(due)
+                except Exception as e:
+                    print(f"Error deleting messages in channel {channel_id}: {e}")
+
+    async def _delete(self, messages: List[discord.Message]) -> None:
+        channel = messages[0].channel
+        cutoff = datetime.now(timezone.utc) - BULK_DELETE_MAX_AGE
+        recent = [message for message in messages if message.created_at > cutoff]
+        single = [message for message in messages if message.created_at <= cutoff]
+
+        if hasattr(channel, 'delete_messages'):
+            for start in range(0, len(recent), BULK_DELETE_MAX_COUNT):
+                batch = recent[start:start + BULK_DELETE_MAX_COUNT]
+                if len(batch) == 1:
+                    single.extend(batch)
+                    continue
+                try:
+                    await channel.delete_messages(batch)
+                    self.bulk_calls += 1
+                except discord.HTTPException as e:
+                    print(f"Bulk delete failed in channel {channel.id}, deleting one by one: {e}")
+                    single.extend(batch)
+        else:
+            single.extend(recent)
+
+        for message in single:
+            try:
+                await message.delete()
+                self.single_calls += 1
+            except discord.HTTPException:
+                pass
@@ -0,0 +1,102 @@
+import asyncio
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+import discord
+
+
+class EditScheduler:
+    """Coalesces and throttles edits to long-lived game messages.
+
+    Only the latest pending state of each message is kept, and at most
+    ``rate`` edits per second go out for it. Important state changes (a new
+    character, the game ending) are flushed immediately instead.
+    """
+
+    def __init__(self, rate: float = 1.0):
+        self.min_interval = 1 / rate
+        self.coalesced = 0  # Edits superseded before they were sent
+        self._pending: Dict[int, Tuple[int, discord.Message, Dict]] = {}
+        self._versions: Dict[int, int] = {}  # Latest state handed to us
+        self._sent: Dict[int, int] = {}      # Latest state sent to Discord
+        self._last_edit: Dict[int, float] = {}
+        self._locks: Dict[int, asyncio.Lock] = {}
+        self._tasks: Dict[int, asyncio.Task] = {}
+
+    def schedule(self, message: Optional[discord.Message], **fields) -> None:
+        """Queue an edit, replacing any edit still waiting for this message"""
+        if message is None:
+            return
+        if message.id in self._pending:
+            self.coalesced += 1
+        self._pending[message.id] = (self._next_version(message.id), message, fields)
+        if message.id not in self._tasks:
+            self._tasks[message.id] = asyncio.create_task(self._drain(message.id))
+
+    async def flush(self, message: Optional[discord.Message], **fields) -> None:
+        """Edit a message right away, superseding anything pending"""
+        if message is None:
+            return
+        if self._pending.pop(message.id, None):
+            self.coalesced += 1
+        await self._edit(self._next_version(message.id), message, fields)
+
+    async def respond(self, message_id: int, edit: Callable[[], Awaitable]) -> None:
+        """Apply an edit made another way, such as an interaction response,
+        superseding anything pending for the message"""
+        if self._pending.pop(message_id, None):
+            self.coalesced += 1
+        await self._apply(self._next_version(message_id), message_id, edit)
+
+    def discard(self, message_id: int) -> None:
+        """Forget a message once its game is over"""
+        self._pending.pop(message_id, None)
+        self._versions.pop(message_id, None)
+        self._sent.pop(message_id, None)
+        self._last_edit.pop(message_id, None)
+        self._locks.pop(message_id, None)
+        task = self._tasks.pop(message_id, None)
+        if task and task is not asyncio.current_task():
+            task.cancel()
+
+    def close(self) -> None:
+        """Drop every pending edit"""
+        for message_id in list(self._tasks):
+            self.discard(message_id)
+
+    async def _drain(self, message_id: int) -> None:
+        loop = asyncio.get_running_loop()
+        try:
+            while message_id in self._pending:
+                wait = self._last_edit.get(message_id, 0) + self.min_interval - loop.time()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                item = self._pending.pop(message_id, None)
+                if item is None:
+                    break
+                await self._edit(*item)
+        finally:
+            if self._tasks.get(message_id) is asyncio.current_task():
+                del self._tasks[message_id]
+
+    def _next_version(self, message_id: int) -> int:
+        version = self._versions.get(message_id, 0) + 1
+        self._versions[message_id] = version
+        return version
+
+    async def _edit(self, version: int, message: discord.Message, fields: Dict) -> None:
+        await self._apply(version, message.id, lambda: message.edit(**fields))
+
+    async def _apply(self, version: int, message_id: int, edit: Callable[[], Awaitable]) -> None:
+        lock = self._locks.setdefault(message_id, asyncio.Lock())
+        async with lock:
+            # A newer state may have been flushed while we waited for the lock
+            if version <= self._sent.get(message_id, 0):
+                self.coalesced += 1
+                return
+            self._sent[message_id] = version
+            try:
+                await edit()
+            except discord.HTTPException as e:
+                print(f"Error editing message {message_id}: {e}")
+            finally:
+                self._last_edit[message_id] = asyncio.get_running_loop().time()
@@ -4,6 +4,7 @@ async def format_anime_data(self, anime):
         'mal_id': anime.get('mal_id'),
         'title': anime.get('title'),
         'english_title': anime.get('title_english'),  # Add English title
+        'title_synonyms': anime.get('title_synonyms') or [],
         'images': anime.get('images', {}),
         'score': anime.get('score'),
         'popularity': anime.get('popularity'),
@@ -20,6 +21,7 @@ async def format_character_data(self, character, anime):
     anime_data = {
         'title': anime['title'],
         'english_title': anime.get('title_english'),  # Add English title
+        'title_synonyms': anime.get('title_synonyms') or [],
         'popularity': anime.get('popularity'),
         'members': anime.get('members'),
         'score': anime.get('score'),
@@ -0,0 +1,37 @@
+from collections import Counter
+from typing import Dict, Optional
+
+from discord.ext import commands
+
+
+class GameRegistry:
+    """Maps each channel with a game to the cog running it.
+
+    The bot routes every non-command message through here to the owning
+    cog's ``route_message``, so a channel without a game costs one dict
+    lookup. A channel holds one game at a time, whichever cog it belongs to.
+    """
+
+    def __init__(self):
+        self._owners: Dict[int, commands.Cog] = {}
+
+    def get(self, channel_id: int) -> Optional[commands.Cog]:
+        """Get the cog running a game in a channel"""
+        return self._owners.get(channel_id)
+
+    def claim(self, channel_id: int, owner: commands.Cog) -> bool:
+        """Register a game, unless another cog already runs one in the channel"""
+        current = self._owners.setdefault(channel_id, owner)
+        return current is owner
+
+    def release(self, channel_id: int, owner: commands.Cog) -> None:
+        """Remove a game, if it still belongs to ``owner``"""
+        if self._owners.get(channel_id) is owner:
+            del self._owners[channel_id]
+
+    def counts(self) -> Counter:
+        """Count games by the name of the cog running them"""
+        return Counter(owner.qualified_name for owner in self._owners.values())
+
+    def __len__(self) -> int:
+        return len(self._owners)
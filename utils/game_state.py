@@ -0,0 +1,181 @@
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional
+
+from utils.deck import ShuffledDeck
+
+
+class HistoryEntry:
+    """One character played in a game"""
+
+    __slots__ = ('character_id', 'solved', 'guesses_taken')
+
+    def __init__(self, character_id: str, solved: bool, guesses_taken: int = 0):
+        self.character_id = character_id
+        self.solved = solved
+        self.guesses_taken = guesses_taken
+
+
+class CharacterGame:
+    """State of a character guessing game in one channel.
+
+    Only ids are kept: characters are looked up in the dataset and messages
+    are rebuilt as partial messages when needed. History is capped, with
+    running totals kept separately so the final score stays exact.
+    """
+
+    __slots__ = (
+        'channel_id', 'guild_id', 'started_by', 'message_id', 'character_id',
+        'deck', 'difficulty', 'reveal', 'guesses', 'hints_used', 'round', 'ended', 'last_activity', 'history',
+        'correct_guess_ids', 'rounds_played', 'rounds_solved', 'total_guesses',
+    )
+
+    def __init__(self, channel_id: int, started_by: int, character_id: str,
+                 deck: ShuffledDeck, difficulty: Optional[str] = None,
+                 guild_id: Optional[int] = None, history_limit: int = 25,
+                 reveal: bool = False):
+        self.channel_id = channel_id
+        self.guild_id = guild_id
+        self.started_by = started_by
+        self.message_id: Optional[int] = None
+        self.character_id = character_id
+        self.deck = deck
+        self.difficulty = difficulty
+        self.reveal = reveal  # Progressive image reveal mode
+        self.guesses = 0
+        self.hints_used = 0
+        self.round = 0
+        self.ended = False
+        self.last_activity = time.monotonic()
+        self.history: Deque[HistoryEntry] = deque(maxlen=history_limit)
+        self.correct_guess_ids: List[int] = []
+        self.rounds_played = 0
+        self.rounds_solved = 0
+        self.total_guesses = 0
+
+    def touch(self) -> None:
+        """Mark the game as active now"""
+        self.last_activity = time.monotonic()
+
+    def idle_for(self, now: float = None) -> float:
+        """Get the seconds since the game last saw activity"""
+        return (now or time.monotonic()) - self.last_activity
+
+    def record_round(self, solved: bool) -> None:
+        """Add the current character to the history"""
+        guesses_taken = self.guesses if solved else 0
+        self.history.append(HistoryEntry(self.character_id, solved, guesses_taken))
+        self.rounds_played += 1
+        if solved:
+            self.rounds_solved += 1
+            self.total_guesses += guesses_taken or 1
+        else:
+            self.total_guesses += 1
+
+    def advance(self, character_id: str) -> None:
+        """Move on to a new character"""
+        self.character_id = character_id
+        self.guesses = 0
+        self.hints_used = 0
+        self.round += 1
+        self.touch()
+
+    def to_snapshot(self) -> Dict:
+        """Get a JSON-safe snapshot of the game"""
+        return {
+            'channel_id': self.channel_id,
+            'guild_id': self.guild_id,
+            'started_by': self.started_by,
+            'message_id': self.message_id,
+            'character_id': self.character_id,
+            'deck': self.deck.to_snapshot(),
+            'difficulty': self.difficulty,
+            'reveal': self.reveal,
+            'guesses': self.guesses,
+            'hints_used': self.hints_used,
+            'round': self.round,
+            'history': [[e.character_id, e.solved, e.guesses_taken] for e in self.history],
+            'correct_guess_ids': self.correct_guess_ids,
+            'rounds_played': self.rounds_played,
+            'rounds_solved': self.rounds_solved,
+            'total_guesses': self.total_guesses,
+        }
+
+    @classmethod
+    def from_snapshot(cls, data: Dict, history_limit: int = 25) -> 'CharacterGame':
+        """Rebuild a game from a snapshot"""
+        game = cls(
+            data['channel_id'],
+            data['started_by'],
+            data['character_id'],
+            ShuffledDeck.from_snapshot(data['deck']) if data.get('deck') else ShuffledDeck(0),
+            difficulty=data.get('difficulty'),
+            guild_id=data.get('guild_id'),
+            history_limit=history_limit,
+            reveal=data.get('reveal', False)
+        )
+        game.message_id = data.get('message_id')
+        game.guesses = data.get('guesses', 0)
+        game.hints_used = data.get('hints_used', 0)
+        game.round = data.get('round', 0)
+        game.history.extend(HistoryEntry(*entry) for entry in data.get('history', []))
+        game.correct_guess_ids = list(data.get('correct_guess_ids', []))
+        game.rounds_played = data.get('rounds_played', len(game.history))
+        game.rounds_solved = data.get('rounds_solved', 0)
+        game.total_guesses = data.get('total_guesses', 0)
+        return game
+
+
+class OpeningGame:
+    """State of an opening guessing game in one channel"""
+
+    __slots__ = (
+        'channel_id', 'guild_id', 'started_by', 'opening_id', 'answer_id',
+        'round', 'hints_used', 'guesses', 'last_activity',
+    )
+
+    def __init__(self, channel_id: int, started_by: int, opening_id: str, answer_id,
+                 round_id: int, guild_id: Optional[int] = None):
+        self.channel_id = channel_id
+        self.guild_id = guild_id
+        self.started_by = started_by
+        self.opening_id = opening_id
+        self.answer_id = answer_id
+        self.round = round_id
+        self.hints_used = 0
+        self.guesses = 0
+        self.last_activity = time.monotonic()
+
+    def touch(self) -> None:
+        """Mark the game as active now"""
+        self.last_activity = time.monotonic()
+
+    def idle_for(self, now: float = None) -> float:
+        """Get the seconds since the game last saw activity"""
+        return (now or time.monotonic()) - self.last_activity
+
+    def to_snapshot(self) -> Dict:
+        """Get a JSON-safe snapshot of the game"""
+        return {
+            'channel_id': self.channel_id,
+            'guild_id': self.guild_id,
+            'started_by': self.started_by,
+            'opening_id': self.opening_id,
+            'hints_used': self.hints_used,
+            'guesses': self.guesses,
+        }
+
+    @classmethod
+    def from_snapshot(cls, data: Dict, answer_id, round_id: int) -> 'OpeningGame':
+        """Rebuild a game from a snapshot"""
+        game = cls(
+            data['channel_id'],
+            data['started_by'],
+            data['opening_id'],
+            answer_id,
+            round_id,
+            guild_id=data.get('guild_id')
+        )
+        game.hints_used = data.get('hints_used', 0)
+        game.guesses = data.get('guesses', 0)
+        return game
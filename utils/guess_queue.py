@@ -0,0 +1,89 @@
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+from utils.metrics import GUESS_SECONDS
+
+GuessHandler = Callable[[int, Hashable, Any], Awaitable[None]]
+
+
+class GuessQueue:
+    """Feeds each channel's guesses to a single consumer task, in order.
+
+    Every active game gets a bounded queue. Guesses are tagged with the round
+    they were made against so the handler can discard stale ones once the
+    round has moved on. When a channel floods, submitters wait briefly for
+    room and the guess is dropped if none frees up.
+    """
+
+    def __init__(self, handler: GuessHandler, maxsize: int = 25, put_timeout: float = 2.0,
+                 name: str = 'game'):
+        self.handler = handler
+        self.name = name  # Label for the guess latency metric
+        self.maxsize = maxsize
+        self.put_timeout = put_timeout
+        self.dropped = 0
+        self._queues: Dict[int, asyncio.Queue] = {}
+        self._consumers: Dict[int, asyncio.Task] = {}
+
+    def start(self, channel_id: int) -> None:
+        """Start the consumer for a channel if it isn't running"""
+        if channel_id in self._queues:
+            return
+        queue = asyncio.Queue(maxsize=self.maxsize)
+        self._queues[channel_id] = queue
+        self._consumers[channel_id] = asyncio.create_task(self._consume(channel_id, queue))
+
+    def stop(self, channel_id: int) -> None:
+        """Stop a channel's consumer once its current guess is handled"""
+        queue = self._queues.pop(channel_id, None)
+        self._consumers.pop(channel_id, None)
+        if queue is None:
+            return
+        # Anything still queued was made against a finished game
+        while not queue.empty():
+            queue.get_nowait()
+        queue.put_nowait(None)
+
+    def close(self) -> None:
+        """Stop every consumer"""
+        for channel_id in list(self._queues):
+            self.stop(channel_id)
+
+    def depth(self, channel_id: int = None) -> int:
+        """Get the number of guesses waiting in a channel, or overall"""
+        if channel_id is None:
+            return sum(queue.qsize() for queue in self._queues.values())
+        queue = self._queues.get(channel_id)
+        return queue.qsize() if queue else 0
+
+    async def submit(self, channel_id: int, round_id: Hashable, message) -> bool:
+        """Queue a guess, waiting briefly for room when the channel is flooded"""
+        queue = self._queues.get(channel_id)
+        if queue is None:
+            return False
+
+        item = (round_id, message)
+        try:
+            queue.put_nowait(item)
+        except asyncio.QueueFull:
+            try:
+                await asyncio.wait_for(queue.put(item), timeout=self.put_timeout)
+            except asyncio.TimeoutError:
+                self.dropped += 1
+                print(f"Guess queue full in channel {channel_id}, dropped guess ({self.dropped} total)")
+                return False
+        return True
+
+    async def _consume(self, channel_id: int, queue: asyncio.Queue) -> None:
+        while True:
+            item = await queue.get()
+            if item is None:
+                return
+            round_id, message = item
+            started = time.perf_counter()
+            try:
+                await self.handler(channel_id, round_id, message)
+            except Exception as e:
+                print(f"Error handling guess in channel {channel_id}: {e}")
+            GUESS_SECONDS.observe(time.perf_counter() - started, self.name)
@@ -0,0 +1,107 @@
+import json
+import re
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+
+REDACTED = "???"
+ABOUT_LIMIT = 1500  # Characters of the biography kept in the raw store
+STAT_FIELDS = ('age', 'birthday', 'height', 'affiliation', 'occupation')
+_STAT_LINE = re.compile(r'^\s*([A-Za-z ]{2,20}):\s*(.+?)\s*$', re.M)
+_SOURCE_NOTE = re.compile(r'\((?:source|from)[^)]*\)', re.I)
+_SENTENCE_END = re.compile(r'(?<=[.!?])\s+')
+
+
+def compact_details(details: Dict, role: Optional[str] = None) -> Dict:
+    """Keep only what hints are built from, out of a ``characters/{id}/full`` response"""
+    return {
+        'name': details.get('name') or '',
+        'name_kanji': details.get('name_kanji') or '',
+        'nicknames': details.get('nicknames') or [],
+        'role': role,
+        'about': (details.get('about') or '')[:ABOUT_LIMIT],
+        'anime': [
+            entry['anime']['title'] for entry in details.get('anime') or []
+            if entry.get('anime', {}).get('title')
+        ],
+    }
+
+
+def name_parts(raw: Dict) -> Set[str]:
+    """Get the names that would give the answer away, lowercased"""
+    parts = set()
+    for name in (raw.get('name'), raw.get('name_kanji')):
+        if not name:
+            continue
+        parts.add(name.lower())
+        parts.update(part for part in re.split(r'[\s,]+', name.lower()) if len(part) >= 3)
+    return parts
+
+
+def _name_pattern(parts: Set[str]) -> Optional[re.Pattern]:
+    if not parts:
+        return None
+    # Longest first, so a full name is redacted before its pieces
+    alternatives = [re.escape(part) for part in sorted(parts, key=len, reverse=True)]
+    return re.compile(r'(?<!\w)(?:' + '|'.join(alternatives) + r')(?!\w)', re.I)
+
+
+def redact(text: str, pattern: Optional[re.Pattern]) -> str:
+    """Replace every name in ``text``"""
+    return pattern.sub(REDACTED, text) if pattern else text
+
+
+def compile_hints(raw: Dict, anime_title: Optional[str] = None, limit: int = 4) -> List[str]:
+    """Build a character's hints from its raw details, vaguest first.
+
+    Names are redacted from everything except the last hint, which gives
+    the first letter of the name on purpose.
+    """
+    pattern = _name_pattern(name_parts(raw))
+    hints = []
+
+    # The crawl only keeps main characters, so only another role tells anything
+    if raw.get('role') and raw['role'].lower() != 'main':
+        hints.append(f"Role: {raw['role']} character")
+
+    about = _SOURCE_NOTE.sub('', raw.get('about') or '')
+    stats = [
+        f"{label.strip().title()}: {value}"
+        for label, value in _STAT_LINE.findall(about)
+        if label.strip().lower() in STAT_FIELDS
+    ]
+    if stats:
+        hints.append(redact(" | ".join(stats[:3]), pattern))
+
+    others = [title for title in raw.get('anime', []) if title != anime_title]
+    if others:
+        hints.append(redact(f"Also appears in: {', '.join(others[:3])}", pattern))
+
+    # A sentence of the biography, preferring one that doesn't name them
+    prose = ' '.join(line for line in about.splitlines() if not _STAT_LINE.match(line))
+    sentences = [s.strip() for s in _SENTENCE_END.split(prose) if 20 <= len(s.strip()) <= 250]
+    if sentences:
+        clean = [s for s in sentences if not pattern or not pattern.search(s)]
+        hints.append(clean[0] if clean else redact(sentences[0], pattern))
+
+    nicknames = [nick for nick in raw.get('nicknames', []) if not pattern or not pattern.search(nick)]
+    if nicknames:
+        hints.append(f"Also known as: {', '.join(nicknames[:2])}")
+
+    hints = hints[:limit]
+    if raw.get('name'):
+        hints.append(f"Their name starts with **{raw['name'][0]}**")
+    return hints
+
+
+def load_raw_details(path: Path) -> Dict[str, Dict]:
+    """Load the raw hint data saved by the crawl, by character id"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def save_raw_details(path: Path, details: Dict[str, Dict]) -> None:
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(details, f, ensure_ascii=False)
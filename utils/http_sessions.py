@@ -0,0 +1,50 @@
+from typing import Dict
+
+import aiohttp
+
+from utils.config import Config
+
+
+class HttpSessions:
+    """Long-lived aiohttp sessions owned by the bot and handed to its clients.
+
+    Each named profile in ``Config.HTTP_PROFILES`` gets one session with its
+    own connection limits and timeouts, so a slow host can't use up the
+    connections another one needs. Connections are kept alive and DNS
+    answers are cached, so repeat requests skip DNS, TCP and TLS setup.
+    Sessions are created on first use, inside the running event loop.
+    """
+
+    def __init__(self, profiles: Dict[str, Dict] = None):
+        self.profiles = profiles or Config.HTTP_PROFILES
+        self._sessions: Dict[str, aiohttp.ClientSession] = {}
+
+    def get(self, name: str = 'default') -> aiohttp.ClientSession:
+        """Get the session for a profile, opening it on first use"""
+        session = self._sessions.get(name)
+        if session is None or session.closed:
+            profile = self.profiles[name]
+            connector = aiohttp.TCPConnector(
+                limit=profile['limit'],
+                limit_per_host=profile['limit_per_host'],
+                ttl_dns_cache=Config.HTTP_DNS_CACHE_TTL,
+                keepalive_timeout=Config.HTTP_KEEPALIVE_TIMEOUT,
+                enable_cleanup_closed=True
+            )
+            session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(
+                    total=profile['timeout'],
+                    connect=Config.HTTP_CONNECT_TIMEOUT,
+                    sock_read=profile['timeout']
+                ),
+                headers={'User-Agent': Config.HTTP_USER_AGENT}
+            )
+            self._sessions[name] = session
+        return session
+
+    async def close(self) -> None:
+        """Close every session"""
+        for session in self._sessions.values():
+            await session.close()
+        self._sessions.clear()
@@ -4,10 +4,13 @@ import random
 import asyncio
 from datetime import datetime, timedelta
 from pathlib import Path
+from utils.config import Config
+from utils.metrics import JIKAN_RATE_LIMITS, JIKAN_RETRIES, JIKAN_SECONDS
+from utils.hints import compact_details, compile_hints, load_raw_details, save_raw_details
 import time
 
 class JikanAPI:
-    def __init__(self):
+    def __init__(self, session: aiohttp.ClientSession = None):
         self.base_url = "https://api.jikan.moe/v4/"
         self.cached_characters = []
         self.cached_openings = []
@@ -15,12 +18,19 @@ class JikanAPI:
         self.last_request = 0
         self.rate_limit = 1
         self.max_retries = 3
-        self.session = None
+        self.session = session
+        self._owns_session = session is None
         self.consecutive_429s = 0
         
         # Create data directory if it doesn't exist
         self.data_dir = Path("data/cache")
         self.data_dir.mkdir(parents=True, exist_ok=True)
+        self.character_details = None  # Raw hint data by character id, loaded by attach_hints
+
+    def use_session(self, session: aiohttp.ClientSession):
+        """Send requests through a session owned by someone else"""
+        self.session = session
+        self._owns_session = False
 
     async def _make_request(self, endpoint):
         """Make a request to the Jikan API with improved rate limiting"""
@@ -36,14 +46,18 @@ class JikanAPI:
             await asyncio.sleep(current_delay - time_since_last)
 
         url = f"{self.base_url}{endpoint}"
+        started = time.perf_counter()
         try:
             async with self.session.get(url) as response:
                 self.last_request = time.time()
+                JIKAN_SECONDS.observe(time.perf_counter() - started, 'crawler')
                 
                 if response.status == 200:
                     self.consecutive_429s = max(0, self.consecutive_429s - 1)
                     return await response.json()
                 elif response.status == 429:
+                    JIKAN_RATE_LIMITS.inc('crawler')
+                    JIKAN_RETRIES.inc('crawler')
                     self.consecutive_429s += 1
                     wait_time = min(4 * (1 + self.consecutive_429s), 60)  # Cap at 60 seconds
                     print(f"Rate limited on {endpoint}. Waiting {wait_time} seconds...")
@@ -134,6 +148,7 @@ class JikanAPI:
                     'mal_id': anime['mal_id'],
                     'title': anime.get('title', 'Unknown Title'),
                     'title_english': anime.get('title_english'),
+                    'title_synonyms': anime.get('title_synonyms') or [],
                     'score': float(anime.get('score', 0)) if anime.get('score') is not None else 0,
                     'popularity': int(anime.get('popularity', 99999)),
                     'type': anime.get('type', 'TV'),
@@ -166,8 +181,10 @@ class JikanAPI:
                         'image_url': char['character']['images']['jpg']['image_url'],
                         'favorites': int(char.get('favorites', 0)),
                         'anime_data': {
+                            'mal_id': anime_data.get('mal_id', anime_id),
                             'title': anime_data['title'],
                             'english_title': anime_data.get('title_english'),
+                            'title_synonyms': anime_data.get('title_synonyms', []),
                             'popularity': int(anime_data.get('popularity', 99999)),
                             'members': int(anime_data.get('members', 0)),
                             'score': float(anime_data.get('score', 0)),
@@ -196,6 +213,19 @@ class JikanAPI:
             return data['data']
         return None
 
+    async def attach_hints(self, characters):
+        """Give characters their hints, fetching details only for new characters"""
+        if self.character_details is None:
+            self.character_details = load_raw_details(self.data_dir / 'character_details.json')
+        for char in characters:
+            raw = self.character_details.get(char['id'])
+            if raw is None:
+                details = await self.get_character_details(char['id'])
+                if not details:
+                    continue
+                raw = self.character_details[char['id']] = compact_details(details, role='Main')
+            char['hints'] = compile_hints(raw, char['anime_data']['title'], Config.CHARACTER_HINT_LIMIT)
+
     async def get_anime_details(self, anime_id):
         """Get detailed anime information"""
         data = await self._make_request(f"anime/{anime_id}/full")
@@ -224,7 +254,10 @@ class JikanAPI:
                 'anime': anime_data['title'],
                 'type': 'OP',
                 'anime_data': {
+                    'mal_id': anime_data.get('mal_id', anime_id),
                     'title': anime_data['title'],
+                    'english_title': anime_data.get('title_english'),
+                    'title_synonyms': anime_data.get('title_synonyms', []),
                     'popularity': anime_data.get('popularity', 9999),
                     'members': anime_data.get('members', 0),
                     'score': anime_data.get('score', 0),
@@ -280,6 +313,7 @@ class JikanAPI:
                     if chars:
                         for char in chars:
                             char['difficulty'] = self._determine_difficulty(char['anime_data'])
+                        await self.attach_hints(chars)
                         all_characters.extend(chars)
                     
                     # Get themes
@@ -304,6 +338,9 @@ class JikanAPI:
         
         print(f"Finished processing all anime. Found {len(all_characters)} characters and {len(all_openings)} openings")
         
+        # Attach opening videos now, so games never have to search YouTube
+        await self.resolve_opening_videos(all_openings)
+        
         # Update cache
         self.cached_characters = all_characters
         self.cached_openings = all_openings
@@ -313,6 +350,19 @@ class JikanAPI:
         
         return all_characters, all_openings
 
+    async def resolve_opening_videos(self, openings):
+        """Attach YouTube videos to openings, if the YouTube API is set up"""
+        try:
+            from utils.youtube_api import YouTubeAPI
+            youtube = YouTubeAPI(self.data_dir)
+        except (ImportError, ValueError) as e:
+            print(f"Skipping opening videos: {e}")
+            return
+        try:
+            await youtube.resolve_openings(openings)
+        finally:
+            youtube.close()
+
     def _save_progress(self, characters, openings):
         """Save current progress to temporary files"""
         try:
@@ -323,6 +373,9 @@ class JikanAPI:
             # Save openings progress
             with open(self.data_dir / 'openings_progress.json', 'w', encoding='utf-8') as f:
                 json.dump(openings, f, ensure_ascii=False, indent=2)
+
+            if self.character_details:
+                save_raw_details(self.data_dir / 'character_details.json', self.character_details)
                 
         except Exception as e:
             print(f"Error saving progress: {e}")
@@ -336,12 +389,16 @@ class JikanAPI:
         # Save openings
         with open(self.data_dir / 'openings.json', 'w', encoding='utf-8') as f:
             json.dump(self.cached_openings, f, ensure_ascii=False, indent=2)
+
+        # Save the raw data hints are compiled from
+        if self.character_details:
+            save_raw_details(self.data_dir / 'character_details.json', self.character_details)
             
         # Save timestamp
         with open(self.data_dir / 'last_update.txt', 'w') as f:
             f.write(datetime.now().isoformat())
 
     async def cleanup(self):
-        """Properly close the session"""
-        if self.session:
+        """Properly close the session, unless it was handed to us"""
+        if self.session and self._owns_session:
             await self.session.close() 
\ No newline at end of file
@@ -0,0 +1,143 @@
+import asyncio
+import time
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+from utils.metrics import MAL_PARSE_SECONDS
+
+
+ANIME_PAGE_CLASSES = {'title-name', 'score-label', 'popularity', 'information', 'leftside'}
+
+
+def _text(tag) -> Optional[str]:
+    return tag.text.strip() if tag else None
+
+
+def _strain(html: str, *args, **kwargs) -> BeautifulSoup:
+    """Build a tree of only the tags matching a SoupStrainer, with their contents"""
+    return BeautifulSoup(html, 'html.parser', parse_only=SoupStrainer(*args, **kwargs))
+
+
+def _fragment(html: str, marker: str, tag: str) -> Optional[str]:
+    """Cut out the first ``tag`` element whose start tag contains ``marker``"""
+    at = html.find(marker)
+    if at < 0:
+        return None
+    start = html.rfind(f'<{tag}', 0, at)
+    end = html.find(f'</{tag}>', at)
+    if start < 0 or end < 0:
+        return None
+    return html[start:end + len(tag) + 3]
+
+
+def _with_class(*names: str):
+    """Match a class attribute holding any of ``names``.
+
+    Strainers see the raw attribute, so "a b" has to be split here for
+    multi-class tags to match the same way on every bs4 version.
+    """
+    wanted = set(names)
+
+    def matches(value) -> bool:
+        if not value:
+            return False
+        classes = value.split() if isinstance(value, str) else value
+        return not wanted.isdisjoint(classes)
+    return matches
+
+
+def parse_search(html: str, url: str = None) -> Optional[str]:
+    """Get the URL of the first result on an anime search page"""
+    link = _strain(html, 'a', class_=_with_class('hoverinfo_trigger')).find('a')
+    return link.get('href') if link else None
+
+
+def parse_anime(html: str, url: str = None) -> Optional[Dict]:
+    """Get an anime result from an anime's page"""
+    soup = _strain(html, class_=_with_class(*ANIME_PAGE_CLASSES))
+    title = soup.find('h1', {'class': 'title-name'})
+    if not title:
+        return None
+    # The synopsis has no class to strain on; cutting it out beats a second pass
+    synopsis_html = _fragment(html, 'itemprop="description"', 'p')
+    synopsis = BeautifulSoup(synopsis_html, 'html.parser').p if synopsis_html else None
+    image_div = soup.find('div', {'class': 'leftside'})
+    img = image_div.find('img') if image_div else None
+    return {
+        'title': _text(title),
+        'url': url,
+        'synopsis': _text(synopsis),
+        'score': _text(soup.find('div', {'class': 'score-label'})) or "N/A",
+        'popularity': _text(soup.find('span', {'class': 'popularity'})) or "N/A",
+        'info': _text(soup.find('div', {'class': 'information'})) or "No additional information available",
+        'image_url': img.get('data-src') if img else None,
+    }
+
+
+def parse_top(html: str, url: str = None) -> List[Dict]:
+    """Get the anime results listed on a top anime page"""
+    soup = _strain(html, 'tr', class_=_with_class('ranking-list'))
+    entries = []
+    for anime in soup.find_all('tr'):
+        link = anime.find('a', {'class': 'hoverinfo_trigger'})
+        if not link:
+            continue
+        img = anime.find('img')
+        entries.append({
+            'title': link.text.strip(),
+            'url': link.get('href'),
+            'synopsis': None,
+            'score': _text(anime.find('td', {'class': 'score'})) or "N/A",
+            'popularity': "N/A",
+            'info': None,
+            'image_url': img.get('data-src') if img else None,
+        })
+    return entries
+
+
+PAGE_PARSERS = {
+    'search': parse_search,
+    'anime': parse_anime,
+    'top': parse_top,
+}
+
+
+def run_parser(page_type: str, html: str, url: str = None) -> Tuple[Any, float]:
+    """Parse a page and time it; runs in a worker process"""
+    started = time.perf_counter()
+    result = PAGE_PARSERS[page_type](html, url)
+    return result, time.perf_counter() - started
+
+
+class MalParser:
+    """Parses scraped myanimelist.net pages off the event loop.
+
+    Pages are parsed in a process pool, keeping only the parts of the page
+    each page type needs, and come back as plain dicts and lists. Parse
+    times are kept per page type.
+    """
+
+    def __init__(self, workers: int = 1, samples: int = 100):
+        self.workers = workers
+        self.parse_times = defaultdict(lambda: deque(maxlen=samples))
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    async def parse(self, page_type: str, html: str, url: str = None) -> Any:
+        """Parse a page of the given type (see PAGE_PARSERS)"""
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        loop = asyncio.get_running_loop()
+        result, elapsed = await loop.run_in_executor(self._executor, run_parser, page_type, html, url)
+        self.parse_times[page_type].append(elapsed)
+        MAL_PARSE_SECONDS.observe(elapsed, page_type)
+        print(f"Parsed MAL {page_type} page ({len(html) // 1024}KB) in {elapsed * 1000:.1f}ms")
+        return result
+
+    def close(self) -> None:
+        """Shut down the worker processes"""
+        if self._executor:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
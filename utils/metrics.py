@@ -0,0 +1,302 @@
+import re
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import aiohttp
+from aiohttp import web
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+_SNOWFLAKE = re.compile(r'/\d{15,}')
+_TOKEN = re.compile(r'/[A-Za-z0-9_.-]{40,}')  # Interaction and webhook tokens
+
+Labels = Tuple[str, ...]
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names: Sequence[str], values: Labels, extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class Counter:
+    """A monotonically increasing count, per label set"""
+
+    kind = 'counter'
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name, self.help, self.labels = name, help, tuple(labels)
+        self._values: Dict[Labels, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def lines(self) -> Iterable[str]:
+        for labels, value in self._values.items():
+            yield f"{self.name}{_format_labels(self.labels, labels)} {value}"
+
+
+class Gauge:
+    """A value that goes up and down, set directly or read from a callback at scrape time"""
+
+    kind = 'gauge'
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (),
+                 callback: Optional[Callable[[], Dict[Labels, float]]] = None):
+        self.name, self.help, self.labels = name, help, tuple(labels)
+        self.callback = callback
+        self._values: Dict[Labels, float] = {}
+
+    def set(self, value: float, *labels: str) -> None:
+        self._values[labels] = value
+
+    def lines(self) -> Iterable[str]:
+        values = self._values
+        if self.callback is not None:
+            try:
+                values = self.callback()
+            except Exception as e:
+                print(f"Error collecting metric {self.name}: {e}")
+                values = {}
+        for labels, value in values.items():
+            yield f"{self.name}{_format_labels(self.labels, labels)} {value}"
+
+
+class Histogram:
+    """Observations counted into fixed buckets, per label set"""
+
+    kind = 'histogram'
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name, self.help, self.labels = name, help, tuple(labels)
+        self.buckets = tuple(buckets)
+        self._series: Dict[Labels, List] = {}  # labels -> [bucket counts..., sum, count]
+
+    def observe(self, value: float, *labels: str) -> None:
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [0] * (len(self.buckets) + 2)
+        index = bisect_left(self.buckets, value)
+        if index < len(self.buckets):
+            series[index] += 1
+        series[-2] += value
+        series[-1] += 1
+
+    def lines(self) -> Iterable[str]:
+        for labels, series in self._series.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                bucket = _format_labels(self.labels, labels, 'le="%s"' % bound)
+                yield f"{self.name}_bucket{bucket} {cumulative}"
+            bucket = _format_labels(self.labels, labels, 'le="+Inf"')
+            yield f"{self.name}_bucket{bucket} {series[-1]}"
+            yield f"{self.name}_sum{_format_labels(self.labels, labels)} {series[-2]}"
+            yield f"{self.name}_count{_format_labels(self.labels, labels)} {series[-1]}"
+
+
+class Registry:
+    """Holds every metric and renders them in the Prometheus text format.
+
+    Recording is a dict update, so metrics are always collected; only the
+    HTTP endpoint that exposes them is opt-in.
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+
+    def _add(self, metric):
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labels: Sequence[str] = ()) -> Counter:
+        return self._metrics.get(name) or self._add(Counter(name, help, labels))
+
+    def histogram(self, name: str, help: str, labels: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self._metrics.get(name) or self._add(Histogram(name, help, labels, buckets))
+
+    def gauge(self, name: str, help: str, labels: Sequence[str] = ()) -> Gauge:
+        return self._metrics.get(name) or self._add(Gauge(name, help, labels))
+
+    def gauge_callback(self, name: str, help: str, callback: Callable[[], Dict[Labels, float]],
+                       labels: Sequence[str] = ()) -> Gauge:
+        """Register a gauge read from ``callback`` whenever metrics are scraped.
+
+        Registering the same name again replaces the callback, so a reloaded
+        cog reports its new state instead of the old one's.
+        """
+        return self._add(Gauge(name, help, labels, callback))
+
+    def render(self) -> str:
+        output = []
+        for metric in self._metrics.values():
+            output.append(f"# HELP {metric.name} {metric.help}")
+            output.append(f"# TYPE {metric.name} {metric.kind}")
+            output.extend(metric.lines())
+        return '\n'.join(output) + '\n'
+
+
+metrics = Registry()
+
+COMMAND_SECONDS = metrics.histogram(
+    'anibot_command_seconds', 'Time to run a prefix or slash command', ['command'])
+GUESS_SECONDS = metrics.histogram(
+    'anibot_guess_seconds', 'Time to handle one queued guess', ['game'])
+DISCORD_REQUESTS = metrics.counter(
+    'anibot_discord_requests_total', 'Discord API responses by route and status', ['method', 'route', 'status'])
+DISCORD_RATE_LIMITS = metrics.counter(
+    'anibot_discord_rate_limits_total', 'Discord API 429 responses by route', ['method', 'route'])
+JIKAN_SECONDS = metrics.histogram(
+    'anibot_jikan_request_seconds', 'Jikan request latency', ['client'])
+JIKAN_RATE_LIMITS = metrics.counter(
+    'anibot_jikan_rate_limits_total', 'Jikan 429 responses', ['client'])
+JIKAN_RETRIES = metrics.counter(
+    'anibot_jikan_retries_total', 'Jikan requests retried after a rate limit', ['client'])
+ANIME_LOOKUP_SECONDS = metrics.histogram(
+    'anibot_anime_lookup_seconds', 'Time each anime info source took, by outcome', ['command', 'source', 'result'])
+ROUND_TRANSITION_SECONDS = metrics.histogram(
+    'anibot_round_transition_seconds', 'Time to move a character game to its next round', ['next_round'])
+GAME_ACTION_SECONDS = metrics.histogram(
+    'anibot_game_action_seconds', 'Time to handle a game action, by the control that sent it', ['action', 'control'])
+GAME_ACTION_API_CALLS = metrics.counter(
+    'anibot_game_action_api_calls_total',
+    'Discord API calls made handling game actions; per action, divide by anibot_game_action_seconds_count',
+    ['action', 'control'])
+MAL_PARSE_SECONDS = metrics.histogram(
+    'anibot_mal_parse_seconds', 'Time a worker took to parse a scraped myanimelist.net page', ['page'])
+DATASET_ITEMS = metrics.gauge(
+    'anibot_dataset_items', 'Items loaded from the dataset', ['kind'])
+DATASET_LOAD_SECONDS = metrics.gauge(
+    'anibot_dataset_load_seconds', 'Time the last dataset load and index build took')
+LOOP_LAG_SECONDS = metrics.histogram(
+    'anibot_event_loop_lag_seconds', 'How late the event loop woke a sleeping task',
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5))
+LOOP_STALLS = metrics.counter(
+    'anibot_event_loop_stalls_total', 'Times the watchdog caught the event loop blocked')
+
+_caches: Dict[str, Callable[[], Tuple[int, int]]] = {}
+
+
+def track_cache(name: str, stats: Callable[[], Tuple[int, int]]) -> None:
+    """Report a cache's (hits, misses) under ``name``"""
+    _caches[name] = stats
+
+
+def _cache_lookups() -> Dict[Labels, float]:
+    values = {}
+    for name, stats in _caches.items():
+        hits, misses = stats()
+        values[(name, 'hit')] = hits
+        values[(name, 'miss')] = misses
+    return values
+
+
+def _cache_hit_ratio() -> Dict[Labels, float]:
+    values = {}
+    for name, stats in _caches.items():
+        hits, misses = stats()
+        values[(name,)] = hits / (hits + misses) if hits + misses else 0
+    return values
+
+
+_queues: Dict[str, Callable[[], int]] = {}
+
+
+def track_queue(name: str, depth: Callable[[], int]) -> None:
+    """Report the number of items waiting in a queue under ``name``"""
+    _queues[name] = depth
+
+
+def _queue_depths() -> Dict[Labels, float]:
+    return {(name,): depth() for name, depth in _queues.items()}
+
+
+metrics.gauge_callback('anibot_cache_lookups', 'Cache lookups since start, by result',
+                       _cache_lookups, ['cache', 'result'])
+metrics.gauge_callback('anibot_cache_hit_ratio', 'Share of cache lookups that hit since start',
+                       _cache_hit_ratio, ['cache'])
+metrics.gauge_callback('anibot_queue_depth', 'Items waiting in a work queue, across channels',
+                       _queue_depths, ['queue'])
+
+
+class _GameAction:
+    __slots__ = ('labels', 'open')
+
+    def __init__(self, labels: Labels):
+        self.labels = labels
+        self.open = True
+
+
+_game_action: ContextVar[Optional[_GameAction]] = ContextVar('game_action', default=None)
+
+
+@contextmanager
+def game_action(action: str, control: str):
+    """Time a game action and count the Discord API calls made handling it.
+
+    Tasks started inside the block inherit the action, but calls they make
+    after it finishes (a throttled edit, a batched delete) are not counted.
+    """
+    current = _GameAction((action, control))
+    token = _game_action.set(current)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        current.open = False
+        _game_action.reset(token)
+        GAME_ACTION_SECONDS.observe(time.perf_counter() - started, action, control)
+
+
+def discord_trace() -> aiohttp.TraceConfig:
+    """Count Discord API responses per route, for discord.py's ``http_trace``"""
+    trace = aiohttp.TraceConfig()
+
+    async def on_request_end(session, context, params):
+        route = params.url.path.split('/api/v10', 1)[-1]
+        route = _TOKEN.sub('/:token', _SNOWFLAKE.sub('/:id', route))
+        status = params.response.status
+        DISCORD_REQUESTS.inc(params.method, route, str(status))
+        action = _game_action.get()
+        if action is not None and action.open:
+            GAME_ACTION_API_CALLS.inc(*action.labels)
+        if status == 429:
+            DISCORD_RATE_LIMITS.inc(params.method, route)
+
+    trace.on_request_end.append(on_request_end)
+    return trace
+
+
+class MetricsServer:
+    """Serves the registry at /metrics on a local port"""
+
+    def __init__(self, registry: Registry, host: str, port: int):
+        self.registry = registry
+        self.host, self.port = host, port
+        self._runner: Optional[web.AppRunner] = None
+
+    async def handle(self, request: web.Request) -> web.Response:
+        return web.Response(text=self.registry.render(), content_type='text/plain', charset='utf-8')
+
+    async def start(self) -> None:
+        app = web.Application()
+        app.router.add_get('/metrics', self.handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        print(f"Serving metrics on http://{self.host}:{self.port}/metrics")
+
+    async def stop(self) -> None:
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+
@@ -0,0 +1,117 @@
+import asyncio
+import sys
+import threading
+import time
+import traceback
+from collections import Counter, deque
+from datetime import datetime
+from pathlib import Path
+from typing import Deque, Dict, Optional
+
+from utils.metrics import LOOP_LAG_SECONDS, LOOP_STALLS
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})".replace(';', ':')
+
+
+def collapse_stack(frame) -> str:
+    """Render a frame and its callers root first, the way flamegraph.pl expects"""
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    return ';'.join(reversed(labels))
+
+
+def sample_stacks(seconds: float, interval: float = 0.005) -> Counter:
+    """Sample every other thread's stack for ``seconds``, counting each distinct stack.
+
+    Blocks the calling thread, so run it off the event loop. Stacks are
+    prefixed with their thread name, so the loop and the executor threads
+    show up as separate towers.
+    """
+    own_id = threading.get_ident()
+    counts = Counter()
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id != own_id:
+                counts[f"{names.get(thread_id, thread_id)};{collapse_stack(frame)}"] += 1
+        time.sleep(interval)
+    return counts
+
+
+def format_collapsed(counts: Counter) -> str:
+    """One ``stack count`` line per stack, ready for flamegraph.pl or speedscope"""
+    return ''.join(f"{stack} {count}\n" for stack, count in counts.most_common())
+
+
+class LoopWatchdog:
+    """Watches an event loop from a thread and reports what blocked it.
+
+    A task on the loop records a heartbeat every ``interval`` and how late it
+    woke. A daemon thread checks the heartbeat; once it is ``threshold``
+    seconds overdue the loop is stuck in synchronous code, so the thread
+    grabs the loop thread's stack while the culprit is still running.
+    """
+
+    def __init__(self, interval: float = 0.25, threshold: float = 0.5, history: int = 20):
+        self.interval = interval
+        self.threshold = threshold
+        self.stalls: Deque[Dict] = deque(maxlen=history)  # Most recent last
+        self._beat = time.monotonic()
+        self._pending: Optional[Dict] = None  # Stall captured but not over yet
+        self._loop_thread: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Start watching the running loop"""
+        self._loop_thread = threading.get_ident()
+        self._beat = time.monotonic()
+        self._stop.clear()
+        self._task = asyncio.create_task(self._heartbeat())
+        self._thread = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        self._stop.set()
+
+    async def _heartbeat(self) -> None:
+        while True:
+            started = time.monotonic()
+            await asyncio.sleep(self.interval)
+            self._beat = now = time.monotonic()
+            lag = max(0.0, now - started - self.interval)
+            LOOP_LAG_SECONDS.observe(lag)
+
+            stall, self._pending = self._pending, None
+            if stall is not None:
+                stall['seconds'] = round(lag, 3)
+                print(f"Event loop was blocked for {lag:.2f}s")
+
+    def _watch(self) -> None:
+        # Check a few times per threshold so the stack is caught mid-stall
+        while not self._stop.wait(self.threshold / 4):
+            overdue = time.monotonic() - self._beat - self.interval
+            if overdue < self.threshold or self._pending is not None:
+                continue
+            frame = sys._current_frames().get(self._loop_thread)
+            if frame is None:
+                continue
+            stack = ''.join(traceback.format_stack(frame))
+            self._pending = {
+                'at': datetime.now().isoformat(timespec='seconds'),
+                'seconds': round(overdue, 3),  # Updated with the full length once the loop wakes
+                'stack': stack,
+            }
+            self.stalls.append(self._pending)
+            LOOP_STALLS.inc()
+            print(f"Event loop blocked for over {overdue:.2f}s, currently in:\n{stack}")
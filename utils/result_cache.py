@@ -0,0 +1,86 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Set, Tuple
+
+
+class ResultCache:
+    """In-process cache of command results with TTLs and an LRU size bound.
+
+    A fresh entry is returned as is. An expired one is still returned right
+    away while a background task fetches a replacement (stale-while-revalidate),
+    so only the first lookup of a key ever waits on the network. Empty results
+    are not cached, and concurrent misses for the same key share one fetch.
+    """
+
+    def __init__(self, max_entries: int = 500):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self._entries: 'OrderedDict[Hashable, Tuple[float, Any]]' = OrderedDict()  # key -> (expires, value)
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def get(self, key: Hashable, ttl: float, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """Get a cached result, calling ``fetch`` to fill or refresh it"""
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            expires, value = entry
+            if time.monotonic() < expires:
+                self.hits += 1
+            else:
+                self.stale_hits += 1
+                if key not in self._inflight:
+                    task = asyncio.create_task(self._refresh(key, ttl, fetch))
+                    self._tasks.add(task)
+                    task.add_done_callback(self._tasks.discard)
+            return value
+
+        self.misses += 1
+        return await self._refresh(key, ttl, fetch)
+
+    async def _refresh(self, key, ttl, fetch) -> Any:
+        """Fetch a result once per key at a time and store it if it is not empty"""
+        future = self._inflight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(fetch())
+            self._inflight[key] = future
+            future.add_done_callback(lambda _: self._inflight.pop(key, None))
+        value = await asyncio.shield(future)
+        if value:
+            self._put(key, value, ttl)
+        return value
+
+    def _put(self, key, value, ttl) -> None:
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    @property
+    def hit_rate(self) -> float:
+        """Share of lookups answered from the cache, stale answers included"""
+        lookups = self.hits + self.stale_hits + self.misses
+        return (self.hits + self.stale_hits) / lookups if lookups else 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'entries': len(self._entries),
+            'hits': self.hits,
+            'stale_hits': self.stale_hits,
+            'misses': self.misses,
+            'hit_rate': self.hit_rate,
+        }
+
+    def close(self) -> None:
+        """Cancel background refreshes"""
+        for task in self._tasks:
+            task.cancel()
+
+    def __len__(self) -> int:
+        return len(self._entries)
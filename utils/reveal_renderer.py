@@ -0,0 +1,160 @@
+import asyncio
+import io
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Hashable, Optional, Set
+
+import aiohttp
+from PIL import Image, ImageFilter
+
+REVEAL_MODES = ('pixelate', 'blur', 'crop')
+
+
+def render_reveal(source: bytes, level: int, levels: int, mode: str = 'pixelate') -> bytes:
+    """Render one reveal level of an image; runs in a worker process.
+
+    Level 0 hides the most, level ``levels`` would be the full image.
+    """
+    with Image.open(io.BytesIO(source)) as image:
+        image = image.convert('RGB')
+        width, height = image.size
+        shown = (level + 1) / (levels + 1)  # Fraction of detail to show
+
+        if mode == 'blur':
+            radius = max(width, height) * 0.06 * (1 - shown)
+            image = image.filter(ImageFilter.GaussianBlur(radius))
+        elif mode == 'crop':
+            crop_w, crop_h = max(1, int(width * shown)), max(1, int(height * shown))
+            left, top = (width - crop_w) // 2, (height - crop_h) // 2
+            image = image.crop((left, top, left + crop_w, top + crop_h)).resize((width, height), Image.BICUBIC)
+        else:
+            blocks = max(4, int(64 * shown ** 2))  # Blocks across the longer side
+            scale = blocks / max(width, height)
+            small = image.resize((max(1, int(width * scale)), max(1, int(height * scale))), Image.BILINEAR)
+            image = small.resize((width, height), Image.NEAREST)
+
+        output = io.BytesIO()
+        image.save(output, format='JPEG', quality=85)
+        return output.getvalue()
+
+
+class ByteLRU:
+    """LRU cache of byte strings bounded by their total size"""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._items: 'OrderedDict[Hashable, bytes]' = OrderedDict()
+
+    def get(self, key: Hashable) -> Optional[bytes]:
+        data = self._items.get(key)
+        if data is not None:
+            self._items.move_to_end(key)
+        return data
+
+    def put(self, key: Hashable, data: bytes) -> None:
+        if len(data) > self.max_bytes:
+            return
+        old = self._items.pop(key, None)
+        if old is not None:
+            self.size -= len(old)
+        self._items[key] = data
+        self.size += len(data)
+        while self.size > self.max_bytes:
+            _, evicted = self._items.popitem(last=False)
+            self.size -= len(evicted)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+
+class RevealRenderer:
+    """Renders progressive reveals of character images off the event loop.
+
+    Source images are downloaded once and decoded only in a process pool.
+    Rendered levels are cached by (character id, level) within a byte
+    budget, and concurrent requests for the same level share one render.
+    """
+
+    def __init__(self, levels: int = 4, mode: str = 'pixelate', workers: int = 2,
+                 cache_bytes: int = 64 * 1024 * 1024, timeout: float = 10):
+        self.levels = levels
+        self.mode = mode if mode in REVEAL_MODES else 'pixelate'
+        self.workers = workers
+        self.timeout = timeout
+        self.cache = ByteLRU(cache_bytes)
+        self.hits = 0
+        self.misses = 0
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self._tasks: Set[asyncio.Task] = set()
+
+    def close(self) -> None:
+        """Stop background renders and shut down the worker processes"""
+        for task in self._tasks:
+            task.cancel()
+        if self._executor:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def render(self, session: aiohttp.ClientSession, char_id: str, url: str,
+                     level: int) -> Optional[bytes]:
+        """Get a reveal level as JPEG bytes, or None if it could not be made"""
+        key = (char_id, level)
+        data = self.cache.get(key)
+        if data is not None:
+            self.hits += 1
+            return data
+        self.misses += 1
+        return await self._shared(key, self._render(session, char_id, url, level))
+
+    def prerender(self, session: aiohttp.ClientSession, char_id: str, url: str,
+                  first: int, count: int = 1) -> None:
+        """Render upcoming levels in the background"""
+        for level in range(first, min(first + count, self.levels)):
+            if self.cache.get((char_id, level)) is None and (char_id, level) not in self._inflight:
+                task = asyncio.create_task(self.render(session, char_id, url, level))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+
+    async def _render(self, session, char_id, url, level) -> Optional[bytes]:
+        source = self.cache.get(('src', char_id))
+        if source is None:
+            source = await self._shared(('src', char_id), self._download(session, url))
+            if source is None:
+                return None
+            self.cache.put(('src', char_id), source)
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        loop = asyncio.get_running_loop()
+        try:
+            data = await loop.run_in_executor(
+                self._executor, render_reveal, source, level, self.levels, self.mode
+            )
+        except Exception as e:
+            print(f"Error rendering reveal {level} of character {char_id}: {e}")
+            return None
+        self.cache.put((char_id, level), data)
+        return data
+
+    async def _download(self, session, url) -> Optional[bytes]:
+        if session is None:
+            return None
+        try:
+            async with session.get(url, timeout=aiohttp.ClientTimeout(total=self.timeout)) as resp:
+                resp.raise_for_status()
+                return await resp.read()
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            print(f"Error downloading image {url}: {e}")
+            return None
+
+    async def _shared(self, key, coro) -> Optional[bytes]:
+        """Run ``coro`` unless the same key is already in flight, then share its result"""
+        future = self._inflight.get(key)
+        if future is not None:
+            coro.close()
+            return await asyncio.shield(future)
+        future = asyncio.ensure_future(coro)
+        self._inflight[key] = future
+        future.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(future)
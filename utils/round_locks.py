@@ -0,0 +1,28 @@
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Callable, Dict
+
+
+class RoundLocks:
+    """Per-channel locks serializing everything that can close a game's round.
+
+    Guesses, skips, ends and expiry each hold a channel's lock while they
+    check and change its game, and must re-check the game once they hold it.
+    A lock is forgotten once it is released with no game left in its channel,
+    never while a holder is still using it.
+    """
+
+    def __init__(self, is_active: Callable[[int], bool]):
+        self._is_active = is_active  # Whether a channel still has a game
+        self._locks: Dict[int, asyncio.Lock] = {}
+
+    @asynccontextmanager
+    async def hold(self, channel_id: int):
+        """Hold a channel's lock for the duration of the block"""
+        lock = self._locks.setdefault(channel_id, asyncio.Lock())
+        try:
+            async with lock:
+                yield
+        finally:
+            if not lock.locked() and not self._is_active(channel_id) and self._locks.get(channel_id) is lock:
+                del self._locks[channel_id]
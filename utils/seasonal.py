@@ -0,0 +1,70 @@
+from datetime import datetime
+from typing import Dict, List, Tuple
+
+SEASONS = ["winter", "spring", "summer", "fall"]
+SNAPSHOT_KINDS = ("current", "upcoming", "airing")
+
+
+def season_of(when: datetime) -> Tuple[int, str]:
+    """Get the (year, season) a date falls in"""
+    return when.year, SEASONS[(when.month - 1) // 3]
+
+
+def next_season(year: int, season: str) -> Tuple[int, str]:
+    """Get the (year, season) after the given one"""
+    following = SEASONS[(SEASONS.index(season) + 1) % 4]
+    return (year + 1 if following == "winter" else year), following
+
+
+def compact_anime(anime: Dict) -> Dict:
+    """Keep only the fields seasonal features show"""
+    return {
+        'mal_id': anime['mal_id'],
+        'title': anime.get('title'),
+        'url': anime.get('url'),
+        'score': anime.get('score') or "N/A",
+        'members': anime.get('members') or 0,
+        'type': anime.get('type'),
+        'episodes': anime.get('episodes'),
+        'synopsis': anime.get('synopsis'),
+        'image_url': anime.get('images', {}).get('jpg', {}).get('large_image_url'),
+    }
+
+
+async def _collect(api, endpoint: str, max_pages: int) -> List[Dict]:
+    """Walk a paginated Jikan listing, most popular first, without duplicates"""
+    anime_by_id = {}
+    for page in range(1, max_pages + 1):
+        separator = '&' if '?' in endpoint else '?'
+        data = await api._make_request(f"{endpoint}{separator}page={page}")
+        if not data or not data.get('data'):
+            break
+        for anime in data['data']:
+            anime_by_id.setdefault(anime['mal_id'], compact_anime(anime))
+        if not data.get('pagination', {}).get('has_next_page'):
+            break
+    return sorted(anime_by_id.values(), key=lambda anime: anime['members'], reverse=True)
+
+
+async def build_seasonal_snapshot(api, max_pages: int = 10, now: datetime = None) -> Dict:
+    """Fetch the current season, next season and everything airing.
+
+    ``api`` is a JikanAPI, whose rate limiting spaces out the requests.
+    """
+    now = now or datetime.now()
+    year, season = season_of(now)
+    upcoming_year, upcoming_season = next_season(year, season)
+    return {
+        'built_at': now.isoformat(),
+        'current': {
+            'year': year, 'season': season,
+            'anime': await _collect(api, f"seasons/{year}/{season}", max_pages),
+        },
+        'upcoming': {
+            'year': upcoming_year, 'season': upcoming_season,
+            'anime': await _collect(api, f"seasons/{upcoming_year}/{upcoming_season}", max_pages),
+        },
+        'airing': {
+            'anime': await _collect(api, "anime?status=airing&order_by=members&sort=desc", max_pages),
+        },
+    }
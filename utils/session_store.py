@@ -0,0 +1,88 @@
+import asyncio
+import contextlib
+import json
+import os
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+
+class SessionStore:
+    """Persists active game sessions as one small JSON file per channel.
+
+    Changes are marked in memory and written in batches from a worker thread,
+    so a busy game costs at most one write per interval. Ended sessions have
+    their file removed, which keeps start-up proportional to live games.
+    """
+
+    def __init__(self, name: str, root: Path = Path("data/sessions"), interval: float = 2.0):
+        self.dir = root / name
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self.interval = interval
+        self._dirty: Dict[int, Optional[dict]] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._writing: Optional[asyncio.Future] = None  # Batch the worker thread is writing
+
+    def load_all(self) -> Dict[int, dict]:
+        """Read every stored session, keyed by channel id"""
+        sessions = {}
+        for path in self.dir.glob("*.json"):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    sessions[int(path.stem)] = json.load(f)
+            except (ValueError, OSError) as e:
+                print(f"Skipping unreadable session {path.name}: {e}")
+        return sessions
+
+    def save(self, channel_id: int, snapshot: dict) -> None:
+        """Mark a session for writing"""
+        snapshot['saved_at'] = time.time()
+        self._mark(channel_id, snapshot)
+
+    def delete(self, channel_id: int) -> None:
+        """Mark a session for removal"""
+        self._mark(channel_id, None)
+
+    def _mark(self, channel_id: int, snapshot: Optional[dict]) -> None:
+        self._dirty[channel_id] = snapshot
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def flush(self) -> None:
+        """Write everything pending now, after any write already under way"""
+        while self._writing is not None and not self._writing.done():
+            await asyncio.wait([self._writing])
+        batch, self._dirty = self._dirty, {}
+        if batch:
+            # Shielded: cancelling the caller can't stop the thread, so the
+            # write stays tracked until it is really done
+            self._writing = asyncio.ensure_future(asyncio.to_thread(self._write, batch))
+            await asyncio.shield(self._writing)
+
+    async def close(self) -> None:
+        """Stop the writer and flush what is left"""
+        task, self._task = self._task, None
+        if task:
+            task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+        await self.flush()
+
+    async def _run(self) -> None:
+        while self._dirty:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"Error saving sessions: {e}")
+
+    def _write(self, batch: Dict[int, Optional[dict]]) -> None:
+        for channel_id, snapshot in batch.items():
+            path = self.dir / f"{channel_id}.json"
+            if snapshot is None:
+                path.unlink(missing_ok=True)
+                continue
+            tmp_path = path.with_suffix('.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(snapshot, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
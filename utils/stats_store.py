@@ -0,0 +1,83 @@
+import json
+import sqlite3
+from pathlib import Path
+from typing import Any, Dict, List
+
+GAME_TYPES = ('character', 'opening')
+
+
+class StatsStore:
+    """User statistics in SQLite, safe to share between bot processes.
+
+    Updates are single UPSERT statements, so processes running different
+    shards can record results for the same user without overwriting each
+    other. Stats from the old ``user_stats.json`` are imported once.
+    """
+
+    def __init__(self, path: Path, legacy_json: Path = None):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(path, timeout=10, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS user_stats ("
+            " user_id TEXT NOT NULL,"
+            " game_type TEXT NOT NULL,"
+            " wins INTEGER NOT NULL DEFAULT 0,"
+            " total INTEGER NOT NULL DEFAULT 0,"
+            " PRIMARY KEY (user_id, game_type))"
+        )
+        if legacy_json is not None and legacy_json.exists():
+            self._import_json(legacy_json)
+
+    def _import_json(self, legacy_json: Path) -> None:
+        if self.conn.execute("SELECT 1 FROM user_stats LIMIT 1").fetchone():
+            return
+        try:
+            with open(legacy_json, 'r', encoding='utf-8') as f:
+                stats = json.load(f)
+        except (ValueError, OSError) as e:
+            print(f"Could not import {legacy_json}: {e}")
+            return
+        rows = [
+            (user_id, game_type, games.get('wins', 0), games.get('total', 0))
+            for user_id, user in stats.items()
+            for game_type in GAME_TYPES
+            for games in [user.get(f"{game_type}_games", {})]
+            if games
+        ]
+        with self.conn:
+            self.conn.executemany("INSERT OR IGNORE INTO user_stats VALUES (?, ?, ?, ?)", rows)
+        print(f"Imported stats for {len(stats)} users from {legacy_json.name}")
+
+    def record(self, user_id: str, game_type: str, correct: bool) -> None:
+        """Count one game for a user"""
+        self.conn.execute(
+            "INSERT INTO user_stats VALUES (?, ?, ?, 1) "
+            "ON CONFLICT (user_id, game_type) DO UPDATE SET "
+            "wins = wins + excluded.wins, total = total + 1",
+            (str(user_id), game_type, int(correct))
+        )
+
+    def get(self, user_id: str) -> Dict[str, Any]:
+        """Get a user's stats in the same shape as the old JSON file"""
+        stats = {f"{game_type}_games": {"wins": 0, "total": 0} for game_type in GAME_TYPES}
+        for game_type, wins, total in self.conn.execute(
+            "SELECT game_type, wins, total FROM user_stats WHERE user_id = ?", (str(user_id),)
+        ):
+            stats[f"{game_type}_games"] = {"wins": wins, "total": total}
+        return stats
+
+    def leaderboard(self, game_type: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """Get the users with the most wins in a game"""
+        return [
+            {'user_id': user_id, 'correct': wins, 'total': total, 'win_rate': wins / total * 100}
+            for user_id, wins, total in self.conn.execute(
+                "SELECT user_id, wins, total FROM user_stats "
+                "WHERE game_type = ? AND total > 0 ORDER BY wins DESC, total ASC LIMIT ?",
+                (game_type, limit)
+            )
+        ]
+
+    def close(self) -> None:
+        self.conn.close()
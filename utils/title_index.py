@@ -0,0 +1,191 @@
+import itertools
+import math
+import re
+import unicodedata
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Optional, Set, Union
+
+AnimeKey = Union[int, str]
+
+_NON_ALNUM = re.compile(r'[^a-z0-9]+')
+_ARTICLES = ('the ', 'a ', 'an ')
+_TYPO_GRAMS = 3  # Trigrams a single mistyped letter can cost
+# Words that say nothing about which anime is meant, so they never match on their own
+STOP_WORDS = frozenset(
+    'a an and the of on in to no wo ni wa ga na de season seasons movie film part final '
+    'shipuden shippuden shippuuden ova ona tv special specials 2nd 3rd 4th second third ii iii'.split()
+)
+
+
+def normalize_title(title: Optional[str]) -> str:
+    """Lowercase a title and strip accents, punctuation and leading articles"""
+    if not title:
+        return ''
+    title = unicodedata.normalize('NFKD', title)
+    title = ''.join(c for c in title if not unicodedata.combining(c))
+    title = _NON_ALNUM.sub(' ', title.lower()).strip()
+    for article in _ARTICLES:
+        if title.startswith(article):
+            return title[len(article):]
+    return title
+
+
+def trigrams(text: str) -> Set[str]:
+    """Get the trigrams of a normalized title, padded so word edges count"""
+    padded = f" {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def significant_words(text: str) -> List[str]:
+    """Get the words of a normalized title that identify it"""
+    return [word for word in text.split() if word not in STOP_WORDS and not word.isdigit()]
+
+
+def fuzzy_key(text: str) -> str:
+    """Get the part of a normalized title that typo matching compares"""
+    # Numbers stay in, so "anime 2" is still told apart from "anime 3"
+    return ' '.join(word for word in text.split() if word not in STOP_WORDS) or text
+
+
+def anime_titles(anime_data: Dict) -> List[str]:
+    """Get every known title of an anime (romaji, English and synonyms)"""
+    titles = [
+        anime_data.get('title'),
+        anime_data.get('english_title') or anime_data.get('title_english'),
+    ]
+    titles.extend(anime_data.get('title_synonyms') or [])
+    return [title for title in titles if title]
+
+
+class TitleIndex:
+    """Trigram index resolving free-text guesses to anime ids.
+
+    A guess matches an anime when it is one of its titles, when its trigrams
+    are similar enough to a title's (catching typos), or when it is made of
+    whole words of a title that name most of it ("attack titan"). Guesses
+    made only of stop words like "season" or "movie" must match exactly.
+    Trigrams are taken from significant words only, so the stop words
+    shared by thousands of titles neither inflate similarity nor make every
+    lookup walk their posting lists.
+    """
+
+    def __init__(self, min_similarity: float = 0.6):
+        self.min_similarity = min_similarity
+        self._titles: List[str] = []          # Normalized title per slot
+        self._gram_counts: List[int] = []     # Trigram count per slot
+        self._slot_keys: List[AnimeKey] = []  # Anime key per slot
+        self._exact: Dict[str, Set[AnimeKey]] = defaultdict(set)
+        self._postings: Dict[str, List[int]] = defaultdict(list)
+        self._word_postings: Dict[str, List[int]] = defaultdict(list)  # Significant word -> slots
+        self._word_counts: List[int] = []     # Significant word count per slot
+        self._keys_by_title: Dict[str, AnimeKey] = {}
+        self._indexed = set()
+
+    @classmethod
+    def build(cls, records: Iterable[Dict], **kwargs) -> 'TitleIndex':
+        """Build an index from anime_data dicts"""
+        records = list(records)
+        index = cls(**kwargs)
+        # Register ids first so records without a mal_id (older caches)
+        # still resolve to the same key as their fully populated twins
+        for anime_data in records:
+            if anime_data.get('mal_id') and anime_data.get('title'):
+                index._keys_by_title.setdefault(anime_data['title'], anime_data['mal_id'])
+        for anime_data in records:
+            index.add(anime_data)
+        return index
+
+    def __len__(self):
+        return len(self._titles)
+
+    def key_for(self, anime_data: Dict) -> Optional[AnimeKey]:
+        """Get the key an anime is indexed under"""
+        if anime_data.get('mal_id'):
+            return anime_data['mal_id']
+        title = anime_data.get('title')
+        return self._keys_by_title.get(title, title)
+
+    def add(self, anime_data: Dict) -> None:
+        """Index every title of an anime"""
+        key = self.key_for(anime_data)
+        if key is None:
+            return
+
+        for title in anime_titles(anime_data):
+            norm = normalize_title(title)
+            if not norm or (key, norm) in self._indexed:
+                continue
+            self._indexed.add((key, norm))
+
+            slot = len(self._titles)
+            grams = trigrams(fuzzy_key(norm))
+            self._titles.append(norm)
+            self._gram_counts.append(len(grams))
+            self._slot_keys.append(key)
+            self._exact[norm].add(key)
+            for gram in grams:
+                self._postings[gram].append(slot)
+            words = set(significant_words(norm))
+            self._word_counts.append(len(words))
+            for word in words:
+                self._word_postings[word].append(slot)
+
+    def lookup(self, guess: str) -> Set[AnimeKey]:
+        """Get the keys of every anime a guess matches"""
+        norm = normalize_title(guess)
+        if not norm:
+            return set()
+
+        exact = self._exact.get(norm)
+        if exact:
+            return set(exact)
+
+        words = significant_words(norm)
+        if not words:
+            return set()  # Only stop words, e.g. "season"
+        return self._similar(norm) | self._by_words(norm, words)
+
+    def _similar(self, norm: str) -> Set[AnimeKey]:
+        """Get titles similar to a guess that also covers most of them.
+
+        Dice similarity alone lets half a title through ("attack" for
+        "attack titan"), so the guess may only miss a typo's worth of the
+        title's own trigrams, or 1 - min_similarity of them for long titles.
+        """
+        grams = trigrams(fuzzy_key(norm))
+        threshold = self.min_similarity
+        # Dice >= t needs at least this many shared trigrams, whatever the title's length
+        needed = math.ceil(threshold * len(grams) / (2 - threshold))
+        # Counted in C; a Python loop over the postings costs several times more
+        shared = Counter(itertools.chain.from_iterable(self._postings.get(gram, ()) for gram in grams))
+        matched = set()
+        for slot, count in shared.items():
+            if count < needed:
+                continue
+            size = self._gram_counts[slot]
+            if size - count > max(_TYPO_GRAMS, (1 - threshold) * size):
+                continue
+            if 2 * count / (len(grams) + size) >= threshold:
+                matched.add(self._slot_keys[slot])
+        return matched
+
+    def _by_words(self, norm: str, words: List[str]) -> Set[AnimeKey]:
+        """Get titles a guess names by most of their words, in any order"""
+        postings = sorted((self._word_postings.get(word, ()) for word in set(words)), key=len)
+        if not postings[0]:
+            return set()
+        guess_words = set(norm.split())
+        significant = len(set(words))
+        matched = set()
+        for slot in set(postings[0]).intersection(*postings[1:]):
+            # More than half of the title's words, or half when naming two or more
+            total = self._word_counts[slot]
+            if significant * 2 < total or (significant * 2 == total and significant < 2):
+                continue
+            if guess_words <= set(self._titles[slot].split()):
+                matched.add(self._slot_keys[slot])
+        return matched
+
+    def matches(self, guess: str, anime_data: Dict) -> bool:
+        """Check whether a guess resolves to the given anime"""
+        return self.key_for(anime_data) in self.lookup(guess)
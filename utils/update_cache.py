@@ -4,6 +4,9 @@ import aiohttp
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, List, Set
+from utils.config import Config
+from utils.hints import compact_details, compile_hints, load_raw_details, save_raw_details
+from utils.seasonal import next_season, season_of
 
 class CacheUpdater:
     def __init__(self):
@@ -14,11 +17,13 @@ class CacheUpdater:
         # Initialize cache files
         self.characters_file = self.cache_dir / "characters.json"
         self.last_update_file = self.cache_dir / "last_update.txt"
+        self.details_file = self.cache_dir / "character_details.json"
         
         # Load existing cache
         self.existing_characters = self.load_existing_cache()
         self.existing_char_ids = {char['id'] for char in self.existing_characters}
         self.existing_anime_ids = {char['anime_data']['mal_id'] for char in self.existing_characters if 'anime_data' in char and 'mal_id' in char['anime_data']}
+        self.character_details = load_raw_details(self.details_file)  # Raw hint data by character id
         
         # Rate limiting
         self.session = None
@@ -67,31 +72,9 @@ class CacheUpdater:
         """Get currently airing and upcoming anime IDs"""
         anime_ids = set()
         
-        # Get current season and year
-        now = datetime.now()
-        year = now.year
-        
-        # Map month to season
-        if now.month in (1, 2, 3):
-            current_season = "winter"
-        elif now.month in (4, 5, 6):
-            current_season = "spring"
-        elif now.month in (7, 8, 9):
-            current_season = "summer"
-        else:
-            current_season = "fall"
-            
-        # Calculate next season
-        seasons_order = ["winter", "spring", "summer", "fall"]
-        current_idx = seasons_order.index(current_season)
-        next_season = seasons_order[(current_idx + 1) % 4]
-        next_year = year + 1 if next_season == "winter" else year
-        
         # Fetch current and upcoming season
-        seasons_to_fetch = [
-            (year, current_season),
-            (next_year, next_season)
-        ]
+        current = season_of(datetime.now())
+        seasons_to_fetch = [current, next_season(*current)]
         
         for year, season in seasons_to_fetch:
             print(f"Fetching {season} {year} anime...")
@@ -188,6 +171,7 @@ class CacheUpdater:
                         'mal_id': anime['mal_id'],
                         'title': anime['title'],
                         'english_title': anime.get('title_english'),
+                        'title_synonyms': anime.get('title_synonyms') or [],
                         'images': anime['images'],
                         'popularity': safe_int(anime.get('popularity'), 99999),
                         'members': safe_int(anime.get('members'), 0),
@@ -196,6 +180,10 @@ class CacheUpdater:
                     }
                 }
                 
+                # Hints come from the details already fetched, so they cost nothing extra
+                raw = self.character_details[char_id] = compact_details(char_info, role=char['role'])
+                character_data['hints'] = compile_hints(raw, anime['title'], Config.CHARACTER_HINT_LIMIT)
+                
                 # Set difficulty based on favorites
                 favorites = character_data['favorites']
                 if favorites > 10000:
@@ -241,6 +229,7 @@ class CacheUpdater:
                 updated_cache = self.existing_characters + new_characters
                 with open(self.characters_file, 'w', encoding='utf-8') as f:
                     json.dump(updated_cache, f, ensure_ascii=False, indent=2)
+                save_raw_details(self.details_file, self.character_details)
                     
                 # Update timestamp
                 with open(self.last_update_file, 'w') as f:
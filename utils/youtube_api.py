@@ -1,38 +1,185 @@
 from googleapiclient.discovery import build
+from googleapiclient.errors import HttpError
+import asyncio
+import json
 import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+from zoneinfo import ZoneInfo
 from dotenv import load_dotenv
+from utils.config import Config
+
+# YouTube resets API quotas at midnight Pacific time
+QUOTA_TIMEZONE = ZoneInfo('America/Los_Angeles')
+
+
+class QuotaExceeded(Exception):
+    """Raised when YouTube refuses a request because the daily quota is spent"""
+
+
+class QuotaAccountant:
+    """Tracks the YouTube API units spent today, persisted across runs"""
+
+    def __init__(self, path: Path, daily_units: int):
+        self.path = path
+        self.daily_units = daily_units
+        self.day = None
+        self.used = 0
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                saved = json.load(f)
+            self.day, self.used = saved['day'], saved['used']
+        except (FileNotFoundError, json.JSONDecodeError, KeyError):
+            pass
+
+    def _roll_over(self):
+        today = datetime.now(QUOTA_TIMEZONE).date().isoformat()
+        if self.day != today:
+            self.day, self.used = today, 0
+
+    @property
+    def remaining(self) -> int:
+        self._roll_over()
+        return max(0, self.daily_units - self.used)
+
+    def can_spend(self, units: int) -> bool:
+        return self.remaining >= units
+
+    def spend(self, units: int):
+        self._roll_over()
+        self.used += units
+        self.save()
+
+    def exhaust(self):
+        """Mark today's quota as used up, e.g. after YouTube says so"""
+        self._roll_over()
+        self.used = max(self.used, self.daily_units)
+        self.save()
+
+    def save(self):
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump({'day': self.day, 'used': self.used}, f)
+
 
 class YouTubeAPI:
-    def __init__(self):
+    """Finds opening videos on YouTube.
+
+    The client library is synchronous, so requests run on a single worker
+    thread. Results, including searches that found nothing, are kept in a
+    JSON cache by (anime, opening) so each opening is only paid for once.
+    """
+
+    def __init__(self, cache_dir: Path = Path("data/cache")):
         load_dotenv()
         self.api_key = os.getenv('YOUTUBE_API_KEY')
         if not self.api_key:
             raise ValueError("YouTube API key not found in .env file")
         self.youtube = build('youtube', 'v3', developerKey=self.api_key)
+        self._executor = ThreadPoolExecutor(max_workers=1)  # The client is not thread safe
 
-    async def search_opening(self, anime_title: str, opening_name: str) -> dict:
-        """Search for an anime opening on YouTube"""
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        self.cache_file = cache_dir / "youtube_videos.json"
+        self.quota = QuotaAccountant(cache_dir / "youtube_quota.json", Config.YOUTUBE_DAILY_QUOTA)
         try:
-            query = f"{anime_title} {opening_name} opening full"
-            request = self.youtube.search().list(
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                self.videos = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.videos = {}
+
+    @staticmethod
+    def cache_key(anime_title: str, opening_name: str) -> str:
+        return f"{anime_title}\n{opening_name}".lower()
+
+    def _search(self, query: str) -> Optional[dict]:
+        """Run one search; blocking, so only called on the worker thread"""
+        try:
+            response = self.youtube.search().list(
                 part="snippet",
                 q=query,
                 type="video",
                 maxResults=1,
                 videoDuration="short"  # Typically openings are "short" duration
-            )
-            response = request.execute()
+            ).execute()
+        except HttpError as e:
+            if e.resp.status == 403 and b'quotaExceeded' in (e.content or b''):
+                raise QuotaExceeded() from e
+            raise
 
-            if not response.get('items'):
-                return None
+        if not response.get('items'):
+            return None
 
-            video = response['items'][0]
-            return {
-                'video_id': video['id']['videoId'],
-                'url': f"https://www.youtube.com/watch?v={video['id']['videoId']}",
-                'thumbnail_url': video['snippet']['thumbnails']['high']['url']
-            }
+        video = response['items'][0]
+        return {
+            'video_id': video['id']['videoId'],
+            'url': f"https://www.youtube.com/watch?v={video['id']['videoId']}",
+            'thumbnail_url': video['snippet']['thumbnails']['high']['url']
+        }
 
+    async def search_opening(self, anime_title: str, opening_name: str) -> dict:
+        """Search for an anime opening on YouTube, using the cache first"""
+        key = self.cache_key(anime_title, opening_name)
+        if key in self.videos:
+            return self.videos[key]
+        if not self.quota.can_spend(Config.YOUTUBE_SEARCH_COST):
+            return None
+
+        try:
+            query = f"{anime_title} {opening_name} opening full"
+            loop = asyncio.get_running_loop()
+            self.quota.spend(Config.YOUTUBE_SEARCH_COST)
+            video = await loop.run_in_executor(self._executor, self._search, query)
+        except QuotaExceeded:
+            print("YouTube quota exceeded for today")
+            self.quota.exhaust()
+            return None
         except Exception as e:
             print(f"Error searching YouTube: {e}")
-            return None 
\ No newline at end of file
+            return None
+
+        self.videos[key] = video
+        return video
+
+    async def resolve_openings(self, openings: List[Dict]) -> int:
+        """Attach videos to openings, most popular anime first, within today's quota.
+
+        Returns how many openings got a new lookup. Openings that are
+        already cached are filled in without spending quota.
+        """
+        pending = []
+        for opening in openings:
+            key = self.cache_key(opening['anime'], opening['name'])
+            if key in self.videos:
+                self._attach(opening, self.videos[key])
+            else:
+                pending.append(opening)
+        pending.sort(key=lambda op: op.get('anime_data', {}).get('members', 0), reverse=True)
+
+        looked_up = 0
+        for opening in pending:
+            if not self.quota.can_spend(Config.YOUTUBE_SEARCH_COST):
+                print(f"YouTube quota used up; {len(pending) - looked_up} openings left for another day")
+                break
+            self._attach(opening, await self.search_opening(opening['anime'], opening['name']))
+            looked_up += 1
+            if looked_up % 20 == 0:
+                self.save_cache()
+
+        self.save_cache()
+        print(f"Resolved {looked_up} opening videos, {self.quota.remaining} quota units left today")
+        return looked_up
+
+    @staticmethod
+    def _attach(opening: Dict, video: Optional[dict]):
+        if video:
+            opening['video_id'] = video['video_id']
+            opening['video_url'] = video['url']
+            opening['thumbnail_url'] = video['thumbnail_url']
+
+    def save_cache(self):
+        with open(self.cache_file, 'w', encoding='utf-8') as f:
+            json.dump(self.videos, f, ensure_ascii=False)
+
+    def close(self):
+        self._executor.shutdown(wait=False)